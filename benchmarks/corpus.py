@@ -0,0 +1,92 @@
+"""Deterministic synthetic drafts for benchmarks: HTML plus a matching Lexical tree."""
+import json
+import random
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+
+# Misspellings injected into the corpus; the fake LLM reports exactly these
+TYPOS = {
+    "teh": "the",
+    "recieve": "receive",
+    "seperate": "separate",
+    "occured": "occurred",
+    "definately": "definitely",
+    "wich": "which",
+}
+
+WORDS = (
+    "the editor reviews every draft before it goes out and checks that each argument "
+    "holds together while the story keeps moving from one idea to the next with clear "
+    "examples short sentences and a friendly but precise voice that readers trust"
+).split()
+
+# Paragraph counts per named corpus size
+SIZES = {
+    "small": 5,
+    "medium": 40,
+    "large": 200,
+    "xlarge": 1000,
+}
+
+@dataclass
+class Draft:
+    id: str
+    title: str
+    paragraphs: list[str]
+    updated_at: datetime
+
+    @property
+    def html(self) -> str:
+        blocks = []
+        for i, text in enumerate(self.paragraphs):
+            if i % 10 == 0:
+                blocks.append(f"<h2>Section {i // 10 + 1}</h2>")
+            blocks.append(f"<p>{text}</p>")
+        return "".join(blocks)
+
+    @property
+    def lexical(self) -> str:
+        children = []
+        for i, text in enumerate(self.paragraphs):
+            if i % 10 == 0:
+                children.append({"type": "extended-heading", "tag": "h2", "version": 1, "children": [_text(f"Section {i // 10 + 1}")]})
+            # Split each paragraph into a plain and a bold run so patches cross node boundaries
+            middle = len(text) // 2
+            children.append({"type": "paragraph", "version": 1, "children": [_text(text[:middle]), _text(text[middle:], 1)]})
+        return json.dumps({"root": {"type": "root", "version": 1, "children": children}})
+
+    def as_ghost_post(self, status: str) -> dict:
+        timestamp = self.updated_at.isoformat().replace("+00:00", "Z")
+        return {
+            "id": self.id,
+            "uuid": f"uuid-{self.id}",
+            "title": self.title,
+            "slug": self.id,
+            "html": self.html,
+            "lexical": self.lexical,
+            "mobiledoc": None,
+            "status": status,
+            "visibility": "public",
+            "created_at": timestamp,
+            "updated_at": timestamp,
+        }
+
+def _text(text: str, fmt: int = 0) -> dict:
+    return {"type": "extended-text", "text": text, "format": fmt, "detail": 0, "mode": "normal", "style": "", "version": 1}
+
+def make_paragraph(rng: random.Random, typo_rate: float) -> str:
+    words = [rng.choice(WORDS) for _ in range(rng.randint(40, 90))]
+    for i in range(len(words)):
+        if rng.random() < typo_rate:
+            words[i] = rng.choice(list(TYPOS))
+    words[0] = words[0].capitalize()
+    return " ".join(words) + "."
+
+def make_draft(size: str, index: int = 0, seed: int = 0, typo_rate: float = 0.01) -> Draft:
+    rng = random.Random(f"{seed}-{size}-{index}")
+    paragraphs = [make_paragraph(rng, typo_rate) for _ in range(SIZES[size])]
+    updated_at = datetime(2024, 1, 1, tzinfo=timezone.utc) + timedelta(hours=index)
+    return Draft(id=f"{size}-{index}", title=f"{size.title()} draft {index}", paragraphs=paragraphs, updated_at=updated_at)
+
+def make_corpus(sizes: list[str], drafts_per_size: int, seed: int = 0) -> list[Draft]:
+    return [make_draft(size, i, seed) for size in sizes for i in range(drafts_per_size)]
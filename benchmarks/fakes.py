@@ -0,0 +1,187 @@
+"""Local stand-ins for the Ghost Admin API and the OpenAI chat completions API.
+
+Both run a stdlib HTTP server on a background thread and add a configurable
+latency with jitter to every response, so benchmarks exercise the real HTTP
+clients without network access or API spend.
+"""
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Optional
+from urllib.parse import parse_qs, urlparse
+from benchmarks.corpus import TYPOS, Draft
+
+class LatencyModel:
+    def __init__(self, latency: float, jitter: float, seed: int = 0):
+        self.latency = latency
+        self.jitter = jitter
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def sleep(self) -> None:
+        with self._lock:
+            delay = self.latency + self._rng.uniform(-self.jitter, self.jitter)
+        if delay > 0:
+            time.sleep(delay)
+
+class _FakeServer:
+    handler_class: type[BaseHTTPRequestHandler]
+
+    def __init__(self, latency: LatencyModel):
+        self.latency = latency
+        handler = type("Handler", (self.handler_class,), {"fake": self})
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        self.server.daemon_threads = True
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def __enter__(self) -> "_FakeServer":
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+class _JSONHandler(BaseHTTPRequestHandler):
+    fake: Any
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+    def send_json(self, payload: Any, status: int = 200) -> None:
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def read_json(self) -> Any:
+        length = int(self.headers.get("Content-Length", 0))
+        return json.loads(self.rfile.read(length) or b"{}")
+
+class _GhostHandler(_JSONHandler):
+    POST_PATH = re.compile(r"^/ghost/api/admin/posts/([^/]+)/$")
+
+    def do_GET(self) -> None:
+        self.fake.latency.sleep()
+        url = urlparse(self.path)
+        query = {k: v[0] for k, v in parse_qs(url.query).items()}
+        if url.path == "/ghost/api/admin/posts/":
+            self.send_json(self.fake.list_posts(query))
+            return
+        match = self.POST_PATH.match(url.path)
+        post = self.fake.posts.get(match.group(1)) if match else None
+        if post is None:
+            self.send_json({"errors": [{"message": "Not found"}]}, 404)
+            return
+        self.send_json({"posts": [post]})
+
+    def do_PUT(self) -> None:
+        self.fake.latency.sleep()
+        match = self.POST_PATH.match(urlparse(self.path).path)
+        post = self.fake.posts.get(match.group(1)) if match else None
+        if post is None:
+            self.send_json({"errors": [{"message": "Not found"}]}, 404)
+            return
+        post.update(self.read_json()["posts"][0])
+        self.send_json({"posts": [post]})
+
+class FakeGhostServer(_FakeServer):
+    handler_class = _GhostHandler
+
+    def __init__(self, drafts: list[Draft], published: list[Draft], latency: LatencyModel):
+        super().__init__(latency)
+        self.posts: dict[str, dict] = {}
+        for draft in drafts:
+            self.posts[draft.id] = draft.as_ghost_post("draft")
+        for post in published:
+            self.posts[post.id] = post.as_ghost_post("published")
+
+    def list_posts(self, query: dict[str, str]) -> dict:
+        posts = sorted(self.posts.values(), key=lambda p: p["updated_at"], reverse=True)
+        status = re.search(r"status:(\w+)", query.get("filter", ""))
+        if status:
+            posts = [p for p in posts if p["status"] == status.group(1)]
+
+        limit = int(query.get("limit", 15))
+        page = int(query.get("page", 1))
+        pages = max((len(posts) + limit - 1) // limit, 1)
+        selected = posts[(page - 1) * limit:page * limit]
+        if "fields" in query:
+            fields = query["fields"].split(",")
+            selected = [{f: p.get(f) for f in fields} for p in selected]
+        return {
+            "posts": selected,
+            "meta": {"pagination": {"page": page, "limit": limit, "pages": pages, "total": len(posts),
+                                     "next": page + 1 if page < pages else None}},
+        }
+
+class _OpenAIHandler(_JSONHandler):
+    def do_POST(self) -> None:
+        request = self.read_json()
+        self.fake.latency.sleep()
+        self.send_json(self.fake.complete(request))
+
+class FakeOpenAIServer(_FakeServer):
+    """Answers structured-output requests based on the requested schema name."""
+    handler_class = _OpenAIHandler
+
+    def __init__(self, latency: LatencyModel):
+        super().__init__(latency)
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def _content(self, schema_name: Optional[str], prompt: str) -> dict:
+        if schema_name == "StyleAnalysis":
+            return {"guidelines": "Friendly, precise voice. Short sentences. Clear examples."}
+        if schema_name == "LexicalUpdateResponse":
+            original = prompt.split("Original Lexical JSON:\n", 1)[-1].split("\n\nApproved Changes:", 1)[0]
+            return {"lexical_json": original}
+        suggestions = []
+        for typo, fix in TYPOS.items():
+            match = re.search(rf"\w+ {typo}\b", prompt)
+            if match:
+                suggestions.append({
+                    "type": "typo",
+                    "location": "Paragraph",
+                    "original_text": match.group(0),
+                    "proposed_text": match.group(0).replace(typo, fix),
+                    "reasoning": f"'{typo}' is misspelled.",
+                })
+        return {"suggestions": suggestions}
+
+    def complete(self, request: dict) -> dict:
+        with self._lock:
+            self.calls += 1
+            call_id = self.calls
+        schema = (request.get("response_format") or {}).get("json_schema") or {}
+        prompt = "\n".join(m.get("content", "") for m in request.get("messages", []))
+        content = json.dumps(self._content(schema.get("name"), prompt))
+        prompt_tokens = len(prompt) // 4
+        completion_tokens = len(content) // 4
+        return {
+            "id": f"chatcmpl-{call_id}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request.get("model", "fake"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content, "refusal": None},
+                "finish_reason": "stop",
+                "logprobs": None,
+            }],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+            },
+        }
@@ -0,0 +1,187 @@
+"""End-to-end performance benchmarks against local fake Ghost and OpenAI servers.
+
+    python -m benchmarks.run --sizes small medium large --iterations 5 --output bench.json
+
+Reports per-stage latency percentiles, throughput and peak traced memory as JSON.
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import re
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Any, Awaitable, Callable
+from benchmarks.corpus import SIZES, TYPOS, Draft, make_corpus
+from benchmarks.fakes import FakeGhostServer, FakeOpenAIServer, LatencyModel
+
+def percentile(samples: list[float], pct: float) -> float:
+    """Nearest-rank percentile."""
+    ordered = sorted(samples)
+    rank = max(math.ceil(pct / 100 * len(ordered)), 1)
+    return ordered[rank - 1]
+
+def summarize(stage: str, size: str, samples: list[float], peak_bytes: int, items: int = 1) -> dict[str, Any]:
+    total = sum(samples)
+    return {
+        "stage": stage,
+        "size": size,
+        "iterations": len(samples),
+        "mean_ms": round(statistics.fmean(samples) * 1000, 3),
+        "p50_ms": round(percentile(samples, 50) * 1000, 3),
+        "p90_ms": round(percentile(samples, 90) * 1000, 3),
+        "p99_ms": round(percentile(samples, 99) * 1000, 3),
+        "max_ms": round(max(samples) * 1000, 3),
+        "throughput_per_s": round(items * len(samples) / total, 3) if total else None,
+        "peak_memory_kb": round(peak_bytes / 1024, 1),
+    }
+
+async def measure(
+    stage: str, size: str, iterations: int, fn: Callable[[], Awaitable[Any]], items: int = 1,
+    reset: Callable[[], None] = lambda: None,
+) -> dict[str, Any]:
+    """Time `iterations` runs, then one extra run under tracemalloc for peak memory.
+
+    Memory is traced separately so its overhead does not skew the latencies.
+    """
+    samples = []
+    for _ in range(iterations):
+        reset()
+        start = time.perf_counter()
+        await fn()
+        samples.append(time.perf_counter() - start)
+
+    reset()
+    tracemalloc.start()
+    try:
+        await fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return summarize(stage, size, samples, peak, items)
+
+def typo_suggestions(draft: Draft) -> list:
+    from proofreader.agent.suggestions import Suggestion, SuggestionType
+
+    suggestions = []
+    for paragraph in draft.paragraphs:
+        for match in re.finditer(rf"\w+ ({'|'.join(TYPOS)})\b", paragraph):
+            suggestions.append(Suggestion(
+                type=SuggestionType.TYPO,
+                location="Paragraph",
+                original_text=match.group(0),
+                proposed_text=match.group(0).replace(match.group(1), TYPOS[match.group(1)]),
+                reasoning="Spelling",
+            ))
+    return suggestions
+
+async def run_benchmarks(args: argparse.Namespace, drafts: list[Draft]) -> list[dict[str, Any]]:
+    # Imported here: settings are read from the environment prepared by main()
+    from sqlalchemy import delete
+    from proofreader.agent.graph import create_agent_graph
+    from proofreader.db import operations
+    from proofreader.db.models import LLMResponse, ParagraphAnalysis, StyleGuide
+    from proofreader.editing.lexical import patch_lexical
+    from proofreader.ghost.client import get_ghost_client, close_ghost_clients
+
+    operations.init_db()
+
+    def clear_caches() -> None:
+        # Every graph run starts cold so iterations are comparable
+        with operations.SessionLocal() as db:
+            db.execute(delete(ParagraphAnalysis))
+            db.execute(delete(StyleGuide))
+            db.execute(delete(LLMResponse))
+            db.commit()
+
+    client = get_ghost_client()
+    graph = create_agent_graph()
+    results = []
+
+    async def list_drafts() -> None:
+        async for _ in client.iter_post_summaries(status="draft", page_size=15):
+            pass
+
+    results.append(await measure("ghost_list_drafts", "all", args.iterations, list_drafts, items=len(drafts)))
+
+    for size in args.sizes:
+        sized = [d for d in drafts if d.id.startswith(f"{size}-")]
+
+        async def get_posts() -> None:
+            for draft in sized:
+                await client.get_post(draft.id)
+
+        async def run_graph() -> None:
+            posts = [await client.get_post(d.id) for d in sized]
+            await asyncio.gather(*(
+                graph.ainvoke({"post": post, "style_guidelines": "", "suggestions": [], "error": None})
+                for post in posts
+            ))
+
+        cases = [(d.lexical, typo_suggestions(d)) for d in sized]
+
+        async def patch() -> None:
+            for lexical, suggestions in cases:
+                patch_lexical(lexical, suggestions)
+
+        results.append(await measure("ghost_get_post", size, args.iterations, get_posts, items=len(sized)))
+        results.append(await measure("agent_graph", size, args.iterations, run_graph, items=len(sized), reset=clear_caches))
+        results.append(await measure("lexical_patch", size, args.iterations, patch, items=len(sized)))
+
+    await close_ghost_clients()
+    return results
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Proofreader performance benchmarks")
+    parser.add_argument("--sizes", nargs="+", choices=list(SIZES), default=["small", "medium", "large"])
+    parser.add_argument("--drafts-per-size", type=int, default=2)
+    parser.add_argument("--iterations", type=int, default=5)
+    parser.add_argument("--ghost-latency", type=float, default=0.02, help="Seconds added to every Ghost response")
+    parser.add_argument("--llm-latency", type=float, default=0.2, help="Seconds added to every LLM response")
+    parser.add_argument("--jitter", type=float, default=0.05, help="Uniform +/- jitter in seconds")
+    parser.add_argument("--llm-concurrency", type=int, default=8)
+    parser.add_argument("--rate-limit-delay", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write JSON results here instead of stdout")
+    args = parser.parse_args()
+
+    drafts = make_corpus(args.sizes, args.drafts_per_size, args.seed)
+    published = make_corpus(["medium"], 15, args.seed + 1)
+    for post in published:
+        post.id = f"published-{post.id}"
+
+    ghost = FakeGhostServer(drafts, published, LatencyModel(args.ghost_latency, args.jitter, args.seed))
+    llm = FakeOpenAIServer(LatencyModel(args.llm_latency, args.jitter, args.seed))
+    with ghost, llm, tempfile.TemporaryDirectory() as tmp:
+        os.environ.update({
+            "GHOST_URL": ghost.url,
+            "GHOST_API_KEY": "bench:" + "00" * 32,
+            "OPENAI_API_KEY": "bench",
+            "OPENAI_BASE_URL": f"{llm.url}/v1",
+            "DATABASE_URL": f"sqlite:///{tmp}/bench.db",
+            "RATE_LIMIT_DELAY": str(args.rate_limit_delay),
+            "LLM_MAX_CONCURRENCY": str(args.llm_concurrency),
+        })
+        started = time.perf_counter()
+        stages = asyncio.run(run_benchmarks(args, drafts))
+        report = {
+            "config": {k: v for k, v in vars(args).items() if k != "output"},
+            "python": sys.version.split()[0],
+            "wall_time_s": round(time.perf_counter() - started, 3),
+            "llm_calls": llm.calls,
+            "stages": stages,
+        }
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+import asyncio
+import re
+import sys
+from typing import Optional
+from pydantic import BaseModel
+from proofreader.agent.suggestions import Suggestion, SuggestionList
+from proofreader.agent.utils import get_llm_response
+from proofreader.agent.document import Document, FORMAT_NOTE
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+class Chunk(BaseModel):
+    index: int
+    # Indices into the document's blocks covered by this chunk, overlap included
+    paragraphs: list[int]
+    text: str
+
+def _consecutive_runs(indices: list[int]) -> list[list[int]]:
+    runs: list[list[int]] = []
+    for i in indices:
+        if runs and runs[-1][-1] == i - 1:
+            runs[-1].append(i)
+        else:
+            runs.append([i])
+    return runs
+
+def build_chunks(
+    paragraphs: list[str], max_chars: int, overlap: int, indices: Optional[list[int]] = None
+) -> list[Chunk]:
+    """Group consecutive paragraphs into windows of roughly `max_chars`.
+
+    Each window after the first starts with the last `overlap` paragraphs of the
+    previous one so issues straddling a boundary are seen in full by one chunk.
+    When `indices` is given only those paragraphs are chunked; windows never
+    span a gap between them.
+    """
+    if indices is None:
+        indices = list(range(len(paragraphs)))
+
+    chunks: list[Chunk] = []
+    for run in _consecutive_runs(sorted(indices)):
+        start = 0
+        while start < len(run):
+            end = start
+            size = 0
+            while end < len(run) and (end == start or size + len(paragraphs[run[end]]) <= max_chars):
+                size += len(paragraphs[run[end]])
+                end += 1
+
+            window = run[max(start - overlap, 0) if start else start:end]
+            chunks.append(Chunk(
+                index=len(chunks),
+                paragraphs=window,
+                text="\n".join(paragraphs[i] for i in window),
+            ))
+            start = end
+    return chunks
+
+def document_summary(document: Document, max_chars: int) -> str:
+    """Document-level view used by the coherence check.
+
+    Short posts are rendered in full. Long posts are condensed to their headings
+    plus the first and last sentence of every paragraph, which keeps the
+    narrative arc and transitions visible without sending the full body.
+    """
+    full = document.render()
+    if len(full) <= max_chars:
+        return full
+
+    lines = []
+    for i, block in enumerate(document.blocks):
+        rendered = document.render_block(i)
+        sentences = [s for s in _SENTENCE_END.split(block.text) if s]
+        if block.kind.startswith("h") or len(sentences) <= 2:
+            lines.append(rendered)
+        else:
+            prefix = rendered[:len(rendered) - len(block.text)]
+            lines.append(f"{prefix}{sentences[0]} [...] {sentences[-1]}")
+    return "\n".join(lines)
+
+def deduplicate(suggestions: list[Suggestion]) -> list[Suggestion]:
+    """Drop repeats of the same edit reported by overlapping chunks."""
+    seen = set()
+    unique = []
+    for s in suggestions:
+        key = (s.type, " ".join(s.original_text.split()), " ".join(s.proposed_text.split()))
+        if key in seen:
+            continue
+        seen.add(key)
+        unique.append(s)
+    return unique
+
+async def analyze_chunks(
+    chunks: list[Chunk], system_prompt: str, instruction: str, label: str
+) -> list[Optional[list[Suggestion]]]:
+    """Run the same prompt over every chunk concurrently.
+
+    Returns one entry per chunk; a failing chunk yields None so the rest of the
+    document still gets reviewed. Raises only if every chunk failed.
+    """
+    async def analyze(chunk: Chunk) -> list[Suggestion]:
+        part = f" (part {chunk.index + 1} of {len(chunks)})" if len(chunks) > 1 else ""
+        user_prompt = f"{instruction}{part}. {FORMAT_NOTE}\n\n{chunk.text}"
+        response: SuggestionList = await get_llm_response(system_prompt, user_prompt, SuggestionList)
+        return response.suggestions
+
+    results = await asyncio.gather(*(analyze(c) for c in chunks), return_exceptions=True)
+
+    if results and all(isinstance(r, BaseException) for r in results):
+        raise RuntimeError(f"{label} failed for every chunk: {results[0]}")
+
+    outcome: list[Optional[list[Suggestion]]] = []
+    for chunk, result in zip(chunks, results):
+        if isinstance(result, BaseException):
+            print(f"{label} failed for chunk {chunk.index + 1}: {result}", file=sys.stderr)
+            outcome.append(None)
+        else:
+            outcome.append(result)
+    return outcome
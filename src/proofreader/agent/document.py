@@ -0,0 +1,190 @@
+import html as html_lib
+import json
+import re
+from dataclasses import dataclass, field
+from typing import Optional
+from proofreader.ghost.models import Post
+
+# Tags that start or end a paragraph-level block in Ghost HTML
+BLOCK_TAGS = {
+    "p", "h1", "h2", "h3", "h4", "h5", "h6", "li", "blockquote", "pre",
+    "figcaption", "td", "th", "div", "section", "aside", "hr", "ul", "ol",
+    "table", "tr", "figure", "header", "footer",
+}
+# Content of these tags never reaches the prompt
+SKIPPED_TAGS = {"script", "style", "svg", "iframe", "noscript"}
+
+_TOKEN = re.compile(r"<!--.*?-->|<[^>]*>|&#?\w+;|[^<&]+|[<&]", re.DOTALL)
+_TAG_NAME = re.compile(r"<\s*(/?)\s*([a-zA-Z0-9]+)")
+_WHITESPACE = re.compile(r"\s")
+_LOCATION = re.compile(r"(?:paragraph|para|\[P)\s*(\d+)", re.IGNORECASE)
+
+# Appended to user prompts that carry a rendered Document
+FORMAT_NOTE = (
+    "Each paragraph starts with its number in brackets, e.g. [P3]; headings are marked with #. "
+    "Use 'Paragraph N' as the location and copy original_text exactly from the paragraph "
+    "text, without the [PN] prefix or heading marks."
+)
+
+@dataclass
+class Block:
+    """One paragraph-level block of plain text with a map back to the source.
+
+    `offsets[i]` is the source offset of `text[i]`; `offsets[len(text)]` is the
+    source offset just past the last character.
+    """
+    kind: str
+    text: str
+    offsets: list[int] = field(default_factory=list)
+
+    def source_span(self, start: int, end: int) -> tuple[int, int]:
+        if end <= start:
+            return self.offsets[start], self.offsets[start]
+        # End just past the last source character of the match, so a trailing
+        # entity such as &amp; is covered completely
+        return self.offsets[start], self._source_end(end - 1)
+
+    def _source_end(self, i: int) -> int:
+        following = self.offsets[i + 1]
+        return following if following > self.offsets[i] else self.offsets[i] + 1
+
+@dataclass
+class Document:
+    """Compact, paragraph-numbered text form of a post used for prompting.
+
+    Markup, attributes and card payloads are dropped, so the model sees far
+    fewer tokens than raw HTML/Lexical while suggestions can still be mapped
+    back to exact offsets in `source`.
+    """
+    source: str
+    blocks: list[Block]
+    source_format: str  # "html" or "lexical" (flattened text of the Lexical tree)
+
+    @classmethod
+    def from_html(cls, source: str) -> "Document":
+        builder = _BlockBuilder()
+        skipping = 0
+        for token in _TOKEN.finditer(source):
+            value = token.group()
+            if value.startswith("<") and len(value) > 1:
+                tag = _TAG_NAME.match(value)
+                if not tag:
+                    continue  # comments, doctype
+                closing, name = tag.group(1) == "/", tag.group(2).lower()
+                if name in SKIPPED_TAGS and not value.endswith("/>"):
+                    skipping += -1 if closing else 1
+                    skipping = max(skipping, 0)
+                elif name in BLOCK_TAGS:
+                    builder.end_block()
+                    if not closing:
+                        builder.kind = name
+                elif name == "br":
+                    builder.add(" ", token.start(), token.end())
+                continue
+            if skipping:
+                continue
+            if value.startswith("&") and len(value) > 1:
+                builder.add(html_lib.unescape(value), token.start(), token.end())
+            else:
+                for i, char in enumerate(value):
+                    builder.add(char, token.start() + i, token.start() + i + 1)
+        builder.end_block()
+        return cls(source, builder.blocks, "html")
+
+    @classmethod
+    def from_lexical(cls, lexical_json: str) -> "Document":
+        # Imported lazily: the editing package depends on agent models
+        from proofreader.editing.lexical import BLOCK_SEPARATOR, LexicalTextIndex
+
+        document = json.loads(lexical_json)
+        index = LexicalTextIndex(document.get("root", document))
+        text = index.text
+        builder = _BlockBuilder()
+        position = 0
+        for part in text.split(BLOCK_SEPARATOR):
+            for i, char in enumerate(part):
+                builder.add(char, position + i, position + i + 1)
+            builder.end_block()
+            position += len(part) + len(BLOCK_SEPARATOR)
+        return cls(text, builder.blocks, "lexical")
+
+    @classmethod
+    def from_post(cls, post: Post) -> "Document":
+        if post.html:
+            return cls.from_html(post.html)
+        if post.lexical:
+            return cls.from_lexical(post.lexical)
+        return cls("", [], "html")
+
+    def render_block(self, index: int) -> str:
+        block = self.blocks[index]
+        marker = ""
+        if re.fullmatch(r"h[1-6]", block.kind):
+            marker = "#" * int(block.kind[1]) + " "
+        elif block.kind == "li":
+            marker = "- "
+        elif block.kind == "blockquote":
+            marker = "> "
+        return f"[P{index + 1}] {marker}{block.text}"
+
+    def render(self, indices: Optional[list[int]] = None) -> str:
+        if indices is None:
+            indices = list(range(len(self.blocks)))
+        return "\n".join(self.render_block(i) for i in indices)
+
+    def locate(self, text: str, location: Optional[str] = None) -> Optional[tuple[int, int, int]]:
+        """Find `text` as (block index, start, end), preferring the block named in `location`."""
+        if not text:
+            return None
+        order = list(range(len(self.blocks)))
+        match = _LOCATION.search(location or "")
+        if match and 0 < int(match.group(1)) <= len(self.blocks):
+            preferred = int(match.group(1)) - 1
+            order.remove(preferred)
+            order.insert(0, preferred)
+        for candidate in (text, text.strip()):
+            for i in order:
+                start = self.blocks[i].text.find(candidate)
+                if candidate and start != -1:
+                    return i, start, start + len(candidate)
+        return None
+
+    def anchor(self, text: str, location: Optional[str] = None) -> Optional[tuple[int, int]]:
+        """Map a suggestion's original text back to a span of `source`."""
+        found = self.locate(text, location)
+        if found is None:
+            return None
+        block, start, end = found
+        return self.blocks[block].source_span(start, end)
+
+class _BlockBuilder:
+    """Accumulates characters into blocks, collapsing whitespace runs."""
+
+    def __init__(self) -> None:
+        self.blocks: list[Block] = []
+        self.kind = "p"
+        self._chars: list[str] = []
+        self._offsets: list[int] = []
+        self._end = 0
+
+    def add(self, text: str, source_start: int, source_end: int) -> None:
+        for char in text:
+            if _WHITESPACE.match(char):
+                if not self._chars or self._chars[-1] == " ":
+                    self._end = source_end
+                    continue
+                char = " "
+            self._chars.append(char)
+            self._offsets.append(source_start)
+        self._end = source_end
+
+    def end_block(self) -> None:
+        # Trailing whitespace is dropped; the block ends after its last character
+        while self._chars and self._chars[-1] == " ":
+            self._chars.pop()
+            self._end = self._offsets.pop()
+        if self._chars:
+            self.blocks.append(Block(self.kind, "".join(self._chars), self._offsets + [self._end]))
+        self.kind = "p"
+        self._chars = []
+        self._offsets = []
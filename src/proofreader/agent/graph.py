@@ -1,26 +1,40 @@
-from langgraph.graph import StateGraph, END
+from langgraph.graph import StateGraph, START, END
 from proofreader.agent.state import AgentState
+from proofreader.agent.metrics import instrumented
 from proofreader.agent.nodes.style import analyze_style
+from proofreader.agent.nodes.chunking import chunk_content
 from proofreader.agent.nodes.typos import correct_typos
 from proofreader.agent.nodes.structure import improve_structure
 from proofreader.agent.nodes.coherence import check_coherence
 
+ANALYSIS_NODES = ("typo_correction", "structure_improvement", "coherence_check")
+NODE_NAMES = ("style_analysis", "chunking", *ANALYSIS_NODES)
+
 def create_agent_graph():
     workflow = StateGraph(AgentState)
     
-    # Add nodes
-    workflow.add_node("style_analysis", analyze_style)
-    workflow.add_node("typo_correction", correct_typos)
-    workflow.add_node("structure_improvement", improve_structure)
-    workflow.add_node("coherence_check", check_coherence)
+    # Add nodes, each wrapped to report timing and LLM usage to the active recorder
+    nodes = {
+        "style_analysis": analyze_style,
+        "chunking": chunk_content,
+        "typo_correction": correct_typos,
+        "structure_improvement": improve_structure,
+        "coherence_check": check_coherence,
+    }
+    for name, node in nodes.items():
+        workflow.add_node(name, instrumented(name, node))
     
     # Define edges
-    # style -> typos -> structure -> coherence -> end
-    workflow.set_entry_point("style_analysis")
+    # (style | chunking) -> (typos | structure | coherence) -> end
+    # Splitting the post does not need the style guide, so it runs alongside style
+    # analysis. The analysis nodes only depend on the style guidelines and the
+    # chunked post, so they fan out and run concurrently; their suggestions are
+    # merged by the reducer.
+    workflow.add_edge(START, "style_analysis")
+    workflow.add_edge(START, "chunking")
     
-    workflow.add_edge("style_analysis", "typo_correction")
-    workflow.add_edge("typo_correction", "structure_improvement")
-    workflow.add_edge("structure_improvement", "coherence_check")
-    workflow.add_edge("coherence_check", END)
+    for node in ANALYSIS_NODES:
+        workflow.add_edge(["style_analysis", "chunking"], node)
+        workflow.add_edge(node, END)
     
     return workflow.compile()
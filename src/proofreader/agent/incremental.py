@@ -0,0 +1,96 @@
+import asyncio
+import hashlib
+import sys
+from datetime import timedelta
+from typing import Optional
+from proofreader.agent.chunking import Chunk, analyze_chunks, build_chunks, deduplicate
+from proofreader.agent.document import Document, FORMAT_NOTE
+from proofreader.agent.suggestions import Suggestion
+from proofreader.config.settings import settings
+from proofreader.db.operations import get_paragraph_analyses, get_rejected_suggestions, save_paragraph_analyses
+
+def _sha256(text: str) -> str:
+    return hashlib.sha256(text.encode()).hexdigest()
+
+def paragraph_cache_key(node: str, prompt_hash: str, style_hash: str, paragraph: str) -> str:
+    return _sha256("\n".join([node, prompt_hash, style_hash, _sha256(paragraph)]))
+
+def _attribute(chunk: Chunk, paragraphs: list[str], suggestions: list[Suggestion]) -> dict[int, list[Suggestion]]:
+    """Assign each suggestion to the paragraph of the chunk that contains it."""
+    by_paragraph: dict[int, list[Suggestion]] = {i: [] for i in chunk.paragraphs}
+    for s in suggestions:
+        owner = next(
+            (i for i in chunk.paragraphs if s.original_text and s.original_text in paragraphs[i]),
+            chunk.paragraphs[-1],
+        )
+        by_paragraph[owner].append(s)
+    return by_paragraph
+
+async def analyze_paragraphs(
+    node: str,
+    document: Document,
+    system_prompt: str,
+    prompt_hash: str,
+    style_guidelines: str,
+    instruction: str,
+    label: str,
+    draft_id: Optional[str] = None,
+) -> list[Suggestion]:
+    """Analyze only paragraphs without a cached result for this node/prompt/style.
+
+    Results are cached per paragraph, including paragraphs with no suggestions,
+    so re-running a lightly edited draft only sends the edited paragraphs.
+    Cached suggestions the editor already rejected on `draft_id` are dropped.
+    """
+    style_hash = _sha256(style_guidelines)
+    # The rendering instructions are part of the prompt the results depend on
+    prompt_hash = _sha256(prompt_hash + FORMAT_NOTE)
+    paragraphs = [block.text for block in document.blocks]
+    keys = [
+        paragraph_cache_key(node, prompt_hash, style_hash, f"{block.kind}\n{block.text}")
+        for block in document.blocks
+    ]
+    rendered = [document.render_block(i) for i in range(len(document.blocks))]
+
+    max_age = timedelta(hours=settings.paragraph_cache_ttl_hours)
+    try:
+        cached = await asyncio.to_thread(get_paragraph_analyses, keys, max_age)
+        rejected = await asyncio.to_thread(get_rejected_suggestions, draft_id) if cached and draft_id else set()
+    except Exception as e:
+        print(f"{label} cache lookup failed: {e}", file=sys.stderr)
+        cached, rejected = {}, set()
+
+    found: dict[int, list[Suggestion]] = {
+        i: [
+            s for s in (Suggestion(**data) for data in cached[key])
+            if (s.type.value, s.original_text, s.proposed_text) not in rejected
+        ]
+        for i, key in enumerate(keys) if key in cached
+    }
+    missing = [i for i in range(len(paragraphs)) if i not in found]
+
+    if missing:
+        chunks = build_chunks(rendered, settings.chunk_max_chars, settings.chunk_overlap_paragraphs, missing)
+        results = await analyze_chunks(chunks, system_prompt, instruction, label)
+
+        fresh: dict[int, list[Suggestion]] = {}
+        for chunk, suggestions in zip(chunks, results):
+            if suggestions is None:
+                continue
+            for i, attributed in _attribute(chunk, paragraphs, suggestions).items():
+                fresh.setdefault(i, []).extend(attributed)
+        # Overlapping windows may report the same edit for a shared paragraph
+        fresh = {i: deduplicate(suggestions) for i, suggestions in fresh.items()}
+        found.update(fresh)
+
+        try:
+            await asyncio.to_thread(save_paragraph_analyses, node, {
+                keys[i]: [s.model_dump(mode="json") for s in suggestions] for i, suggestions in fresh.items()
+            }, max_age, settings.paragraph_cache_max_entries)
+        except Exception as e:
+            print(f"{label} cache update failed: {e}", file=sys.stderr)
+
+    ordered: list[Suggestion] = []
+    for i in sorted(found):
+        ordered.extend(found[i])
+    return deduplicate(ordered)
@@ -0,0 +1,74 @@
+import asyncio
+import time
+from types import TracebackType
+from typing import Optional
+
+
+class TokenBucket:
+    """Paces callers to `rate` acquisitions per second with bursts of `capacity`.
+
+    Each caller reserves a token synchronously (no await between reading and
+    updating the bucket), so no lock is needed on a single event loop.
+    """
+
+    def __init__(self, rate: float, capacity: float = 1.0):
+        self.rate = rate
+        self.capacity = max(capacity, 1.0)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+
+    async def acquire(self) -> float:
+        """Wait for a token and return how long the caller had to wait."""
+        if self.rate <= 0:
+            return 0.0
+
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+        self._tokens -= 1
+
+        if self._tokens >= 0:
+            return 0.0
+        delay = -self._tokens / self.rate
+        await asyncio.sleep(delay)
+        return delay
+
+
+class RateLimiter:
+    """Shared limiter for LLM calls: a concurrency cap plus a token bucket.
+
+    Used as an async context manager around each request. The semaphore is
+    created lazily per event loop so the limiter can live at module level.
+    """
+
+    def __init__(self, max_concurrency: int, rate_limit_delay: float, burst: int = 1):
+        self.max_concurrency = max(max_concurrency, 1)
+        rate = 1.0 / rate_limit_delay if rate_limit_delay > 0 else 0.0
+        self.bucket = TokenBucket(rate, burst)
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._loop = loop
+        return self._semaphore
+
+    async def __aenter__(self) -> "RateLimiter":
+        semaphore = self._get_semaphore()
+        await semaphore.acquire()
+        try:
+            await self.bucket.acquire()
+        except BaseException:
+            semaphore.release()
+            raise
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: Optional[type[BaseException]],
+        exc: Optional[BaseException],
+        tb: Optional[TracebackType],
+    ) -> None:
+        self._get_semaphore().release()
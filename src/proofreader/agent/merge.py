@@ -0,0 +1,120 @@
+import bisect
+from dataclasses import dataclass
+from typing import Optional
+from proofreader.agent.document import Document
+from proofreader.agent.suggestions import Suggestion, SuggestionType
+
+# Lower wins when two suggestions touch the same text; this is also the order
+# edits are applied in (typos -> structure -> coherence)
+PRIORITY = {
+    SuggestionType.TYPO: 0,
+    SuggestionType.STRUCTURE: 1,
+    SuggestionType.COHERENCE: 2,
+}
+
+@dataclass
+class _Entry:
+    start: int
+    end: int
+    suggestion: Suggestion
+
+    @property
+    def rank(self) -> int:
+        return PRIORITY[self.suggestion.type]
+
+@dataclass
+class MergeStats:
+    duplicates: int = 0
+    conflicts: int = 0
+    unanchored: int = 0
+
+def _normalize(text: str) -> str:
+    return " ".join(text.split())
+
+class SuggestionMerger:
+    """Collapses duplicate and overlapping suggestions for one document.
+
+    Each suggestion is anchored to an interval of the document's text and kept
+    in an index of non-overlapping intervals. Suggestions whose text is not in
+    the document are dropped, duplicates are collapsed and, when two
+    suggestions overlap, the higher-priority one is kept. Suggestions returned
+    by an earlier `add` are never withdrawn: a higher-priority suggestion that
+    arrives later and overlaps them is kept as well, flagged in its reasoning.
+    """
+
+    def __init__(self, document: Document):
+        self.document = document
+        self.stats = MergeStats()
+        self._block_starts: list[int] = []
+        position = 0
+        for block in document.blocks:
+            self._block_starts.append(position)
+            position += len(block.text) + 1
+        # Parallel lists sorted by start; intervals never overlap, so ends are sorted too
+        self._starts: list[int] = []
+        self._entries: list[_Entry] = []
+
+    def add(self, suggestions: list[Suggestion]) -> list[Suggestion]:
+        """Merge a batch and return the suggestions from it that survive, in priority order."""
+        accepted = []
+        for suggestion in sorted(suggestions, key=lambda s: PRIORITY[s.type]):
+            kept = self._insert(suggestion)
+            if kept is not None:
+                accepted.append(kept)
+        return accepted
+
+    def _anchor(self, suggestion: Suggestion) -> Optional[tuple[int, int]]:
+        found = self.document.locate(suggestion.original_text, suggestion.location)
+        if found is None:
+            return None
+        block, start, end = found
+        offset = self._block_starts[block]
+        return offset + start, offset + end
+
+    def _overlapping(self, start: int, end: int) -> list[_Entry]:
+        i = bisect.bisect_left(self._starts, end)
+        found = []
+        while i > 0 and self._entries[i - 1].end > start:
+            i -= 1
+            found.append(self._entries[i])
+        return found
+
+    def _insert(self, suggestion: Suggestion) -> Optional[Suggestion]:
+        span = self._anchor(suggestion)
+        if span is None:
+            self.stats.unanchored += 1
+            return None
+        start, end = span
+        entry = _Entry(start, end, suggestion)
+        overlapping = self._overlapping(start, end)
+
+        for other in overlapping:
+            same_span = (other.start, other.end) == (start, end)
+            if same_span and _normalize(other.suggestion.proposed_text) == _normalize(suggestion.proposed_text):
+                self.stats.duplicates += 1
+                return None
+
+        if not overlapping:
+            self._index(entry)
+            return suggestion
+
+        self.stats.conflicts += 1
+        # Within a batch suggestions arrive in priority order, so a newcomer can
+        # only outrank suggestions from earlier batches; ties go to the first one
+        if any(other.rank <= entry.rank for other in overlapping):
+            return None
+        # The reviewer has already seen the others, so keep both and say so.
+        # The flagged suggestion stays out of the index, which never overlaps.
+        where = ", ".join(other.suggestion.location for other in overlapping)
+        return suggestion.model_copy(update={
+            "reasoning": f"{suggestion.reasoning} (Overlaps an earlier suggestion at {where}; approve only one of them.)"
+        })
+
+    def _index(self, entry: _Entry) -> None:
+        i = bisect.bisect_left(self._starts, entry.start)
+        self._starts.insert(i, entry.start)
+        self._entries.insert(i, entry)
+
+def merge_suggestions(document: Document, suggestions: list[Suggestion]) -> list[Suggestion]:
+    """One-shot merge of all suggestions for a document, in priority order."""
+    return SuggestionMerger(document).add(suggestions)
@@ -0,0 +1,170 @@
+import asyncio
+import functools
+import inspect
+import json
+import sys
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass, field, asdict
+from datetime import datetime, timezone
+from typing import Any, Callable, Optional
+from proofreader.config.settings import settings
+from proofreader.db.operations import add_llm_calls
+
+@dataclass
+class CallMetric:
+    node: str
+    model: str
+    started_at: str
+    wall_time: float
+    # Time spent waiting on the shared rate limiter before the request was sent
+    wait_time: float
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    # Retry number of this attempt; 0 for the first request
+    retries: int = 0
+    cost: float = 0.0
+    error: Optional[str] = None
+
+@dataclass
+class NodeMetric:
+    node: str
+    status: str = "pending"  # pending, running, done, failed
+    wall_time: float = 0.0
+    calls: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    # Attempts that were retries of an earlier failed one
+    retries: int = 0
+    cost: float = 0.0
+    extra: dict[str, Any] = field(default_factory=dict)
+
+def estimate_cost(prompt_tokens: int, completion_tokens: int) -> float:
+    return (
+        prompt_tokens * settings.llm_input_cost_per_million
+        + completion_tokens * settings.llm_output_cost_per_million
+    ) / 1_000_000
+
+class MetricsRecorder:
+    """Collects per-node and per-LLM-call metrics for one analysis run.
+
+    The recorder is bound to the running task with `current_recorder`, so nodes
+    and `get_llm_response` can report without it being threaded through the
+    graph state. `listener` is called after every update (e.g. to refresh the UI).
+    """
+
+    def __init__(self, session_id: Optional[int] = None, listener: Optional[Callable[["MetricsRecorder"], None]] = None):
+        self.session_id = session_id
+        self.listener = listener
+        self.started = time.perf_counter()
+        self.calls: list[CallMetric] = []
+        self.nodes: dict[str, NodeMetric] = {}
+
+    def node(self, name: str) -> NodeMetric:
+        if name not in self.nodes:
+            self.nodes[name] = NodeMetric(name)
+        return self.nodes[name]
+
+    def _notify(self) -> None:
+        if self.listener:
+            self.listener(self)
+
+    def node_started(self, name: str) -> None:
+        self.node(name).status = "running"
+        self._notify()
+
+    def node_finished(self, name: str, wall_time: float, failed: bool = False) -> None:
+        metric = self.node(name)
+        metric.status = "failed" if failed else "done"
+        metric.wall_time = wall_time
+        self._notify()
+
+    def record(self, name: str, **values: Any) -> None:
+        """Attach node-specific measurements (e.g. token savings) to a node."""
+        self.node(name).extra.update(values)
+        self._notify()
+
+    def record_call(self, call: CallMetric) -> None:
+        self.calls.append(call)
+        metric = self.node(call.node)
+        metric.calls += 1
+        metric.prompt_tokens += call.prompt_tokens
+        metric.completion_tokens += call.completion_tokens
+        metric.retries += call.retries > 0
+        metric.cost += call.cost
+        self._notify()
+
+    def totals(self) -> dict[str, Any]:
+        return {
+            "wall_time": time.perf_counter() - self.started,
+            "calls": len(self.calls),
+            "prompt_tokens": sum(c.prompt_tokens for c in self.calls),
+            "completion_tokens": sum(c.completion_tokens for c in self.calls),
+            "retries": sum(c.retries > 0 for c in self.calls),
+            "cost": sum(c.cost for c in self.calls),
+        }
+
+    def export(self, path: str) -> None:
+        """Append this run to a JSONL trace file: one record per node and call."""
+        with open(path, "a") as f:
+            base = {"session_id": self.session_id}
+            for node in self.nodes.values():
+                f.write(json.dumps({**base, "kind": "node", **asdict(node)}) + "\n")
+            for call in self.calls:
+                f.write(json.dumps({**base, "kind": "llm_call", **asdict(call)}) + "\n")
+            f.write(json.dumps({**base, "kind": "run", **self.totals()}) + "\n")
+
+current_recorder: ContextVar[Optional[MetricsRecorder]] = ContextVar("current_recorder", default=None)
+current_node: ContextVar[str] = ContextVar("current_node", default="unknown")
+
+def now_iso() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+def instrumented(name: str, fn: Callable[..., Any]) -> Callable[..., Any]:
+    """Wrap a graph node so its wall time and LLM calls are attributed to `name`."""
+    if inspect.iscoroutinefunction(fn):
+        @functools.wraps(fn)
+        async def async_wrapper(state: Any) -> Any:
+            token = current_node.set(name)
+            recorder = current_recorder.get()
+            if recorder:
+                recorder.node_started(name)
+            start = time.perf_counter()
+            failed = True
+            try:
+                result = await fn(state)
+                failed = False
+                return result
+            finally:
+                current_node.reset(token)
+                if recorder:
+                    recorder.node_finished(name, time.perf_counter() - start, failed)
+        return async_wrapper
+
+    @functools.wraps(fn)
+    def sync_wrapper(state: Any) -> Any:
+        token = current_node.set(name)
+        recorder = current_recorder.get()
+        if recorder:
+            recorder.node_started(name)
+        start = time.perf_counter()
+        failed = True
+        try:
+            result = fn(state)
+            failed = False
+            return result
+        finally:
+            current_node.reset(token)
+            if recorder:
+                recorder.node_finished(name, time.perf_counter() - start, failed)
+    return sync_wrapper
+
+async def save_metrics(recorder: MetricsRecorder) -> None:
+    """Store a run's LLM calls against its session and append it to the trace file."""
+    try:
+        if recorder.session_id is not None:
+            await asyncio.to_thread(add_llm_calls, recorder.session_id, [asdict(c) for c in recorder.calls])
+        if settings.trace_path:
+            await asyncio.to_thread(recorder.export, settings.trace_path)
+    except Exception as e:
+        print(f"Failed to save metrics: {e}", file=sys.stderr)
@@ -0,0 +1,27 @@
+from proofreader.agent.state import AgentState
+from proofreader.agent.chunking import document_summary
+from proofreader.agent.document import Document
+from proofreader.agent.metrics import current_recorder
+from proofreader.agent.tokens import estimate_tokens
+from proofreader.config.settings import settings
+
+async def chunk_content(state: AgentState) -> dict:
+    # Async so instrumentation listeners (the UI) are called on the event loop
+    post = state['post']
+    document = Document.from_post(post)
+
+    recorder = current_recorder.get()
+    if recorder:
+        source_tokens = estimate_tokens(post.html or post.lexical or "")
+        compact_tokens = estimate_tokens(document.render())
+        recorder.record(
+            "chunking",
+            source_tokens=source_tokens,
+            compact_tokens=compact_tokens,
+            saved_tokens=source_tokens - compact_tokens,
+        )
+
+    return {
+        "document": document,
+        "document_summary": document_summary(document, settings.chunk_max_chars),
+    }
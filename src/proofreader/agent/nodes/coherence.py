@@ -1,17 +1,21 @@
 from proofreader.agent.state import AgentState
-from proofreader.agent.utils import load_prompts, get_llm_response
+from proofreader.agent.utils import get_llm_response
+from proofreader.agent.prompts import prompt_registry
 from proofreader.agent.suggestions import SuggestionList
+from proofreader.agent.chunking import document_summary
+from proofreader.agent.document import Document, FORMAT_NOTE
+from proofreader.config.settings import settings
 
-def check_coherence(state: AgentState) -> dict:
-    prompts = load_prompts()
-    system_prompt = prompts["coherence_check_system"].format(style_guidelines=state.get("style_guidelines", ""))
-    content = state['post'].html or ""
+async def check_coherence(state: AgentState) -> dict:
+    system_prompt = prompt_registry.render("coherence_check_system", style_guidelines=state.get("style_guidelines", ""))
+    # Coherence is judged on the whole document; long posts use a condensed view
+    content = state.get("document_summary") or document_summary(Document.from_post(state['post']), settings.chunk_max_chars)
     
-    user_prompt = f"Check coherence:\n\n{content}"
+    user_prompt = f"Check coherence. {FORMAT_NOTE}\n\n{content}"
     
     try:
-        response = get_llm_response(system_prompt, user_prompt, SuggestionList)
-        return {"suggestions": state.get("suggestions", []) + response.suggestions}
+        response = await get_llm_response(system_prompt, user_prompt, SuggestionList)
+        return {"suggestions": response.suggestions}
     except Exception as e:
-        print(f"Coherence check failed: {e}")
-        return {}
+        # Reported in the state so the run shows which category is missing
+        return {"error": f"Coherence check failed: {e}"}
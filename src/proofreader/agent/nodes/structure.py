@@ -1,17 +1,25 @@
 from proofreader.agent.state import AgentState
-from proofreader.agent.utils import load_prompts, get_llm_response
-from proofreader.agent.suggestions import SuggestionList
+from proofreader.agent.prompts import prompt_registry
+from proofreader.agent.document import Document
+from proofreader.agent.incremental import analyze_paragraphs
 
-def improve_structure(state: AgentState) -> dict:
-    prompts = load_prompts()
-    system_prompt = prompts["structure_improvement_system"].format(style_guidelines=state.get("style_guidelines", ""))
-    content = state['post'].html or ""
-    
-    user_prompt = f"Analyze structure:\n\n{content}"
+async def improve_structure(state: AgentState) -> dict:
+    style_guidelines = state.get("style_guidelines", "")
+    system_prompt = prompt_registry.render("structure_improvement_system", style_guidelines=style_guidelines)
+    document = state.get("document") or Document.from_post(state['post'])
     
     try:
-        response = get_llm_response(system_prompt, user_prompt, SuggestionList)
-        return {"suggestions": state.get("suggestions", []) + response.suggestions}
+        suggestions = await analyze_paragraphs(
+            "structure_improvement",
+            document,
+            system_prompt,
+            prompt_registry.hash("structure_improvement_system"),
+            style_guidelines,
+            "Analyze structure",
+            "Structure analysis",
+            state['post'].id,
+        )
+        return {"suggestions": suggestions}
     except Exception as e:
-        print(f"Structure analysis failed: {e}")
-        return {}
+        # Reported in the state so the run shows which category is missing
+        return {"error": f"Structure analysis failed: {e}"}
@@ -1,50 +1,135 @@
+import asyncio
+import hashlib
+import sys
+from datetime import timedelta
+from typing import Iterable, Optional
 from proofreader.agent.state import AgentState
-from proofreader.agent.utils import load_prompts, get_llm_response
-from proofreader.ghost.client import GhostClient
+from proofreader.agent.utils import get_llm_response
+from proofreader.agent.prompts import prompt_registry
+from proofreader.agent.metrics import current_recorder
+from proofreader.agent.sampling import sample_corpus
+from proofreader.agent.tokens import context_window
+from proofreader.ghost.client import GhostClient, get_ghost_client
+from proofreader.ghost.models import PostSummary, Post
 from proofreader.config.settings import settings
+from proofreader.db.operations import get_style_guide, save_style_guide
 from pydantic import BaseModel
 
 class StyleAnalysis(BaseModel):
     guidelines: str
 
+def corpus_fingerprint(posts: Iterable[PostSummary | Post]) -> str:
+    """Stable hash of the posts a style guide is built from.
+
+    Any published post being added, removed or edited changes the fingerprint,
+    as does editing the style analysis prompt or the sampling budget.
+    """
+    entries = sorted(f"{p.id}:{p.updated_at.isoformat()}" for p in posts)
+    entries.append(prompt_registry.hash("style_analysis_system"))
+    entries.append(f"budget:{_token_budget()}")
+    return hashlib.sha256("\n".join(entries).encode()).hexdigest()
+
+# Held while a guide is generated for a corpus, so concurrent cold analyses of
+# the same blog wait for the first one and reuse its guide from the cache
+_generation_locks: dict[str, asyncio.Lock] = {}
+
+async def _current_fingerprint(client: GhostClient) -> Optional[str]:
+    """Fingerprint of the published corpus, or None when it cannot be listed."""
+    try:
+        # Only ids and timestamps are needed to know whether the corpus changed
+        summaries = await client.get_post_summaries(
+            limit=settings.style_corpus_posts, status="published", fields="id,updated_at"
+        )
+    except Exception as e:
+        print(f"Style guide cache lookup failed: {e}", file=sys.stderr)
+        return None
+    return corpus_fingerprint(summaries) if summaries else None
+
+async def _load_cached_guidelines(fingerprint: str) -> Optional[str]:
+    """Return cached guidelines for this corpus if they are fresh."""
+    try:
+        max_age = timedelta(hours=settings.style_cache_ttl_hours)
+        return await asyncio.to_thread(get_style_guide, fingerprint, max_age)
+    except Exception as e:
+        print(f"Style guide cache lookup failed: {e}", file=sys.stderr)
+        return None
+
+def _token_budget() -> int:
+    """Tokens the sampled corpus may use: the configured budget, capped at half
+    the model's context to leave room for the system prompt and the answer."""
+    return min(settings.style_token_budget, context_window(settings.llm_model) // 2)
+
+def _record_savings(source_tokens: int, compact_tokens: int) -> None:
+    recorder = current_recorder.get()
+    if recorder:
+        recorder.record(
+            "style_analysis",
+            source_tokens=source_tokens,
+            compact_tokens=compact_tokens,
+            saved_tokens=source_tokens - compact_tokens,
+        )
+
 async def analyze_style(state: AgentState) -> dict:
-    prompts = load_prompts()
-    client = GhostClient(settings.ghost_url, settings.ghost_api_key)
-    
+    client = get_ghost_client()
+
+    fingerprint = await _current_fingerprint(client)
+    if fingerprint is None:
+        return await _generate_style(state, client)
+
+    lock = _generation_locks.setdefault(fingerprint, asyncio.Lock())
+    async with lock:
+        cached = await _load_cached_guidelines(fingerprint)
+        if cached:
+            return {"style_guidelines": cached}
+        return await _generate_style(state, client)
+
+async def _generate_style(state: AgentState, client: GhostClient) -> dict:
+    past_posts = []
     past_posts_text = ""
+    sampled_count = 0
     try:
-        # Retrieve the last 15 published posts to understand the blog's style
-        past_posts = await client.get_posts(limit=15, status="published")
+        # Retrieve the most recent published posts to understand the blog's style
+        past_posts = await client.get_posts(limit=settings.style_corpus_posts, status="published")
         if past_posts:
-            # Concatenate the content of past posts. 
-            # We prefer HTML, but fallback to mobiledoc or raw text if needed.
-            # Truncate each post to avoid exploding context if they are huge? 
-            # For now, let's assume they fit.
-            past_posts_text = "\n\n---\n\n".join(
-                [f"Title: {p.title}\nContent:\n{p.html or p.mobiledoc or p.lexical or ''}" for p in past_posts]
-            )
+            # Sample representative paragraphs in compact text form within the
+            # token budget rather than sending every post in full
+            sample = sample_corpus(past_posts, _token_budget(), settings.style_corpus_posts)
+            past_posts_text = sample.text
+            sampled_count = len(sample.posts)
+            _record_savings(sample.source_tokens, sample.tokens)
     except Exception as e:
-        print(f"Failed to retrieve past posts: {e}")
+        print(f"Failed to retrieve past posts: {e}", file=sys.stderr)
 
-    system_prompt = prompts["style_analysis_system"]
+    system_prompt = prompt_registry.get("style_analysis_system")
     
     if past_posts_text:
         user_prompt = (
-            f"Here are the last {len(past_posts)} published posts from the blog:\n\n"
+            f"Here are representative excerpts (openings, headings and conclusions) "
+            f"from the last {sampled_count} published posts of the blog:\n\n"
             f"{past_posts_text}\n\n"
             "Analyze these posts to create a comprehensive style guide for this blog."
         )
     else:
         # Fallback to analyzing the current draft if no past posts are available
-        print("No past posts available for style analysis. Using current draft.")
+        print("No past posts available for style analysis. Using current draft.", file=sys.stderr)
         user_prompt = (
             f"Analyze the style of this text:\n\n"
-            f"{state['post'].html or state['post'].mobiledoc or ''}"
+            f"{sample_corpus([state['post']], _token_budget(), 1).text or state['post'].mobiledoc or ''}"
         )
 
     try:
-        response = get_llm_response(system_prompt, user_prompt, StyleAnalysis)
-        return {"style_guidelines": response.guidelines}
+        response = await get_llm_response(system_prompt, user_prompt, StyleAnalysis)
     except Exception as e:
-        print(f"Style analysis failed: {e}")
-        return {"style_guidelines": "Standard professional blog style."}
+        return {
+            "style_guidelines": "Standard professional blog style.",
+            "error": f"Style analysis failed, using a generic style guide: {e}",
+        }
+
+    # Only guides built from the published corpus are reusable across drafts
+    if past_posts_text:
+        try:
+            await asyncio.to_thread(save_style_guide, corpus_fingerprint(past_posts), response.guidelines)
+        except Exception as e:
+            print(f"Failed to cache style guide: {e}", file=sys.stderr)
+
+    return {"style_guidelines": response.guidelines}
@@ -1,22 +1,29 @@
 from proofreader.agent.state import AgentState
-from proofreader.agent.utils import load_prompts, get_llm_response
-from proofreader.agent.suggestions import SuggestionList
+from proofreader.agent.prompts import prompt_registry
+from proofreader.agent.document import Document
+from proofreader.agent.incremental import analyze_paragraphs
 
-def correct_typos(state: AgentState) -> dict:
-    prompts = load_prompts()
-    system_prompt = prompts["typo_correction_system"].format(style_guidelines=state.get("style_guidelines", ""))
+async def correct_typos(state: AgentState) -> dict:
+    style_guidelines = state.get("style_guidelines", "")
+    system_prompt = prompt_registry.render("typo_correction_system", style_guidelines=style_guidelines)
     
-    # We need to process the content. The post might be HTML or Mobiledoc.
-    # For simplicity, assuming we can extract text or pass the raw content.
-    # Validating/Parsing Mobiledoc is complex. 
-    # Let's assume we are working with HTML/text representation for analysis.
-    content = state['post'].html or ""
-    
-    user_prompt = f"Check this content for typos:\n\n{content}"
+    # The post is prompted in its compact paragraph-numbered text form rather
+    # than raw HTML. Paragraphs with a cached result are reused; the rest are
+    # checked in overlapping chunks concurrently.
+    document = state.get("document") or Document.from_post(state['post'])
     
     try:
-        response = get_llm_response(system_prompt, user_prompt, SuggestionList)
-        return {"suggestions": state.get("suggestions", []) + response.suggestions}
+        suggestions = await analyze_paragraphs(
+            "typo_correction",
+            document,
+            system_prompt,
+            prompt_registry.hash("typo_correction_system"),
+            style_guidelines,
+            "Check this content for typos",
+            "Typo correction",
+            state['post'].id,
+        )
+        return {"suggestions": suggestions}
     except Exception as e:
-        print(f"Typo correction failed: {e}")
-        return {}
+        # Reported in the state so the run shows which category is missing
+        return {"error": f"Typo correction failed: {e}"}
@@ -1,14 +1,15 @@
 from pydantic import BaseModel
-from proofreader.agent.utils import load_prompts, get_llm_response
+from proofreader.agent.utils import get_llm_response
+from proofreader.agent.prompts import prompt_registry
 from proofreader.agent.suggestions import Suggestion
 import json
+import sys
 
 class LexicalUpdateResponse(BaseModel):
     lexical_json: str
 
-def create_lexical_update(original_lexical: str, suggestions: list[Suggestion]) -> str:
-    prompts = load_prompts()
-    system_prompt = prompts["lexical_update_system"]
+async def create_lexical_update(original_lexical: str, suggestions: list[Suggestion]) -> str:
+    system_prompt = prompt_registry.get("lexical_update_system")
     
     # Format suggestions for the prompt
     changes_text = "\n".join([
@@ -34,8 +35,8 @@ Return the full, valid, updated Lexical JSON string.
         # However, lexical JSON is complex and recursive. Pydantic models for the full tree are hard.
         # So we ask for a string field 'lexical_json' that contains the dumped JSON.
         
-        response = get_llm_response(system_prompt, user_prompt, LexicalUpdateResponse)
+        response = await get_llm_response(system_prompt, user_prompt, LexicalUpdateResponse)
         return response.lexical_json
     except Exception as e:
-        print(f"Lexical update failed: {e}")
+        print(f"Lexical update failed: {e}", file=sys.stderr)
         raise e
@@ -0,0 +1,90 @@
+import hashlib
+import os
+import sys
+import threading
+from pathlib import Path
+from string import Formatter
+from typing import Optional
+import yaml
+
+PROMPTS_PATH = Path(__file__).parent.parent / "config" / "prompts.yaml"
+
+# Placeholders each prompt must contain; prompts not listed take no placeholders
+REQUIRED_PLACEHOLDERS: dict[str, set[str]] = {
+    "style_analysis_system": set(),
+    "typo_correction_system": {"style_guidelines"},
+    "structure_improvement_system": {"style_guidelines"},
+    "coherence_check_system": {"style_guidelines"},
+    "lexical_update_system": set(),
+}
+
+class PromptError(ValueError):
+    pass
+
+def _placeholders(template: str) -> set[str]:
+    return {field for _, field, _, _ in Formatter().parse(template) if field is not None}
+
+def validate_prompts(prompts: dict[str, str]) -> None:
+    for name, required in REQUIRED_PLACEHOLDERS.items():
+        if name not in prompts:
+            raise PromptError(f"Missing prompt '{name}'")
+        found = _placeholders(prompts[name])
+        if found != required:
+            raise PromptError(
+                f"Prompt '{name}' has placeholders {sorted(found)}, expected {sorted(required)}"
+            )
+
+class PromptRegistry:
+    """Loads prompts.yaml once and reloads it only when the file's mtime changes.
+
+    Templates are validated on every (re)load and each prompt gets a stable
+    content hash so caches can key on the prompt version that produced a result.
+    """
+
+    def __init__(self, path: Path = PROMPTS_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._mtime: Optional[int] = None
+        self._prompts: dict[str, str] = {}
+        self._hashes: dict[str, str] = {}
+
+    def _refresh(self) -> None:
+        mtime = os.stat(self.path).st_mtime_ns
+        if mtime == self._mtime:
+            return
+        with self._lock:
+            if mtime == self._mtime:
+                return
+            with open(self.path, "r") as f:
+                prompts = yaml.safe_load(f)
+            try:
+                validate_prompts(prompts)
+            except PromptError as e:
+                # Keep serving the last good version if an edit breaks the file
+                if self._mtime is None:
+                    raise
+                print(f"Ignoring invalid prompts file: {e}", file=sys.stderr)
+                self._mtime = mtime
+                return
+            self._prompts = prompts
+            self._hashes = {
+                name: hashlib.sha256(text.encode()).hexdigest() for name, text in prompts.items()
+            }
+            self._mtime = mtime
+
+    def all(self) -> dict[str, str]:
+        self._refresh()
+        return dict(self._prompts)
+
+    def get(self, name: str) -> str:
+        self._refresh()
+        return self._prompts[name]
+
+    def render(self, name: str, **values: str) -> str:
+        return self.get(name).format(**values)
+
+    def hash(self, name: str) -> str:
+        self._refresh()
+        return self._hashes[name]
+
+prompt_registry = PromptRegistry()
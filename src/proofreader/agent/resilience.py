@@ -0,0 +1,197 @@
+import asyncio
+import random
+import time
+from collections import deque
+from typing import Awaitable, Callable, Optional, TypeVar
+import openai
+from proofreader.agent.limiter import RateLimiter
+
+T = TypeVar("T")
+
+class CircuitOpenError(Exception):
+    """Raised without calling the provider while the circuit breaker is open."""
+
+class CircuitBreaker:
+    """Stops calling a failing provider for a while after repeated failures.
+
+    After `failure_threshold` consecutive failures the circuit opens and calls
+    fail fast for `reset_after` seconds; then one trial call is let through and
+    its outcome closes or re-opens the circuit.
+    """
+
+    def __init__(self, failure_threshold: int, reset_after: float):
+        self.failure_threshold = max(failure_threshold, 1)
+        self.reset_after = reset_after
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial_running = False
+
+    @property
+    def is_open(self) -> bool:
+        return self.opened_at is not None
+
+    def before_call(self) -> None:
+        if self.opened_at is None:
+            return
+        if self._trial_running or time.monotonic() - self.opened_at < self.reset_after:
+            raise CircuitOpenError(
+                f"LLM calls paused after {self.failures} consecutive failures"
+            )
+        self._trial_running = True
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self.opened_at = None
+        self._trial_running = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        self._trial_running = False
+        if self.opened_at is not None or self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+
+class LatencyTracker:
+    """Sliding window of successful call latencies, used to time hedged requests."""
+
+    def __init__(self, window: int = 200):
+        self.samples: deque[float] = deque(maxlen=window)
+
+    def record(self, seconds: float) -> None:
+        self.samples.append(seconds)
+
+    def percentile(self, q: float) -> Optional[float]:
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[min(int(q * len(ordered)), len(ordered) - 1)]
+
+def is_retryable(exc: BaseException) -> bool:
+    """Rate limits, server errors, timeouts and dropped connections are worth retrying."""
+    if isinstance(exc, (asyncio.TimeoutError, openai.APITimeoutError, openai.APIConnectionError)):
+        return True
+    if isinstance(exc, openai.APIStatusError):
+        return exc.status_code == 429 or exc.status_code >= 500
+    return False
+
+def backoff_delay(attempt: int, base: float, cap: float, exc: Optional[BaseException] = None) -> float:
+    """Full-jitter exponential backoff, honouring a Retry-After header when given."""
+    response = getattr(exc, "response", None)
+    retry_after = response.headers.get("retry-after") if response is not None else None
+    if retry_after:
+        try:
+            return min(float(retry_after), cap)
+        except ValueError:
+            pass
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+class ResilientCaller:
+    """Deadlines, retries with backoff, a circuit breaker and optional hedging.
+
+    Every attempt runs inside `limiter`, and its deadline only starts once the
+    limiter lets it through, so queueing behind other calls never times out.
+    `call` receives the seconds it waited for the limiter and the retry number
+    (0 for the first attempt; a hedged duplicate shares its attempt's number).
+    It must be safe to run twice concurrently: once a request has been in flight longer than the
+    `hedge_percentile` of recent latencies, a duplicate is sent and whichever
+    finishes first wins.
+    """
+
+    def __init__(
+        self,
+        limiter: RateLimiter,
+        timeout: float,
+        max_retries: int,
+        backoff_base: float,
+        backoff_max: float,
+        breaker: CircuitBreaker,
+        hedge_percentile: Optional[float] = None,
+        hedge_min_samples: int = 20,
+    ):
+        self.limiter = limiter
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.breaker = breaker
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_samples = hedge_min_samples
+        self.latency = LatencyTracker()
+
+    def hedge_delay(self) -> Optional[float]:
+        if self.hedge_percentile is None or len(self.latency.samples) < self.hedge_min_samples:
+            return None
+        return self.latency.percentile(self.hedge_percentile)
+
+    async def __call__(self, call: Callable[[float, int], Awaitable[T]]) -> T:
+        attempt = 0
+        while True:
+            self.breaker.before_call()
+            try:
+                result = await self._hedged(call, attempt)
+            except Exception as exc:
+                retryable = is_retryable(exc)
+                # Rejected requests (4xx) say nothing about the provider's health
+                if retryable:
+                    self.breaker.record_failure()
+                else:
+                    self.breaker.record_success()
+                if not retryable or attempt >= self.max_retries:
+                    raise
+                await asyncio.sleep(backoff_delay(attempt, self.backoff_base, self.backoff_max, exc))
+                attempt += 1
+                continue
+            self.breaker.record_success()
+            return result
+
+    async def _attempt(self, call: Callable[[float, int], Awaitable[T]], attempt: int, sent: Optional[asyncio.Event] = None) -> T:
+        queued = time.perf_counter()
+        async with self.limiter:
+            if sent is not None:
+                sent.set()
+            started = time.perf_counter()
+            # The call runs as its own task and is cancelled with the reason it
+            # was stopped (deadline or a faster hedged duplicate)
+            task = asyncio.ensure_future(call(started - queued, attempt))
+            try:
+                done, _ = await asyncio.wait({task}, timeout=self.timeout)
+            except asyncio.CancelledError as exc:
+                task.cancel(*exc.args)
+                raise
+            if not done:
+                message = f"LLM call timed out after {self.timeout:.0f}s"
+                task.cancel(message)
+                await asyncio.wait({task})
+                raise TimeoutError(message)
+            result = task.result()
+        self.latency.record(time.perf_counter() - started)
+        return result
+
+    async def _hedged(self, call: Callable[[float, int], Awaitable[T]], attempt: int) -> T:
+        delay = self.hedge_delay()
+        if delay is None:
+            return await self._attempt(call, attempt)
+
+        sent = asyncio.Event()
+        primary = asyncio.ensure_future(self._attempt(call, attempt, sent))
+        tasks = {primary}
+        reason = "cancelled"
+        try:
+            # The hedge timer starts once the request is actually sent
+            waiter = asyncio.ensure_future(sent.wait())
+            await asyncio.wait({primary, waiter}, return_when=asyncio.FIRST_COMPLETED)
+            waiter.cancel()
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if not done:
+                tasks.add(asyncio.ensure_future(self._attempt(call, attempt)))
+            while True:
+                done, tasks = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        reason = "a hedged duplicate finished first"
+                        return task.result()
+                if not tasks:
+                    # Every request failed; surface the original request's error
+                    return primary.result()
+        finally:
+            for task in tasks:
+                task.cancel(reason)
@@ -0,0 +1,106 @@
+import re
+from dataclasses import dataclass, field
+from proofreader.agent.document import Block, Document
+from proofreader.agent.tokens import estimate_tokens
+from proofreader.ghost.models import Post
+
+# Priority tiers for paragraphs of a post; lower tiers are taken first from
+# every post before any post contributes a higher tier.
+OPENING, HEADING, CLOSING, LEAD, BODY = range(5)
+
+POST_SEPARATOR = "\n\n---\n\n"
+
+_HEADING = re.compile(r"h[1-6]")
+
+@dataclass
+class _Candidate:
+    title: str
+    document: Document
+    chosen: set[int] = field(default_factory=set)
+
+    def header(self) -> str:
+        return f"Title: {self.title}\nContent:\n"
+
+    def render(self) -> str:
+        return self.header() + "\n".join(_line(self.document.blocks[i]) for i in sorted(self.chosen))
+
+def _line(block: Block) -> str:
+    if _HEADING.fullmatch(block.kind):
+        return "#" * int(block.kind[1]) + " " + block.text
+    return block.text
+
+@dataclass
+class CorpusSample:
+    text: str
+    posts: list[Post]
+    tokens: int
+    source_tokens: int
+
+def _tiers(document: Document) -> list[list[int]]:
+    """Block indices of a document grouped by priority tier."""
+    tiers: list[list[int]] = [[] for _ in range(BODY + 1)]
+    text_blocks = [i for i, b in enumerate(document.blocks) if not _HEADING.fullmatch(b.kind)]
+    is_text = set(text_blocks)
+    placed = set()
+
+    def put(tier: int, index: int) -> None:
+        if index not in placed:
+            placed.add(index)
+            tiers[tier].append(index)
+
+    if text_blocks:
+        put(OPENING, text_blocks[0])
+    for i in range(len(document.blocks)):
+        if i not in is_text:
+            put(HEADING, i)
+    if text_blocks:
+        put(CLOSING, text_blocks[-1])
+    # First paragraph under each heading shows how sections are introduced
+    for i in range(len(document.blocks) - 1):
+        if i not in is_text and i + 1 in is_text:
+            put(LEAD, i + 1)
+    for i in text_blocks:
+        put(BODY, i)
+    return tiers
+
+def sample_corpus(posts: list[Post], token_budget: int, max_posts: int) -> CorpusSample:
+    """Pick representative paragraphs from `posts` within `token_budget`.
+
+    Posts are expected most recent first. Openings, headings and closings of
+    every post are taken before any body paragraph, and within a tier more
+    recent posts go first, so the output is deterministic and a tight budget
+    degrades to a sample of the most recent posts.
+    """
+    candidates = []
+    source_tokens = 0
+    for post in posts[:max_posts]:
+        document = Document.from_post(post)
+        if not document.blocks:
+            continue
+        source_tokens += estimate_tokens(post.html or post.lexical or "")
+        candidates.append((_Candidate(post.title, document), post, _tiers(document)))
+
+    used = 0
+    for tier in range(BODY + 1):
+        for candidate, _, tiers in candidates:
+            for index in tiers[tier]:
+                cost = estimate_tokens(_line(candidate.document.blocks[index])) + 1
+                if not candidate.chosen:
+                    cost += estimate_tokens(candidate.header() + POST_SEPARATOR)
+                if used + cost > token_budget:
+                    # Smaller paragraphs of this tier may still fit
+                    continue
+                candidate.chosen.add(index)
+                used += cost
+
+    sampled = [(c, post) for c, post, _ in candidates if c.chosen]
+    if not sampled and candidates:
+        # Nothing fits whole: fall back to the most recent post's opening, cut to size
+        candidate, post, tiers = candidates[0]
+        opening = next(i for tier in tiers for i in tier)
+        text = candidate.header() + _line(candidate.document.blocks[opening])
+        text = text[: max(token_budget, 0) * 4]
+        return CorpusSample(text, [post], estimate_tokens(text), source_tokens)
+
+    text = POST_SEPARATOR.join(c.render() for c, _ in sampled)
+    return CorpusSample(text, [post for _, post in sampled], estimate_tokens(text), source_tokens)
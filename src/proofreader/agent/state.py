@@ -1,9 +1,21 @@
-from typing import TypedDict, Optional
+import operator
+from typing import Annotated, TypedDict, Optional
 from proofreader.ghost.models import Post
 from proofreader.agent.suggestions import Suggestion
+from proofreader.agent.document import Document
+
+def merge_errors(current: Optional[str], update: Optional[str]) -> Optional[str]:
+    """Nodes running in parallel may each fail; keep every message."""
+    return "; ".join(e for e in (current, update) if e) or None
 
 class AgentState(TypedDict):
     post: Post
     style_guidelines: str
-    suggestions: list[Suggestion]
-    error: Optional[str]
+    # Compact text form of the post; typo/structure analysis is chunked and cached per block
+    document: Document
+    document_summary: str
+    # Analysis nodes run in parallel and each return only their own suggestions;
+    # the reducer concatenates them into the shared list.
+    suggestions: Annotated[list[Suggestion], operator.add]
+    # Failures of individual nodes; the run continues without their suggestions
+    error: Annotated[Optional[str], merge_errors]
@@ -0,0 +1,29 @@
+import re
+
+# Roughly how OpenAI tokenizers split English: words, numbers and punctuation runs
+_TOKEN_PIECES = re.compile(r"\w+|[^\w\s]+")
+
+def estimate_tokens(text: str) -> int:
+    """Cheap local token estimate, no tokenizer dependency.
+
+    Long words cost more than one token, so each piece counts as at least one
+    token plus one per 4 characters beyond the first 4.
+    """
+    return sum(1 + max(len(piece) - 4, 0) // 4 for piece in _TOKEN_PIECES.findall(text))
+
+# Context window per model family, matched by longest prefix of the model name
+MODEL_CONTEXT_TOKENS = {
+    "gpt-5": 400_000,
+    "gpt-4.1": 1_000_000,
+    "gpt-4o": 128_000,
+    "gpt-4-turbo": 128_000,
+    "gpt-4": 8_192,
+    "gpt-3.5-turbo": 16_385,
+}
+DEFAULT_CONTEXT_TOKENS = 128_000
+
+def context_window(model: str) -> int:
+    matches = [prefix for prefix in MODEL_CONTEXT_TOKENS if model.startswith(prefix)]
+    if not matches:
+        return DEFAULT_CONTEXT_TOKENS
+    return MODEL_CONTEXT_TOKENS[max(matches, key=len)]
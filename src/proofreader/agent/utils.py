@@ -1,27 +1,137 @@
+import asyncio
+import hashlib
+import json
+import sys
+import time
+from datetime import timedelta
 from typing import Any
-import yaml
-from pathlib import Path
-from openai import OpenAI
+from openai import AsyncOpenAI
+from pydantic import BaseModel
 from proofreader.config.settings import settings
+from proofreader.agent.limiter import RateLimiter
+from proofreader.agent.resilience import CircuitBreaker, ResilientCaller
+from proofreader.agent.prompts import prompt_registry
+from proofreader.db.operations import get_cached_response, save_cached_response
+from proofreader.agent.metrics import CallMetric, current_node, current_recorder, estimate_cost, now_iso
 
-client = OpenAI(api_key=settings.openai_api_key)
+# Retries are handled by `resilient_call` below, not by the SDK
+client = AsyncOpenAI(api_key=settings.openai_api_key, base_url=settings.openai_base_url, max_retries=0)
+
+# One limiter per process so concurrent nodes and analyses share the provider budget
+limiter = RateLimiter(
+    max_concurrency=settings.llm_max_concurrency,
+    rate_limit_delay=settings.rate_limit_delay,
+    burst=settings.llm_burst,
+)
+
+# Deadlines, retries and hedging for every LLM call; the breaker is shared so a
+# provider outage stops all nodes quickly instead of each one timing out
+resilient_call = ResilientCaller(
+    limiter,
+    timeout=settings.llm_timeout,
+    max_retries=settings.llm_max_retries,
+    backoff_base=settings.llm_backoff_base,
+    backoff_max=settings.llm_backoff_max,
+    breaker=CircuitBreaker(settings.llm_breaker_threshold, settings.llm_breaker_reset),
+    hedge_percentile=settings.llm_hedge_percentile,
+    hedge_min_samples=settings.llm_hedge_min_samples,
+)
 
 def load_prompts() -> dict[str, str]:
-    prompts_path = Path(__file__).parent.parent / "config" / "prompts.yaml"
-    with open(prompts_path, "r") as f:
-        return yaml.safe_load(f)
+    return prompt_registry.all()
+
+def response_cache_key(model: str, messages: list[dict[str, str]], response_model: type[BaseModel]) -> str:
+    payload = json.dumps(
+        {"model": model, "messages": messages, "schema": response_model.model_json_schema()},
+        sort_keys=True,
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+async def _cached_response(cache_key: str, response_model: type[BaseModel]) -> Any:
+    try:
+        cached = await asyncio.to_thread(
+            get_cached_response,
+            cache_key,
+            timedelta(hours=settings.llm_cache_ttl_hours),
+            touch=settings.llm_cache_mode == "readwrite",
+        )
+        if cached is None:
+            return None
+        parsed = response_model.model_validate_json(cached)
+    except Exception as e:
+        print(f"LLM response cache lookup failed: {e}", file=sys.stderr)
+        return None
+    recorder = current_recorder.get()
+    if recorder:
+        node = current_node.get()
+        recorder.record(node, llm_cache_hits=recorder.node(node).extra.get("llm_cache_hits", 0) + 1)
+    return parsed
 
-def get_llm_response(system_prompt: str, user_prompt: str, response_model=None) -> Any:
+async def _store_response(cache_key: str, parsed: BaseModel) -> None:
+    try:
+        await asyncio.to_thread(
+            save_cached_response, cache_key, settings.llm_model, parsed.model_dump_json(), settings.llm_cache_max_entries
+        )
+    except Exception as e:
+        print(f"LLM response cache update failed: {e}", file=sys.stderr)
+
+async def get_llm_response(system_prompt: str, user_prompt: str, response_model=None) -> Any:
     messages = [
         {"role": "system", "content": system_prompt},
         {"role": "user", "content": user_prompt}
     ]
     kwargs = {
-        "model": "gpt-5.2",
+        "model": settings.llm_model,
         "messages": messages,
     }
     if response_model:
         kwargs["response_format"] = response_model
 
-    response = client.beta.chat.completions.parse(**kwargs)
-    return response.choices[0].message.parsed
+    # Identical requests (same model, prompts and schema) are answered from disk
+    cache_key = None
+    if response_model and settings.llm_cache_mode != "off":
+        cache_key = response_cache_key(settings.llm_model, messages, response_model)
+        cached = await _cached_response(cache_key, response_model)
+        if cached is not None:
+            return cached
+
+    async def call(wait_time: float, attempt: int) -> Any:
+        started_at = now_iso()
+        sent = time.perf_counter()
+        response = None
+        error = None
+        try:
+            response = await client.beta.chat.completions.parse(**kwargs)
+        except asyncio.CancelledError as e:
+            # Deadline expired or a hedged duplicate won; the reason is the message
+            error = str(e) or "cancelled"
+            raise
+        except Exception as e:
+            error = str(e) or type(e).__name__
+            raise
+        finally:
+            # Every attempt is recorded, including failed ones, retries and hedged duplicates
+            finished = time.perf_counter()
+            recorder = current_recorder.get()
+            if recorder:
+                usage = getattr(response, "usage", None)
+                prompt_tokens = getattr(usage, "prompt_tokens", 0) or 0
+                completion_tokens = getattr(usage, "completion_tokens", 0) or 0
+                recorder.record_call(CallMetric(
+                    node=current_node.get(),
+                    model=settings.llm_model,
+                    started_at=started_at,
+                    wall_time=finished - sent + wait_time,
+                    wait_time=wait_time,
+                    prompt_tokens=prompt_tokens,
+                    completion_tokens=completion_tokens,
+                    retries=attempt,
+                    cost=estimate_cost(prompt_tokens, completion_tokens),
+                    error=error,
+                ))
+        return response.choices[0].message.parsed
+
+    parsed = await resilient_call(call)
+    if cache_key and settings.llm_cache_mode == "readwrite" and isinstance(parsed, response_model):
+        await _store_response(cache_key, parsed)
+    return parsed
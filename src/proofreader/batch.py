@@ -0,0 +1,104 @@
+import asyncio
+import json
+import sys
+from dataclasses import dataclass
+from typing import Any, Optional, TextIO
+from proofreader.agent.graph import create_agent_graph
+from proofreader.agent.merge import merge_suggestions
+from proofreader.agent.metrics import MetricsRecorder, current_recorder, save_metrics
+from proofreader.db.operations import create_session, add_suggestions
+from proofreader.ghost.client import get_ghost_client, close_ghost_clients
+from proofreader.ghost.models import Post
+
+async def _produce(queue: asyncio.Queue, post_ids: Optional[list[str]], status: str, filter: Optional[str], workers: int) -> bool:
+    try:
+        if post_ids:
+            for post_id in post_ids:
+                await queue.put(post_id)
+        else:
+            async for summary in get_ghost_client().iter_post_summaries(status=status, filter=filter):
+                await queue.put(summary.id)
+        return True
+    except Exception as e:
+        print(f"Failed to list posts: {e}", file=sys.stderr)
+        return False
+    finally:
+        # One sentinel per worker so each of them stops once the queue drains
+        for _ in range(workers):
+            await queue.put(None)
+
+@dataclass
+class AnalysisResult:
+    post: Post
+    session_id: int
+    # Merged suggestions as JSON-ready dicts, in review order
+    suggestions: list[dict[str, Any]]
+    suggestion_ids: list[int]
+    # Failures of individual nodes; the suggestions of the others are still kept
+    error: Optional[str] = None
+
+async def analyze_post(graph, post: Post) -> AnalysisResult:
+    """Run the agent graph on one post and record the session, metrics and suggestions."""
+    session = await asyncio.to_thread(create_session, post.id)
+    state = {"post": post, "style_guidelines": "", "suggestions": [], "error": None}
+
+    recorder = MetricsRecorder(session.id)
+    current_recorder.set(recorder)
+    try:
+        final_state = await graph.ainvoke(state)
+    finally:
+        await save_metrics(recorder)
+
+    suggestions = final_state.get("suggestions", [])
+    if final_state.get("document") is not None:
+        suggestions = merge_suggestions(final_state["document"], suggestions)
+    suggestions = [s.model_dump(mode="json") for s in suggestions]
+    suggestion_ids = await asyncio.to_thread(add_suggestions, session.id, suggestions)
+    return AnalysisResult(post, session.id, suggestions, suggestion_ids, final_state.get("error"))
+
+async def _analyze(graph, post_id: str, out: TextIO) -> int:
+    post = await get_ghost_client().get_post(post_id)
+    result = await analyze_post(graph, post)
+    if result.error:
+        print(f"{post_id}: {result.error}", file=sys.stderr)
+
+    for s in result.suggestions:
+        record = {"post_id": post.id, "title": post.title, "session_id": result.session_id, **s}
+        out.write(json.dumps(record) + "\n")
+    out.flush()
+    return len(result.suggestions)
+
+async def run_batch(
+    post_ids: Optional[list[str]] = None,
+    status: str = "draft",
+    filter: Optional[str] = None,
+    workers: int = 4,
+    out: TextIO = sys.stdout,
+) -> int:
+    """Proofread many drafts without the UI, streaming suggestions as JSONL.
+
+    Posts are either the given ids or every post matching `status`/`filter`.
+    Returns the number of failures (failed posts, plus one if listing failed).
+    """
+    graph = create_agent_graph()
+    queue: asyncio.Queue[Optional[str]] = asyncio.Queue(maxsize=workers * 2)
+    failures = 0
+
+    async def worker() -> None:
+        nonlocal failures
+        while (post_id := await queue.get()) is not None:
+            try:
+                count = await _analyze(graph, post_id, out)
+                print(f"{post_id}: {count} suggestions", file=sys.stderr)
+            except Exception as e:
+                failures += 1
+                print(f"{post_id}: analysis failed: {e}", file=sys.stderr)
+
+    try:
+        listed, *_ = await asyncio.gather(
+            _produce(queue, post_ids, status, filter, workers),
+            *(worker() for _ in range(workers)),
+        )
+    finally:
+        await close_ghost_clients()
+    return failures if listed else failures + 1
@@ -1,12 +1,64 @@
+from typing import Literal, Optional
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 class Settings(BaseSettings):
     ghost_url: str
     ghost_api_key: str
     openai_api_key: str
+    openai_base_url: Optional[str] = None
+    ghost_timeout: float = 30.0
+    ghost_connect_timeout: float = 10.0
+    ghost_max_connections: int = 10
+    ghost_keepalive_expiry: float = 30.0
+    ghost_http2: bool = False
+    post_cache_size: int = 8
+    llm_model: str = "gpt-5.2"
+    # USD per million tokens, used for cost estimates only
+    llm_input_cost_per_million: float = 1.75
+    llm_output_cost_per_million: float = 14.0
     rate_limit_delay: float = 1.0
+    llm_max_concurrency: int = 4
+    llm_burst: int = 3
+    # Per-request deadline in seconds, counted from when the rate limiter lets the call through
+    llm_timeout: float = 120.0
+    llm_max_retries: int = 3
+    llm_backoff_base: float = 1.0
+    llm_backoff_max: float = 30.0
+    llm_breaker_threshold: int = 5
+    llm_breaker_reset: float = 60.0
+    # Send a duplicate request once a call is slower than this latency percentile (e.g. 0.95)
+    llm_hedge_percentile: Optional[float] = None
+    llm_hedge_min_samples: int = 20
+    # Reuse responses to byte-identical requests; "readonly" never writes, for reproducible runs
+    llm_cache_mode: Literal["off", "readonly", "readwrite"] = "readwrite"
+    llm_cache_ttl_hours: float = 168.0
+    llm_cache_max_entries: int = 5000
+    # Per-paragraph results of the typo and structure nodes
+    paragraph_cache_ttl_hours: float = 168.0
+    paragraph_cache_max_entries: int = 50000
+    chunk_max_chars: int = 16000
+    chunk_overlap_paragraphs: int = 1
+    database_url: str = "sqlite:///proofreader.db"
+    trace_path: Optional[str] = None
     log_level: str = "INFO"
+    style_cache_ttl_hours: float = 168.0
+    style_corpus_posts: int = 15
+    # Upper bound on the sampled corpus in the style prompt; also capped by the model's context
+    style_token_budget: int = 24000
     content_deletion_warning_threshold: float = 0.2
+    # `proofreader serve`: local analysis service and Ghost webhook receiver
+    server_host: str = "127.0.0.1"
+    server_port: int = 8765
+    server_workers: int = 2
+    server_queue_size: int = 100
+    # Both required unless the service listens on a loopback address
+    ghost_webhook_secret: Optional[str] = None
+    # Bearer token for every route but the Ghost webhook; the TUI sends it to SERVICE_URL
+    service_token: Optional[str] = None
+    # A burst of webhook events for one post queues one analysis, this long after the last event
+    webhook_debounce_seconds: float = 10.0
+    # When set, the TUI first asks this service for a finished analysis of the draft
+    service_url: Optional[str] = None
     
     model_config = SettingsConfigDict(env_file=".env", env_file_encoding="utf-8", extra="ignore")
 
@@ -1,6 +1,6 @@
 from datetime import datetime
 from typing import Optional
-from sqlalchemy import String, Integer, DateTime, ForeignKey, Text
+from sqlalchemy import String, Integer, Float, DateTime, ForeignKey, Text
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
 
 class Base(DeclarativeBase):
@@ -15,6 +15,7 @@ class Session(Base):
     
     suggestions: Mapped[list["Suggestion"]] = relationship(back_populates="session")
     decisions: Mapped[list["Decision"]] = relationship(back_populates="session")
+    llm_calls: Mapped[list["LLMCall"]] = relationship(back_populates="session")
 
 class Suggestion(Base):
     __tablename__ = "suggestions"
@@ -41,3 +42,52 @@ class Decision(Base):
     
     session: Mapped["Session"] = relationship(back_populates="decisions")
     suggestion: Mapped["Suggestion"] = relationship(back_populates="decision")
+
+class StyleGuide(Base):
+    __tablename__ = "style_guides"
+    
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    # Hash of the ids and updated_at values of the published posts the guide was built from
+    fingerprint: Mapped[str] = mapped_column(String, unique=True, index=True)
+    guidelines: Mapped[str] = mapped_column(Text)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+
+class ParagraphAnalysis(Base):
+    __tablename__ = "paragraph_analyses"
+    
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    # Hash of (node, prompt hash, style guide hash, paragraph hash)
+    cache_key: Mapped[str] = mapped_column(String, unique=True, index=True)
+    node: Mapped[str] = mapped_column(String)
+    suggestions: Mapped[str] = mapped_column(Text)  # JSON list of suggestion dicts
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    last_used_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, index=True)
+
+class LLMResponse(Base):
+    __tablename__ = "llm_responses"
+    
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    # Hash of (model, messages, response schema)
+    cache_key: Mapped[str] = mapped_column(String, unique=True, index=True)
+    model: Mapped[str] = mapped_column(String)
+    response: Mapped[str] = mapped_column(Text)  # JSON of the parsed response model
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    last_used_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, index=True)
+
+class LLMCall(Base):
+    __tablename__ = "llm_calls"
+    
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    session_id: Mapped[int] = mapped_column(ForeignKey("sessions.id"), index=True)
+    node: Mapped[str] = mapped_column(String)
+    model: Mapped[str] = mapped_column(String)
+    started_at: Mapped[str] = mapped_column(String)
+    wall_time: Mapped[float] = mapped_column(Float)
+    wait_time: Mapped[float] = mapped_column(Float)
+    prompt_tokens: Mapped[int] = mapped_column(Integer)
+    completion_tokens: Mapped[int] = mapped_column(Integer)
+    retries: Mapped[int] = mapped_column(Integer, default=0)
+    cost: Mapped[float] = mapped_column(Float)
+    error: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    
+    session: Mapped["Session"] = relationship(back_populates="llm_calls")
@@ -1,16 +1,64 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
-from .models import Base, Session, Suggestion, Decision
+import json
+import queue
+import sys
+import threading
+from datetime import datetime, timedelta
+from typing import Any, Optional
+from sqlalchemy import create_engine, delete, event, func, insert, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.orm import Session as DBSession, sessionmaker
+from proofreader.config.settings import settings
+from .models import Base, Session, Suggestion, Decision, StyleGuide, ParagraphAnalysis, LLMCall, LLMResponse
 
-# TODO: Move to config
-DATABASE_URL = "sqlite:///proofreader.db"
+# Pragmas applied to every SQLite connection: WAL lets readers proceed while a
+# writer commits, and busy_timeout makes concurrent writers wait instead of failing.
+SQLITE_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "busy_timeout": 5000,
+    "foreign_keys": "ON",
+    "temp_store": "MEMORY",
+}
 
-engine = create_engine(DATABASE_URL)
+# Cache writes use INSERT ... ON CONFLICT, which only these dialects support
+SUPPORTED_DIALECTS = ("sqlite", "postgresql")
+
+def create_db_engine(url: str) -> Engine:
+    dialect = make_url(url).get_backend_name()
+    if dialect not in SUPPORTED_DIALECTS:
+        raise ValueError(
+            f"Unsupported DATABASE_URL dialect '{dialect}'; use one of: {', '.join(SUPPORTED_DIALECTS)}"
+        )
+    if dialect != "sqlite":
+        return create_engine(url, pool_pre_ping=True)
+
+    # Sessions are used from worker threads (asyncio.to_thread, the decision writer)
+    db_engine = create_engine(url, connect_args={"check_same_thread": False})
+
+    @event.listens_for(db_engine, "connect")
+    def set_sqlite_pragmas(dbapi_connection, connection_record):  # type: ignore[no-untyped-def]
+        cursor = dbapi_connection.cursor()
+        for pragma, value in SQLITE_PRAGMAS.items():
+            cursor.execute(f"PRAGMA {pragma}={value}")
+        cursor.close()
+
+    return db_engine
+
+engine = create_db_engine(settings.database_url)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 def init_db() -> None:
     Base.metadata.create_all(bind=engine)
 
+def _upsert(db: DBSession, model: type[Base]) -> Any:
+    """INSERT supporting ON CONFLICT, so concurrent writers of a unique key never collide.
+
+    `create_db_engine` only accepts SQLite and PostgreSQL URLs.
+    """
+    dialect = postgresql if db.get_bind().dialect.name == "postgresql" else sqlite
+    return dialect.insert(model)
+
 def create_session(draft_id: str) -> Session:
     db = SessionLocal()
     try:
@@ -22,32 +70,230 @@ def create_session(draft_id: str) -> Session:
     finally:
         db.close()
 
-def add_suggestions(session_id: int, suggestions_data: list[dict]) -> None:
+def add_suggestions(session_id: int, suggestions_data: list[dict]) -> list[int]:
+    """Bulk insert a session's suggestions and return their ids in input order."""
+    if not suggestions_data:
+        return []
+    rows = [
+        {
+            "session_id": session_id,
+            "type": s_data["type"],
+            "location": s_data["location"],
+            "original_text": s_data["original_text"],
+            "proposed_text": s_data["proposed_text"],
+            "reasoning": s_data["reasoning"],
+        }
+        for s_data in suggestions_data
+    ]
     db = SessionLocal()
     try:
-        for s_data in suggestions_data:
-            suggestion = Suggestion(
-                session_id=session_id,
-                type=s_data["type"],
-                location=s_data["location"],
-                original_text=s_data["original_text"],
-                proposed_text=s_data["proposed_text"],
-                reasoning=s_data["reasoning"]
-            )
-            db.add(suggestion)
+        result = db.execute(insert(Suggestion).returning(Suggestion.id, sort_by_parameter_order=True), rows)
+        ids = list(result.scalars())
         db.commit()
+        return ids
     finally:
         db.close()
 
 def record_decision(session_id: int, suggestion_id: int, action: str) -> None:
+    record_decisions([(session_id, suggestion_id, action)])
+
+def record_decisions(decisions: list[tuple[int, int, str]]) -> None:
+    if not decisions:
+        return
+    db = SessionLocal()
+    try:
+        db.execute(insert(Decision), [
+            {"session_id": session_id, "suggestion_id": suggestion_id, "action": action}
+            for session_id, suggestion_id, action in decisions
+        ])
+        db.commit()
+    finally:
+        db.close()
+
+def add_llm_calls(session_id: int, calls_data: list[dict]) -> None:
+    if not calls_data:
+        return
+    db = SessionLocal()
+    try:
+        db.execute(insert(LLMCall), [{"session_id": session_id, **c_data} for c_data in calls_data])
+        db.commit()
+    finally:
+        db.close()
+
+class DecisionWriter:
+    """Write-behind queue for review decisions.
+
+    The UI enqueues a decision per keypress; a background thread commits them in
+    batches so the UI thread never waits on a SQLite write lock.
+    """
+
+    def __init__(self, flush_interval: float = 1.0, max_batch: int = 100):
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self._queue: queue.Queue[Optional[tuple[int, int, str]]] = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def submit(self, session_id: int, suggestion_id: int, action: str) -> None:
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="decision-writer", daemon=True)
+                self._thread.start()
+        self._queue.put((session_id, suggestion_id, action))
+
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            batch = [item]
+            stop = False
+            try:
+                # Gather whatever else arrives within the flush interval
+                while len(batch) < self.max_batch:
+                    next_item = self._queue.get(timeout=self.flush_interval)
+                    if next_item is None:
+                        stop = True
+                        break
+                    batch.append(next_item)
+            except queue.Empty:
+                pass
+            try:
+                record_decisions(batch)
+            except Exception as e:
+                print(f"Failed to record {len(batch)} decisions: {e}", file=sys.stderr)
+            if stop:
+                return
+
+    def close(self) -> None:
+        """Flush pending decisions and stop the writer thread."""
+        with self._lock:
+            thread = self._thread
+            self._thread = None
+        if thread is not None and thread.is_alive():
+            self._queue.put(None)
+            thread.join()
+
+decision_writer = DecisionWriter()
+
+def get_style_guide(fingerprint: str, max_age: timedelta) -> Optional[str]:
+    db = SessionLocal()
+    try:
+        guide = db.scalar(select(StyleGuide).where(StyleGuide.fingerprint == fingerprint))
+        if guide is None or datetime.utcnow() - guide.created_at > max_age:
+            return None
+        return guide.guidelines
+    finally:
+        db.close()
+
+def save_style_guide(fingerprint: str, guidelines: str) -> None:
+    db = SessionLocal()
+    try:
+        stmt = _upsert(db, StyleGuide).values(
+            fingerprint=fingerprint, guidelines=guidelines, created_at=datetime.utcnow()
+        )
+        db.execute(stmt.on_conflict_do_update(
+            index_elements=["fingerprint"],
+            set_={"guidelines": stmt.excluded.guidelines, "created_at": stmt.excluded.created_at},
+        ))
+        db.commit()
+    finally:
+        db.close()
+
+def get_cached_response(cache_key: str, max_age: timedelta, touch: bool = True) -> Optional[str]:
+    """Return a stored LLM response younger than `max_age`; `touch` marks it recently used."""
+    db = SessionLocal()
+    try:
+        row = db.scalar(select(LLMResponse).where(LLMResponse.cache_key == cache_key))
+        if row is None or datetime.utcnow() - row.created_at > max_age:
+            return None
+        if touch:
+            row.last_used_at = datetime.utcnow()
+            db.commit()
+        return row.response
+    finally:
+        db.close()
+
+def save_cached_response(cache_key: str, model: str, response: str, max_entries: int) -> None:
+    """Store an LLM response, evicting the least recently used beyond `max_entries`."""
     db = SessionLocal()
     try:
-        decision = Decision(
-            session_id=session_id,
-            suggestion_id=suggestion_id,
-            action=action
+        now = datetime.utcnow()
+        stmt = _upsert(db, LLMResponse).values(
+            cache_key=cache_key, model=model, response=response, created_at=now, last_used_at=now
         )
-        db.add(decision)
+        # Concurrent identical requests may store the same key; the last one wins
+        db.execute(stmt.on_conflict_do_update(
+            index_elements=["cache_key"],
+            set_={
+                "model": stmt.excluded.model,
+                "response": stmt.excluded.response,
+                "created_at": stmt.excluded.created_at,
+                "last_used_at": stmt.excluded.last_used_at,
+            },
+        ))
+        excess = db.scalar(select(func.count(LLMResponse.id))) - max_entries
+        if excess > 0:
+            oldest = select(LLMResponse.id).order_by(LLMResponse.last_used_at, LLMResponse.id).limit(excess)
+            db.execute(delete(LLMResponse).where(LLMResponse.id.in_(oldest.scalar_subquery())))
+        db.commit()
+    finally:
+        db.close()
+
+def get_paragraph_analyses(cache_keys: list[str], max_age: timedelta) -> dict[str, list[dict]]:
+    """Return cached analyses younger than `max_age` and mark them recently used."""
+    db = SessionLocal()
+    try:
+        now = datetime.utcnow()
+        rows = db.scalars(select(ParagraphAnalysis).where(
+            ParagraphAnalysis.cache_key.in_(cache_keys), ParagraphAnalysis.created_at >= now - max_age
+        )).all()
+        if rows:
+            db.execute(
+                update(ParagraphAnalysis).where(ParagraphAnalysis.id.in_([row.id for row in rows])).values(last_used_at=now)
+            )
+            db.commit()
+        return {row.cache_key: json.loads(row.suggestions) for row in rows}
+    finally:
+        db.close()
+
+def save_paragraph_analyses(node: str, analyses: dict[str, list[dict]], max_age: timedelta, max_entries: int) -> None:
+    """Store per-paragraph analyses, dropping expired rows and the least recently used beyond `max_entries`."""
+    if not analyses:
+        return
+    db = SessionLocal()
+    try:
+        now = datetime.utcnow()
+        db.execute(delete(ParagraphAnalysis).where(ParagraphAnalysis.created_at < now - max_age))
+        # Another run may have cached the same paragraph meanwhile; its result is as good
+        db.execute(_upsert(db, ParagraphAnalysis).on_conflict_do_nothing(index_elements=["cache_key"]), [
+            {
+                "cache_key": cache_key,
+                "node": node,
+                "suggestions": json.dumps(suggestions_data),
+                "created_at": now,
+                "last_used_at": now,
+            }
+            for cache_key, suggestions_data in analyses.items()
+        ])
+        excess = db.scalar(select(func.count(ParagraphAnalysis.id))) - max_entries
+        if excess > 0:
+            oldest = select(ParagraphAnalysis.id).order_by(ParagraphAnalysis.last_used_at, ParagraphAnalysis.id).limit(excess)
+            db.execute(delete(ParagraphAnalysis).where(ParagraphAnalysis.id.in_(oldest.scalar_subquery())))
         db.commit()
     finally:
         db.close()
+
+def get_rejected_suggestions(draft_id: str) -> set[tuple[str, str, str]]:
+    """Return (type, original_text, proposed_text) of every suggestion the editor rejected on this draft."""
+    db = SessionLocal()
+    try:
+        rows = db.execute(
+            select(Suggestion.type, Suggestion.original_text, Suggestion.proposed_text)
+            .join(Decision, Decision.suggestion_id == Suggestion.id)
+            .join(Session, Session.id == Suggestion.session_id)
+            .where(Session.draft_id == draft_id, Decision.action == "reject")
+        )
+        return {tuple(row) for row in rows}
+    finally:
+        db.close()
@@ -0,0 +1,98 @@
+import bisect
+import json
+from collections import Counter
+from dataclasses import dataclass
+from typing import Any
+from proofreader.agent.document import Document
+from proofreader.editing.lexical import LexicalTextIndex
+
+@dataclass
+class BlockChange:
+    """A top-level block that differs between two versions of a post."""
+    kind: str  # "changed", "added" or "removed"
+    block_type: str
+    position: int  # 1-based position in the new version, or the old one for removals
+    old_text: str = ""
+    new_text: str = ""
+
+# (signature, block type, rendered text); equal signatures mean an unchanged block
+BlockText = tuple[str, str, str]
+
+def lexical_blocks(lexical_json: str) -> list[BlockText]:
+    document = json.loads(lexical_json)
+    root: dict[str, Any] = document.get("root", document)
+    blocks = []
+    for child in root.get("children", []):
+        text = LexicalTextIndex(child).text.strip()
+        blocks.append((json.dumps(child, sort_keys=True), str(child.get("type", "")), text))
+    return blocks
+
+def html_blocks(html: str) -> list[BlockText]:
+    return [(f"{b.kind}\n{b.text}", b.kind, b.text) for b in Document.from_html(html).blocks]
+
+def _anchors(old_keys: list[str], new_keys: list[str]) -> list[tuple[int, int]]:
+    """Blocks kept in place, as (old index, new index) pairs in document order.
+
+    Like patience diff: blocks whose signature occurs exactly once in each
+    version are candidate anchors, and the longest run of them that appears
+    in the same order in both is kept. Signatures are only hashed and the run
+    is found with binary search, so this is O(n log n) in the number of
+    blocks, unlike SequenceMatcher's quadratic worst case.
+    """
+    old_counts, new_counts = Counter(old_keys), Counter(new_keys)
+    new_index = {key: j for j, key in enumerate(new_keys) if new_counts[key] == 1}
+    candidates = [
+        (i, new_index[key]) for i, key in enumerate(old_keys)
+        if old_counts[key] == 1 and key in new_index
+    ]
+    # Longest increasing subsequence of new indices
+    tails: list[int] = []  # new index ending the best run of each length
+    tail_at: list[int] = []  # candidate ending that run
+    previous: list[int] = []
+    for n, (_, j) in enumerate(candidates):
+        length = bisect.bisect_left(tails, j)
+        previous.append(tail_at[length - 1] if length else -1)
+        if length == len(tails):
+            tails.append(j)
+            tail_at.append(n)
+        else:
+            tails[length] = j
+            tail_at[length] = n
+    anchors = []
+    n = tail_at[-1] if tail_at else -1
+    while n != -1:
+        anchors.append(candidates[n])
+        n = previous[n]
+    return anchors[::-1]
+
+def _diff_gap(old: list[BlockText], new: list[BlockText], i1: int, i2: int, j1: int, j2: int, changes: list[BlockChange]) -> None:
+    # Repeated blocks next to an anchor are unchanged too
+    while i1 < i2 and j1 < j2 and old[i1][0] == new[j1][0]:
+        i1, j1 = i1 + 1, j1 + 1
+    while i1 < i2 and j1 < j2 and old[i2 - 1][0] == new[j2 - 1][0]:
+        i2, j2 = i2 - 1, j2 - 1
+    # Pair blocks up in order; whatever is left over was added or removed
+    paired = min(i2 - i1, j2 - j1)
+    for k in range(paired):
+        (_, _, old_text), (_, block_type, new_text) = old[i1 + k], new[j1 + k]
+        changes.append(BlockChange("changed", block_type, j1 + k + 1, old_text, new_text))
+    for k in range(j1 + paired, j2):
+        changes.append(BlockChange("added", new[k][1], k + 1, new_text=new[k][2]))
+    for k in range(i1 + paired, i2):
+        changes.append(BlockChange("removed", old[k][1], k + 1, old_text=old[k][2]))
+
+def diff_blocks(old: list[BlockText], new: list[BlockText]) -> list[BlockChange]:
+    changes: list[BlockChange] = []
+    i = j = 0
+    for anchor_i, anchor_j in _anchors([b[0] for b in old], [b[0] for b in new]) + [(len(old), len(new))]:
+        _diff_gap(old, new, i, anchor_i, j, anchor_j, changes)
+        i, j = anchor_i + 1, anchor_j + 1
+    return changes
+
+def diff_lexical(old_json: str, new_json: str) -> list[BlockChange]:
+    """Top-level blocks that differ between two Lexical documents, rendered as text."""
+    return diff_blocks(lexical_blocks(old_json), lexical_blocks(new_json))
+
+def diff_html(old_html: str, new_html: str) -> list[BlockChange]:
+    """Paragraph-level blocks whose text differs between two HTML documents."""
+    return diff_blocks(html_blocks(old_html), html_blocks(new_html))
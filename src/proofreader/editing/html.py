@@ -0,0 +1,116 @@
+import bisect
+import html as html_lib
+import re
+from dataclasses import dataclass, field
+from proofreader.agent.document import Document
+from proofreader.agent.suggestions import Suggestion
+from proofreader.editing.spans import find_matches, overlaps
+
+_TAG = re.compile(r"<!--.*?-->|<[^>]*>", re.DOTALL)
+
+# Reasons reported for suggestions that were not applied
+NOT_FOUND = "text not found in the draft"
+CONFLICT = "overlaps another approved change"
+FORMATTING = "rewrites text across formatting it would lose"
+
+@dataclass
+class SkippedSuggestion:
+    suggestion: Suggestion
+    reason: str
+
+@dataclass
+class HtmlPatchResult:
+    html: str
+    applied: list[Suggestion] = field(default_factory=list)
+    skipped: list[SkippedSuggestion] = field(default_factory=list)
+
+class _Markup:
+    """Spans of tags and comments, so matches inside attributes are rejected."""
+
+    def __init__(self, html: str):
+        self.spans = [m.span() for m in _TAG.finditer(html)]
+
+    def editable(self, start: int, end: int) -> bool:
+        return not overlaps(self.spans, start, end)
+
+    def trim_end(self, start: int, end: int) -> int:
+        """Move `end` back over tags that close right before it."""
+        i = bisect.bisect_left(self.spans, (end, end))
+        while i > 0 and self.spans[i - 1][1] == end and self.spans[i - 1][0] >= start:
+            i -= 1
+            end = self.spans[i][0]
+        return end
+
+def _common_affixes(old: str, new: str) -> tuple[int, int]:
+    """Lengths of the prefix and suffix the two texts share, which need no rewrite."""
+    limit = min(len(old), len(new))
+    prefix = 0
+    while prefix < limit and old[prefix] == new[prefix]:
+        prefix += 1
+    suffix = 0
+    while suffix < limit - prefix and old[-1 - suffix] == new[-1 - suffix]:
+        suffix += 1
+    return prefix, suffix
+
+def patch_html(html: str, suggestions: list[Suggestion]) -> HtmlPatchResult:
+    """Apply approved suggestions to post HTML in one pass over the original.
+
+    All spans are located against the original HTML, so one replacement can
+    never create or destroy a match for another. Suggestions are matched
+    verbatim outside of tags first, then through the compact text form for
+    quotes that cross inline markup or entities. Such a quote is narrowed to
+    the text that actually changes; if that still crosses a tag the suggestion
+    is skipped, since rewriting it would drop or misplace the formatting.
+    Overlapping spans go to the suggestion that matched first (earlier in the
+    document for verbatim matches, then in approval order) and the rest are
+    skipped.
+    """
+    markup = _Markup(html)
+    taken: list[tuple[int, int]] = []
+    patterns: dict[str, list[int]] = {}
+    for i, s in enumerate(suggestions):
+        if s.original_text:
+            patterns.setdefault(s.original_text, []).append(i)
+    spans = find_matches(html, patterns, taken, markup.editable)
+    replacements = {i: suggestions[i].proposed_text for i in spans}
+
+    document = None
+    reasons: dict[int, str] = {}
+    for i, s in enumerate(suggestions):
+        if i in spans or not s.original_text:
+            continue
+        document = document or Document.from_html(html)
+        found = document.locate(s.original_text, s.location)
+        if found is None:
+            continue
+        block = document.blocks[found[0]]
+        start, end = found[1], found[2]
+        prefix, suffix = _common_affixes(block.text[start:end], s.proposed_text)
+        span_start, span_end = block.source_span(start + prefix, end - suffix)
+        span = span_start, markup.trim_end(span_start, span_end)
+        if _TAG.search(html, *span):
+            reasons[i] = FORMATTING
+            continue
+        if overlaps(taken, *span):
+            reasons[i] = CONFLICT
+            continue
+        spans[i] = span
+        replacements[i] = s.proposed_text[prefix:len(s.proposed_text) - suffix]
+        bisect.insort(taken, span)
+
+    parts = []
+    position = 0
+    for i, (start, end) in sorted(spans.items(), key=lambda item: item[1]):
+        parts.append(html[position:start])
+        parts.append(html_lib.escape(replacements[i], quote=False))
+        position = end
+    parts.append(html[position:])
+
+    return HtmlPatchResult(
+        html="".join(parts),
+        applied=[s for i, s in enumerate(suggestions) if i in spans],
+        skipped=[
+            SkippedSuggestion(s, reasons.get(i, NOT_FOUND))
+            for i, s in enumerate(suggestions) if i not in spans
+        ],
+    )
@@ -0,0 +1,159 @@
+import bisect
+import json
+from dataclasses import dataclass, field
+from typing import Any, Optional
+from proofreader.agent.document import Document
+from proofreader.agent.suggestions import Suggestion
+from proofreader.editing.spans import find_matches, overlaps
+
+# Ghost's editor uses its own subclasses of the core Lexical nodes
+TEXT_NODE_TYPES = {"text", "extended-text"}
+LINEBREAK_NODE_TYPES = {"linebreak"}
+INLINE_ELEMENT_TYPES = {"link", "autolink", "at-link", "hashtag"}
+
+# Inserted between blocks in the flattened text so matches never cross them
+BLOCK_SEPARATOR = "\n\n"
+
+@dataclass
+class TextSegment:
+    """A span of the flattened document text and the node it came from.
+
+    Separators and line breaks have no node and cannot be edited.
+    """
+    start: int
+    end: int
+    node: Optional[dict[str, Any]] = None
+    parent: Optional[dict[str, Any]] = None
+
+class LexicalTextIndex:
+    """Flattens every text node of a Lexical tree into one string with offsets.
+
+    Adjacent text nodes inside the same block (e.g. plain and bold runs) are
+    contiguous in the flattened text, so a phrase split across formatting can
+    still be found and replaced.
+    """
+
+    def __init__(self, root: dict[str, Any]):
+        self.root = root
+        self.segments: list[TextSegment] = []
+        self._parts: list[str] = []
+        self._length = 0
+        self._walk(root, None)
+        self.text = "".join(self._parts)
+        self._starts = [s.start for s in self.segments]
+
+    def _append(self, text: str, node: Optional[dict[str, Any]] = None, parent: Optional[dict[str, Any]] = None) -> None:
+        if not text and node is None:
+            return
+        self.segments.append(TextSegment(self._length, self._length + len(text), node, parent))
+        self._parts.append(text)
+        self._length += len(text)
+
+    def _walk(self, node: dict[str, Any], parent: Optional[dict[str, Any]]) -> None:
+        node_type = node.get("type")
+        if node_type in TEXT_NODE_TYPES and isinstance(node.get("text"), str):
+            self._append(node["text"], node, parent)
+            return
+        if node_type in LINEBREAK_NODE_TYPES:
+            self._append("\n")
+            return
+
+        is_block = node_type not in INLINE_ELEMENT_TYPES
+        if is_block and self._length and not self._parts[-1].endswith(BLOCK_SEPARATOR):
+            self._append(BLOCK_SEPARATOR)
+        for child in node.get("children", []):
+            self._walk(child, node)
+
+    def editable(self, start: int, end: int) -> bool:
+        """Whether [start, end) only covers text nodes (no separators)."""
+        return all(s.node is not None for s in self._overlapping(start, end))
+
+    def _overlapping(self, start: int, end: int) -> list[TextSegment]:
+        i = max(bisect.bisect_right(self._starts, start) - 1, 0)
+        found = []
+        while i < len(self.segments) and self.segments[i].start < end:
+            segment = self.segments[i]
+            if segment.end > start:
+                found.append(segment)
+            i += 1
+        return found
+
+    def replace(self, start: int, end: int, replacement: str) -> list[TextSegment]:
+        """Replace flattened text [start, end) and return text nodes left empty.
+
+        The replacement inherits the formatting of the first node it touches.
+        Replacements must be applied from the end of the document backwards so
+        earlier offsets stay valid.
+        """
+        segments = [s for s in self._overlapping(start, end) if s.end > s.start]
+        emptied = []
+        for n, segment in enumerate(segments):
+            node = segment.node
+            assert node is not None
+            text = node["text"]
+            local_start = max(start - segment.start, 0)
+            local_end = min(end - segment.start, segment.end - segment.start)
+            if n == 0:
+                node["text"] = text[:local_start] + replacement + text[local_end:]
+            else:
+                node["text"] = text[local_end:]
+            if not node["text"]:
+                emptied.append(segment)
+        return emptied
+
+@dataclass
+class LexicalPatchResult:
+    lexical: str
+    applied: list[Suggestion] = field(default_factory=list)
+    # Suggestions whose original text could not be located in a single block
+    unanchored: list[Suggestion] = field(default_factory=list)
+
+def patch_lexical(lexical_json: str, suggestions: list[Suggestion]) -> LexicalPatchResult:
+    """Apply approved suggestions to a Lexical document without an LLM round trip."""
+    document = json.loads(lexical_json)
+    index = LexicalTextIndex(document.get("root", document))
+
+    taken: list[tuple[int, int]] = []
+    patterns: dict[str, list[int]] = {}
+    for i, s in enumerate(suggestions):
+        if s.original_text:
+            patterns.setdefault(s.original_text, []).append(i)
+    spans = find_matches(index.text, patterns, taken, index.editable)
+
+    # Second pass: the LLM often includes surrounding whitespace in original_text
+    retry: dict[str, list[int]] = {}
+    for i, s in enumerate(suggestions):
+        stripped = s.original_text.strip()
+        if i not in spans and stripped and stripped != s.original_text:
+            retry.setdefault(stripped, []).append(i)
+    spans.update(find_matches(index.text, retry, taken, index.editable))
+
+    # Last pass: quotes copied from the prompt's compact text, where whitespace
+    # runs are collapsed and non-breaking spaces are plain spaces
+    compact = None
+    for i, s in enumerate(suggestions):
+        if i in spans or not s.original_text:
+            continue
+        compact = compact or Document.from_lexical(lexical_json)
+        span = compact.anchor(s.original_text, s.location)
+        if span is None or overlaps(taken, *span) or not index.editable(*span):
+            continue
+        spans[i] = span
+        bisect.insort(taken, span)
+
+    emptied: list[TextSegment] = []
+    for i, (start, end) in sorted(spans.items(), key=lambda item: item[1][0], reverse=True):
+        emptied.extend(index.replace(start, end, suggestions[i].proposed_text))
+
+    # Drop text nodes that a cross-node replacement fully consumed
+    for segment in emptied:
+        if segment.parent is not None and not segment.node["text"]:  # type: ignore[index]
+            children = segment.parent.get("children", [])
+            if len(children) > 1:
+                segment.parent["children"] = [c for c in children if c is not segment.node]
+
+    return LexicalPatchResult(
+        lexical=json.dumps(document),
+        applied=[s for i, s in enumerate(suggestions) if i in spans],
+        unanchored=[s for i, s in enumerate(suggestions) if i not in spans],
+    )
@@ -0,0 +1,49 @@
+import bisect
+import re
+from typing import Callable, Optional
+
+def find_matches(
+    text: str,
+    patterns: dict[str, list[int]],
+    taken: list[tuple[int, int]],
+    editable: Optional[Callable[[int, int], bool]] = None,
+) -> dict[int, tuple[int, int]]:
+    """Locate every pattern in one pass; each occurrence is claimed by one suggestion.
+
+    `patterns` maps original text to the ids of the suggestions quoting it.
+    Suggestions sharing the same original text take successive occurrences, like
+    repeated `str.replace(..., 1)` calls would. `taken` is the sorted list of
+    spans already claimed and is updated in place, so later passes never
+    produce overlapping spans. When the longest pattern at a position cannot
+    be claimed, shorter patterns at that position are tried and the scan
+    resumes one character later, so a rejected match never hides others.
+    """
+    if not patterns:
+        return {}
+    ordered = sorted(patterns, key=len, reverse=True)
+    regex = re.compile("|".join(re.escape(p) for p in ordered))
+    waiting = {p: list(ids) for p, ids in patterns.items()}
+    found: dict[int, tuple[int, int]] = {}
+    position = 0
+    while (match := regex.search(text, position)) is not None:
+        start = match.start()
+        position = start + 1
+        longest = match.group()
+        candidates = [longest] + [
+            p for p in ordered if len(p) < len(longest) and waiting[p] and text.startswith(p, start)
+        ]
+        for pattern in candidates:
+            queue = waiting[pattern]
+            end = start + len(pattern)
+            if not queue or overlaps(taken, start, end) or (editable is not None and not editable(start, end)):
+                continue
+            found[queue.pop(0)] = (start, end)
+            bisect.insort(taken, (start, end))
+            position = end
+            break
+    return found
+
+def overlaps(taken: list[tuple[int, int]], start: int, end: int) -> bool:
+    """Whether [start, end) overlaps any span of the sorted, non-overlapping `taken` list."""
+    i = bisect.bisect_left(taken, (start, end))
+    return (i > 0 and taken[i - 1][1] > start) or (i < len(taken) and taken[i][0] < end)
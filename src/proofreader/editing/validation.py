@@ -0,0 +1,124 @@
+import json
+from dataclasses import dataclass, field
+from typing import Any
+from proofreader.editing.changes import BlockChange, diff_blocks, html_blocks, lexical_blocks
+from proofreader.editing.lexical import INLINE_ELEMENT_TYPES, LINEBREAK_NODE_TYPES, TEXT_NODE_TYPES
+
+@dataclass
+class BlockLoss:
+    position: int
+    deleted_chars: int
+    changed_chars: int
+
+@dataclass
+class ContentCheck:
+    """Result of comparing a post's content before and after applying changes."""
+    original_chars: int
+    deleted_chars: int = 0
+    changed_chars: int = 0
+    threshold: float = 0.0
+    blocks: list[BlockLoss] = field(default_factory=list)
+    # Structural problems that would make Ghost reject or mangle the document
+    schema_errors: list[str] = field(default_factory=list)
+
+    @property
+    def deletion_ratio(self) -> float:
+        return self.deleted_chars / self.original_chars if self.original_chars else 0.0
+
+    @property
+    def exceeds_threshold(self) -> bool:
+        return self.deletion_ratio > self.threshold
+
+    @property
+    def ok(self) -> bool:
+        return not self.schema_errors and not self.exceeds_threshold
+
+    def summary(self) -> str:
+        parts = []
+        if self.schema_errors:
+            parts.append(f"Invalid Lexical document: {'; '.join(self.schema_errors[:3])}")
+        if self.exceeds_threshold:
+            parts.append(
+                f"Changes delete {self.deletion_ratio:.0%} of the content "
+                f"(warning threshold {self.threshold:.0%})"
+            )
+        return ". ".join(parts)
+
+def _measure(change: BlockChange) -> BlockLoss:
+    """Deleted and changed characters of one block, in linear time.
+
+    The common prefix and suffix are unchanged; in the differing middle the
+    shorter side counts as changed and whatever the old side has beyond it
+    as deleted.
+    """
+    old, new = change.old_text, change.new_text
+    prefix = 0
+    limit = min(len(old), len(new))
+    while prefix < limit and old[prefix] == new[prefix]:
+        prefix += 1
+    suffix = 0
+    while suffix < limit - prefix and old[-1 - suffix] == new[-1 - suffix]:
+        suffix += 1
+    old_middle = len(old) - prefix - suffix
+    new_middle = len(new) - prefix - suffix
+    return BlockLoss(change.position, max(old_middle - new_middle, 0), min(old_middle, new_middle))
+
+def lexical_schema_errors(lexical_json: str, limit: int = 10) -> list[str]:
+    """Check a Lexical document against the shape of Ghost's node schema."""
+    try:
+        document = json.loads(lexical_json)
+    except (TypeError, ValueError) as e:
+        return [f"not valid JSON ({e})"]
+    root = document.get("root") if isinstance(document, dict) else None
+    if not isinstance(root, dict) or root.get("type") != "root":
+        return ["missing root node"]
+
+    errors: list[str] = []
+    inline = TEXT_NODE_TYPES | INLINE_ELEMENT_TYPES
+    for i, child in enumerate(root.get("children") or []):
+        if isinstance(child, dict) and child.get("type") in inline:
+            errors.append(f"root.{i}: inline node at the top level")
+    stack: list[tuple[Any, str]] = [(root, "root")]
+    while stack and len(errors) < limit:
+        node, path = stack.pop()
+        if not isinstance(node, dict) or not isinstance(node.get("type"), str):
+            errors.append(f"{path}: node without a type")
+            continue
+        node_type = node["type"]
+        if node_type in TEXT_NODE_TYPES:
+            if not isinstance(node.get("text"), str):
+                errors.append(f"{path}: text node without text")
+            if not isinstance(node.get("format", 0), int):
+                errors.append(f"{path}: text format is not an integer")
+            continue
+        if node_type in LINEBREAK_NODE_TYPES or "children" not in node:
+            # Line breaks and cards (images, embeds, ...) carry no children
+            continue
+        children = node["children"]
+        if not isinstance(children, list):
+            errors.append(f"{path}: children is not a list")
+            continue
+        if node_type == "root" and path != "root":
+            errors.append(f"{path}: nested root node")
+        stack.extend((child, f"{path}.{i}") for i, child in reversed(list(enumerate(children))))
+    return errors
+
+def check_content(original: str, updated: str, is_lexical: bool, threshold: float) -> ContentCheck:
+    """Measure how much text the update deletes and, for Lexical, validate its structure."""
+    schema_errors = lexical_schema_errors(updated) if is_lexical else []
+    extract = lexical_blocks if is_lexical else html_blocks
+    old_blocks = extract(original)
+    check = ContentCheck(
+        original_chars=sum(len(text) for _, _, text in old_blocks),
+        threshold=threshold,
+        schema_errors=schema_errors,
+    )
+    if schema_errors:
+        return check
+    for change in diff_blocks(old_blocks, extract(updated)):
+        loss = _measure(change)
+        if loss.deleted_chars or loss.changed_chars:
+            check.blocks.append(loss)
+            check.deleted_chars += loss.deleted_chars
+            check.changed_chars += loss.changed_chars
+    return check
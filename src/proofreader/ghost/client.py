@@ -1,14 +1,56 @@
+import asyncio
+import importlib.util
+import sys
+import time
+from collections import OrderedDict
+from datetime import timezone
+from typing import Any, AsyncIterator, Optional
 import jwt
 import httpx
 from datetime import datetime
-from .models import Post, PostsResponse
+from proofreader.config.settings import settings
+from .models import Post, PostsResponse, PostSummary, PostSummariesResponse
+
+# Ghost rejects admin tokens valid for more than 5 minutes
+TOKEN_LIFETIME = 5 * 60
+# Re-mint this many seconds before expiry so in-flight requests never carry a stale token
+TOKEN_REFRESH_MARGIN = 60
 
 class GhostClient:
-    def __init__(self, url: str, api_key: str):
-        self.url = url
+    """Ghost Admin API client backed by one pooled, keep-alive HTTP connection pool.
+
+    Prefer `get_ghost_client()` over instantiating this directly so every screen
+    and node talking to the same site shares the pool.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        api_key: str,
+        timeout: Optional[float] = None,
+        max_connections: Optional[int] = None,
+        http2: Optional[bool] = None,
+    ):
+        self.url = url.rstrip('/')
         self.api_key = api_key
-        self.token = self._generate_token()
-        self.headers = {"Authorization": f"Ghost {self.token}"}
+        self.timeout = httpx.Timeout(
+            timeout if timeout is not None else settings.ghost_timeout,
+            connect=settings.ghost_connect_timeout,
+        )
+        self.limits = httpx.Limits(
+            max_connections=max_connections or settings.ghost_max_connections,
+            max_keepalive_connections=max_connections or settings.ghost_max_connections,
+            keepalive_expiry=settings.ghost_keepalive_expiry,
+        )
+        self.http2 = settings.ghost_http2 if http2 is None else http2
+        if self.http2 and importlib.util.find_spec("h2") is None:
+            print("HTTP/2 requested but the 'h2' package is not installed; using HTTP/1.1.", file=sys.stderr)
+            self.http2 = False
+
+        self._token: Optional[str] = None
+        self._token_expires_at = 0.0
+        self._client: Optional[httpx.AsyncClient] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
 
     def _generate_token(self) -> str:
         id, secret = self.api_key.split(':')
@@ -16,53 +58,229 @@ class GhostClient:
         header = {'alg': 'HS256', 'typ': 'JWT', 'kid': id}
         payload = {
             'iat': iat,
-            'exp': iat + 5 * 60,
+            'exp': iat + TOKEN_LIFETIME,
             'aud': '/admin/'
         }
         return jwt.encode(payload, bytes.fromhex(secret), algorithm='HS256', headers=header)
 
-    async def get_posts(self, limit: int = 15, status: str = "all") -> list[Post]:
-        async with httpx.AsyncClient() as client:
-             # This is a simplification. URL construction should be more robust.
-            api_url = f"{self.url}/ghost/api/admin/posts/"
-            params = {"limit": limit, "formats": "html,mobiledoc,lexical"}
-            if status != "all":
-                params["filter"] = f"status:{status}"
-            
-            response = await client.get(
-                api_url, 
-                headers=self.headers, 
-                params=params # type: ignore
+    @property
+    def token(self) -> str:
+        if self._token is None or time.monotonic() >= self._token_expires_at:
+            self._token = self._generate_token()
+            self._token_expires_at = time.monotonic() + TOKEN_LIFETIME - TOKEN_REFRESH_MARGIN
+        return self._token
+
+    @property
+    def headers(self) -> dict[str, str]:
+        return {"Authorization": f"Ghost {self.token}"}
+
+    async def _http(self) -> httpx.AsyncClient:
+        # Connection pools are tied to the event loop that opened them
+        loop = asyncio.get_running_loop()
+        if self._client is not None and not self._client.is_closed and self._loop is not loop:
+            try:
+                await self._client.aclose()
+            except RuntimeError:
+                # Its event loop is closed, and its connections with it
+                pass
+        if self._client is None or self._client.is_closed or self._loop is not loop:
+            self._client = httpx.AsyncClient(
+                timeout=self.timeout, limits=self.limits, http2=self.http2
             )
-            response.raise_for_status()
-            data = response.json()
-            return PostsResponse(**data).posts
+            self._loop = loop
+        return self._client
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def get_posts(self, limit: int = 15, status: str = "all") -> list[Post]:
+        api_url = f"{self.url}/ghost/api/admin/posts/"
+        params = {"limit": limit, "formats": "html,mobiledoc,lexical"}
+        if status != "all":
+            params["filter"] = f"status:{status}"
+        
+        http = await self._http()
+        response = await http.get(
+            api_url, 
+            headers=self.headers, 
+            params=params # type: ignore
+        )
+        response.raise_for_status()
+        data = response.json()
+        return PostsResponse(**data).posts
+
+    async def _fetch_page(self, params: dict[str, Any], page: int) -> dict[str, Any]:
+        api_url = f"{self.url}/ghost/api/admin/posts/"
+        http = await self._http()
+        response = await http.get(
+            api_url,
+            headers=self.headers,
+            params={**params, "page": page}
+        )
+        response.raise_for_status()
+        return response.json()
+
+    async def _paginate(self, params: dict[str, Any]) -> AsyncIterator[dict[str, Any]]:
+        """Yield raw pages, requesting page N+1 while the caller consumes page N."""
+        next_page: Optional[asyncio.Task[dict[str, Any]]] = asyncio.create_task(self._fetch_page(params, 1))
+        try:
+            while next_page is not None:
+                data = await next_page
+                pagination = data.get("meta", {}).get("pagination", {})
+                following = pagination.get("next")
+                next_page = asyncio.create_task(self._fetch_page(params, following)) if following else None
+                yield data
+        finally:
+            # The consumer may stop early; do not leave the prefetch running
+            if next_page is not None and not next_page.done():
+                next_page.cancel()
+
+    @staticmethod
+    def _build_filter(status: str, updated_since: Optional[datetime], extra: Optional[str]) -> Optional[str]:
+        clauses = []
+        if status != "all":
+            clauses.append(f"status:{status}")
+        if updated_since is not None:
+            if updated_since.tzinfo is not None:
+                updated_since = updated_since.astimezone(timezone.utc)
+            clauses.append(f"updated_at:>'{updated_since.strftime('%Y-%m-%d %H:%M:%S')}'")
+        if extra:
+            clauses.append(extra)
+        return "+".join(clauses) or None
+
+    async def iter_posts(
+        self,
+        status: str = "all",
+        page_size: int = 15,
+        updated_since: Optional[datetime] = None,
+        filter: Optional[str] = None,
+        order: str = "updated_at desc",
+    ) -> AsyncIterator[Post]:
+        """Stream every matching post, walking Ghost's pagination.
+
+        `updated_since` only returns posts edited after that moment, for
+        incremental syncs. `filter` is appended as a raw NQL clause.
+        """
+        params: dict[str, Any] = {"limit": page_size, "formats": "html,mobiledoc,lexical", "order": order}
+        nql = self._build_filter(status, updated_since, filter)
+        if nql:
+            params["filter"] = nql
+        async for data in self._paginate(params):
+            for post in PostsResponse(**data).posts:
+                yield post
+
+    async def iter_post_summaries(
+        self,
+        status: str = "all",
+        page_size: int = 50,
+        updated_since: Optional[datetime] = None,
+        filter: Optional[str] = None,
+        order: str = "updated_at desc",
+        fields: str = "id,title,status,updated_at",
+    ) -> AsyncIterator[PostSummary]:
+        """Like `iter_posts` but metadata only: no bodies are requested or parsed."""
+        params: dict[str, Any] = {"limit": page_size, "fields": fields, "order": order}
+        nql = self._build_filter(status, updated_since, filter)
+        if nql:
+            params["filter"] = nql
+        async for data in self._paginate(params):
+            for post in PostSummariesResponse(**data).posts:
+                yield post
+
+    async def get_post_summaries(
+        self, limit: int = 15, status: str = "all", fields: str = "id,title,status,updated_at"
+    ) -> list[PostSummary]:
+        """List posts without their bodies; Ghost only returns the requested fields."""
+        api_url = f"{self.url}/ghost/api/admin/posts/"
+        params = {"limit": limit, "fields": fields}
+        if status != "all":
+            params["filter"] = f"status:{status}"
+
+        http = await self._http()
+        response = await http.get(
+            api_url,
+            headers=self.headers,
+            params=params # type: ignore
+        )
+        response.raise_for_status()
+        data = response.json()
+        return PostSummariesResponse(**data).posts
 
     async def get_post(self, post_id: str) -> Post:
-        async with httpx.AsyncClient() as client:
-            api_url = f"{self.url.rstrip('/')}/ghost/api/admin/posts/{post_id}/"
-            params = {"formats": "html,mobiledoc,lexical"}
-            response = await client.get(
-                api_url, 
-                headers=self.headers, 
-                params=params # type: ignore
-            )
-            response.raise_for_status()
-            data = response.json()
-            return Post(**data.get("posts")[0])
+        api_url = f"{self.url}/ghost/api/admin/posts/{post_id}/"
+        params = {"formats": "html,mobiledoc,lexical"}
+        http = await self._http()
+        response = await http.get(
+            api_url, 
+            headers=self.headers, 
+            params=params # type: ignore
+        )
+        response.raise_for_status()
+        data = response.json()
+        return Post(**data.get("posts")[0])
             
     async def update_post(self, post_id: str, updated_data: dict, updated_at: datetime) -> Post:
-        async with httpx.AsyncClient() as client:
-            api_url = f"{self.url.rstrip('/')}/ghost/api/admin/posts/{post_id}/"
-            # Ghost requires the updated_at timestamp to match the server's to prevent conflicts
-            # We must pass the original updated_at back
-            if "posts" not in updated_data:
-                 updated_data = {"posts": [updated_data]}
-            
-            # Ensure updated_at is properly formatted
-            updated_data["posts"][0]["updated_at"] = updated_at.isoformat().replace("+00:00", "Z")
+        api_url = f"{self.url}/ghost/api/admin/posts/{post_id}/"
+        # Ghost requires the updated_at timestamp to match the server's to prevent conflicts
+        # We must pass the original updated_at back
+        if "posts" not in updated_data:
+             updated_data = {"posts": [updated_data]}
+        
+        # Ensure updated_at is properly formatted
+        updated_data["posts"][0]["updated_at"] = updated_at.isoformat().replace("+00:00", "Z")
+
+        http = await self._http()
+        response = await http.put(api_url, headers=self.headers, json=updated_data)
+        response.raise_for_status()
+        data = response.json()
+        return Post(**data.get("posts")[0])
+
+class PostCache:
+    """Small LRU of fully loaded posts, so browsing drafts keeps few bodies in memory."""
+
+    def __init__(self, max_size: int):
+        self.max_size = max(max_size, 1)
+        self._posts: OrderedDict[str, Post] = OrderedDict()
+
+    def get(self, post_id: str, updated_at: Optional[datetime] = None) -> Optional[Post]:
+        post = self._posts.get(post_id)
+        if post is None:
+            return None
+        # A newer revision on the server makes the cached body stale
+        if updated_at is not None and post.updated_at != updated_at:
+            del self._posts[post_id]
+            return None
+        self._posts.move_to_end(post_id)
+        return post
+
+    def put(self, post: Post) -> None:
+        self._posts[post.id] = post
+        self._posts.move_to_end(post.id)
+        while len(self._posts) > self.max_size:
+            self._posts.popitem(last=False)
+
+    async def load(self, client: "GhostClient", post_id: str, updated_at: Optional[datetime] = None) -> Post:
+        post = self.get(post_id, updated_at)
+        if post is None:
+            post = await client.get_post(post_id)
+            self.put(post)
+        return post
+
+_clients: dict[tuple[str, str], GhostClient] = {}
+
+def get_ghost_client(url: Optional[str] = None, api_key: Optional[str] = None) -> GhostClient:
+    """Return the shared client for a Ghost site, creating it on first use."""
+    url = (url or settings.ghost_url).rstrip('/')
+    api_key = api_key or settings.ghost_api_key
+    client = _clients.get((url, api_key))
+    if client is None:
+        client = GhostClient(url, api_key)
+        _clients[(url, api_key)] = client
+    return client
 
-            response = await client.put(api_url, headers=self.headers, json=updated_data)
-            response.raise_for_status()
-            data = response.json()
-            return Post(**data.get("posts")[0])
+async def close_ghost_clients() -> None:
+    for client in _clients.values():
+        await client.aclose()
+    _clients.clear()
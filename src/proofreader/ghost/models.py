@@ -37,6 +37,19 @@ class Post(BaseModel):
     # We might expect other fields, so we can allow extra
     model_config = {"extra": "ignore"}
 
+class PostSummary(BaseModel):
+    """Metadata-only view of a post, as returned when requesting specific `fields`."""
+    id: str
+    updated_at: datetime
+    title: Optional[str] = None
+    status: Optional[str] = None
+
+    model_config = {"extra": "ignore"}
+
 class PostsResponse(BaseModel):
     posts: list[Post]
     meta: dict[str, Any]
+
+class PostSummariesResponse(BaseModel):
+    posts: list[PostSummary]
+    meta: dict[str, Any]
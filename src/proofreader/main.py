@@ -1,11 +1,56 @@
 import argparse
-from proofreader.ui.app import ProofreaderApp
+import asyncio
+import sys
+from proofreader.config.settings import settings
+from proofreader.db.operations import init_db
+
+def run_batch_command(args: argparse.Namespace) -> int:
+    from proofreader.batch import run_batch
+
+    if args.output:
+        with open(args.output, "a") as out:
+            failures = asyncio.run(run_batch(args.ids, args.status, args.filter, args.workers, out))
+    else:
+        failures = asyncio.run(run_batch(args.ids, args.status, args.filter, args.workers))
+    return 1 if failures else 0
+
+def run_serve_command(args: argparse.Namespace) -> int:
+    from proofreader.server import serve
+
+    try:
+        serve(args.host, args.port, args.workers, args.queue_size)
+    except ValueError as e:
+        print(f"Cannot start the service: {e}", file=sys.stderr)
+        return 2
+    return 0
 
 def main():
     parser = argparse.ArgumentParser(description="Proofreader - AI powered Ghost draft reviewer")
     parser.add_argument("--dry-run", action="store_true", help="Run without applying changes to Ghost")
+    subparsers = parser.add_subparsers(dest="command")
+
+    batch = subparsers.add_parser("batch", help="Analyze many drafts headlessly and write suggestions as JSONL")
+    batch.add_argument("ids", nargs="*", help="Post ids to analyze (default: every post matching --status/--filter)")
+    batch.add_argument("--status", default="draft", help="Post status to analyze when no ids are given")
+    batch.add_argument("--filter", help="Extra Ghost NQL filter, e.g. \"tag:news\"")
+    batch.add_argument("--workers", type=int, default=4, help="Number of drafts analyzed concurrently")
+    batch.add_argument("--output", help="Append JSONL to this file instead of stdout")
+
+    serve = subparsers.add_parser("serve", help="Run a local analysis service that keeps the agent warm")
+    serve.add_argument("--host", default=settings.server_host)
+    serve.add_argument("--port", type=int, default=settings.server_port)
+    serve.add_argument("--workers", type=int, default=settings.server_workers, help="Number of drafts analyzed concurrently")
+    serve.add_argument("--queue-size", type=int, default=settings.server_queue_size, help="Jobs accepted before new ones are rejected")
     args = parser.parse_args()
 
+    init_db()
+    if args.command == "batch":
+        sys.exit(run_batch_command(args))
+    if args.command == "serve":
+        sys.exit(run_serve_command(args))
+
+    from proofreader.ui.app import ProofreaderApp
+
     app = ProofreaderApp(dry_run=args.dry_run)
     app.run()
 
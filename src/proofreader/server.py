@@ -0,0 +1,435 @@
+import asyncio
+import hashlib
+import hmac
+import ipaddress
+import json
+import sys
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Optional
+import httpx
+from proofreader.agent.suggestions import Suggestion
+from proofreader.config.settings import settings
+from proofreader.ghost.models import Post
+
+# Finished jobs kept for status queries and thin clients
+MAX_FINISHED_JOBS = 500
+# Ghost webhooks carry the current and previous post, HTML and Lexical included
+MAX_BODY_BYTES = 4 * 1024 * 1024
+# Signed webhooks older than this are rejected as replays
+WEBHOOK_MAX_AGE_SECONDS = 300
+
+@dataclass
+class Job:
+    id: str
+    post_id: str
+    source: str  # "api" or "webhook"
+    status: str = "queued"  # queued, running, done, failed
+    created_at: str = field(default_factory=lambda: datetime.now().isoformat())
+    finished_at: Optional[str] = None
+    # updated_at of the post version that was analyzed
+    post_updated_at: Optional[str] = None
+    session_id: Optional[int] = None
+    suggestions: list[dict[str, Any]] = field(default_factory=list)
+    suggestion_ids: list[int] = field(default_factory=list)
+    error: Optional[str] = None
+
+    def to_dict(self, include_suggestions: bool = True) -> dict[str, Any]:
+        data = dict(self.__dict__)
+        if not include_suggestions:
+            data.pop("suggestions")
+            data.pop("suggestion_ids")
+        return data
+
+class QueueFullError(Exception):
+    pass
+
+class AnalysisService:
+    """Keeps the compiled graph, clients and caches warm and drains a job queue.
+
+    All job state is owned by the event loop; the HTTP threads reach it
+    through `call`, so no locking is needed. Webhook events are debounced per
+    post: a burst of `post.edited` events queues one job, `debounce` seconds
+    after the last of them.
+    """
+
+    def __init__(self, workers: int, queue_size: int, debounce: float = 0.0):
+        self.workers = max(workers, 1)
+        self.queue_size = max(queue_size, 1)
+        self.debounce = max(debounce, 0.0)
+        self.jobs: OrderedDict[str, Job] = OrderedDict()
+        self.latest: dict[str, str] = {}  # post id -> id of its most recent job
+        self.pending: dict[str, asyncio.TimerHandle] = {}  # post id -> debounced webhook submit
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.queue: Optional[asyncio.Queue[Job]] = None
+        self.ready = threading.Event()
+
+    def call(self, coro: Any, timeout: float = 5.0) -> Any:
+        """Run a coroutine on the service loop from another thread."""
+        assert self.loop is not None
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result(timeout)
+
+    async def submit(self, post_id: str, source: str = "api") -> Job:
+        return self._submit(post_id, source)
+
+    def _submit(self, post_id: str, source: str) -> Job:
+        assert self.queue is not None
+        # A queued job fetches the post when it starts, so it already covers new edits
+        current = self.jobs.get(self.latest.get(post_id, ""))
+        if current is not None and current.status == "queued":
+            return current
+        job = Job(id=uuid.uuid4().hex, post_id=post_id, source=source)
+        try:
+            self.queue.put_nowait(job)
+        except asyncio.QueueFull:
+            raise QueueFullError(f"Analysis queue is full ({self.queue_size} jobs)") from None
+        self.jobs[job.id] = job
+        self.latest[post_id] = job.id
+        self._trim()
+        return job
+
+    async def schedule(self, post_id: str, source: str = "webhook") -> Optional[Job]:
+        """Submit once no event arrived for the post for `debounce` seconds; None while waiting."""
+        assert self.loop is not None
+        previous = self.pending.pop(post_id, None)
+        if previous is not None:
+            previous.cancel()
+        if not self.debounce:
+            return self._submit(post_id, source)
+        self.pending[post_id] = self.loop.call_later(self.debounce, self._submit_pending, post_id, source)
+        return None
+
+    def _submit_pending(self, post_id: str, source: str) -> None:
+        self.pending.pop(post_id, None)
+        try:
+            self._submit(post_id, source)
+        except QueueFullError as e:
+            print(f"{post_id}: dropped {source} event: {e}", file=sys.stderr)
+
+    async def get(self, job_id: str) -> Optional[Job]:
+        return self.jobs.get(job_id)
+
+    async def latest_for(self, post_id: str, finished: bool = False) -> Optional[Job]:
+        if not finished:
+            return self.jobs.get(self.latest.get(post_id, ""))
+        for job in reversed(self.jobs.values()):
+            if job.post_id == post_id and job.status == "done":
+                return job
+        return None
+
+    async def health(self) -> dict[str, Any]:
+        assert self.queue is not None
+        counts: dict[str, int] = {}
+        for job in self.jobs.values():
+            counts[job.status] = counts.get(job.status, 0) + 1
+        return {
+            "status": "ok",
+            "workers": self.workers,
+            "queued": self.queue.qsize(),
+            "scheduled": len(self.pending),
+            "jobs": counts,
+        }
+
+    def _trim(self) -> None:
+        finished = [j.id for j in self.jobs.values() if j.status in ("done", "failed")]
+        for job_id in finished[: max(len(finished) - MAX_FINISHED_JOBS, 0)]:
+            del self.jobs[job_id]
+
+    async def run(self, stop: asyncio.Event) -> None:
+        # Imported here so `serve` pays the import and graph compilation once, at startup
+        from proofreader.agent.graph import create_agent_graph
+        from proofreader.ghost.client import close_ghost_clients
+
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=self.queue_size)
+        graph = create_agent_graph()
+        workers = [asyncio.create_task(self._worker(graph)) for _ in range(self.workers)]
+        self.ready.set()
+        try:
+            await stop.wait()
+        finally:
+            for handle in self.pending.values():
+                handle.cancel()
+            self.pending.clear()
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+            await close_ghost_clients()
+
+    async def _worker(self, graph: Any) -> None:
+        from proofreader.batch import analyze_post
+        from proofreader.ghost.client import get_ghost_client
+
+        assert self.queue is not None
+        while True:
+            job = await self.queue.get()
+            job.status = "running"
+            try:
+                post = await get_ghost_client().get_post(job.post_id)
+                job.post_updated_at = post.updated_at.isoformat()
+                result = await analyze_post(graph, post)
+                job.session_id = result.session_id
+                job.suggestions = result.suggestions
+                job.suggestion_ids = result.suggestion_ids
+                job.error = result.error
+                job.status = "done"
+            except Exception as e:
+                job.status = "failed"
+                job.error = str(e)
+            job.finished_at = datetime.now().isoformat()
+            print(f"{job.post_id}: {job.status} ({len(job.suggestions)} suggestions)", file=sys.stderr)
+            self._trim()
+            self.queue.task_done()
+
+def is_loopback(host: str) -> bool:
+    if host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+def verify_ghost_signature(
+    secret: str, body: bytes, header: Optional[str], now: Optional[float] = None
+) -> bool:
+    """Check Ghost's `X-Ghost-Signature: sha256=<hex>, t=<timestamp>` header.
+
+    The timestamp is signed with the body, so a captured request is only
+    accepted within `WEBHOOK_MAX_AGE_SECONDS` of being sent.
+    """
+    if not header:
+        return False
+    parts = dict(part.strip().split("=", 1) for part in header.split(",") if "=" in part)
+    signature, timestamp = parts.get("sha256"), parts.get("t")
+    if not signature or not timestamp:
+        return False
+    try:
+        sent = int(timestamp)
+    except ValueError:
+        return False
+    # Ghost sends milliseconds; accept seconds too
+    if sent > 10**11:
+        sent //= 1000
+    if abs((time.time() if now is None else now) - sent) > WEBHOOK_MAX_AGE_SECONDS:
+        return False
+    expected = hmac.new(secret.encode(), body + timestamp.encode(), hashlib.sha256).hexdigest()
+    return hmac.compare_digest(expected, signature)
+
+def service_headers() -> dict[str, str]:
+    """Headers a client of the service sends with every API request."""
+    return {"Authorization": f"Bearer {settings.service_token}"} if settings.service_token else {}
+
+class ServiceHandler(BaseHTTPRequestHandler):
+    """Small JSON API: POST /jobs, GET /jobs/<id>, GET /posts/<id>/suggestions,
+    POST /webhooks/ghost and GET /health.
+
+    Webhooks are authenticated by their Ghost signature; every other route
+    requires `Authorization: Bearer <SERVICE_TOKEN>` once a token is set.
+    """
+
+    service: AnalysisService
+    server_version = "proofreader"
+
+    def log_message(self, format: str, *args: Any) -> None:
+        print(f"{self.address_string()} {format % args}", file=sys.stderr)
+
+    def send_json(self, data: Any, status: HTTPStatus = HTTPStatus.OK) -> None:
+        body = json.dumps(data).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def read_body(self) -> Optional[bytes]:
+        """The request body, or None after answering a missing or oversized Content-Length."""
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+        except ValueError:
+            length = -1
+        if length < 0:
+            self.send_json({"error": "Invalid Content-Length"}, HTTPStatus.BAD_REQUEST)
+            return None
+        if length > MAX_BODY_BYTES:
+            self.send_json({"error": f"Body exceeds {MAX_BODY_BYTES} bytes"}, HTTPStatus.REQUEST_ENTITY_TOO_LARGE)
+            return None
+        return self.rfile.read(length)
+
+    def authorized(self) -> bool:
+        """Check the API token; without one, `serve` only listens on loopback."""
+        token = settings.service_token
+        if not token:
+            return True
+        header = self.headers.get("Authorization") or ""
+        if hmac.compare_digest(header.encode(), f"Bearer {token}".encode()):
+            return True
+        self.send_json({"error": "Missing or invalid service token"}, HTTPStatus.UNAUTHORIZED)
+        return False
+
+    def do_GET(self) -> None:
+        if not self.authorized():
+            return
+        parts = [p for p in self.path.split("?", 1)[0].split("/") if p]
+        if parts == ["health"]:
+            self.send_json(self.service.call(self.service.health()))
+        elif len(parts) == 2 and parts[0] == "jobs":
+            job = self.service.call(self.service.get(parts[1]))
+            if job is None:
+                self.send_json({"error": "Unknown job"}, HTTPStatus.NOT_FOUND)
+            else:
+                self.send_json(job.to_dict())
+        elif len(parts) == 3 and parts[0] == "posts" and parts[2] == "suggestions":
+            job = self.service.call(self.service.latest_for(parts[1], finished=True))
+            if job is None:
+                self.send_json({"error": "No finished analysis for this post"}, HTTPStatus.NOT_FOUND)
+            else:
+                self.send_json(job.to_dict())
+        else:
+            self.send_json({"error": "Not found"}, HTTPStatus.NOT_FOUND)
+
+    def do_POST(self) -> None:
+        body = self.read_body()
+        if body is None:
+            return
+        if self.path == "/jobs":
+            if not self.authorized():
+                return
+            try:
+                post_id = json.loads(body or b"{}")["post_id"]
+            except (ValueError, KeyError, TypeError):
+                self.send_json({"error": "Expected a JSON body with post_id"}, HTTPStatus.BAD_REQUEST)
+                return
+            self.enqueue(str(post_id), "api")
+        elif self.path == "/webhooks/ghost":
+            self.handle_webhook(body)
+        else:
+            self.send_json({"error": "Not found"}, HTTPStatus.NOT_FOUND)
+
+    def handle_webhook(self, body: bytes) -> None:
+        secret = settings.ghost_webhook_secret
+        # Unsigned webhooks are only trusted from a service bound to loopback
+        if not secret and not is_loopback(str(self.server.server_address[0])):
+            self.send_json({"error": "GHOST_WEBHOOK_SECRET is not configured"}, HTTPStatus.UNAUTHORIZED)
+            return
+        if secret and not verify_ghost_signature(secret, body, self.headers.get("X-Ghost-Signature")):
+            self.send_json({"error": "Invalid signature"}, HTTPStatus.UNAUTHORIZED)
+            return
+        try:
+            current = json.loads(body)["post"]["current"]
+        except (ValueError, KeyError, TypeError):
+            self.send_json({"error": "Expected a Ghost post webhook"}, HTTPStatus.BAD_REQUEST)
+            return
+        # Only drafts are pre-analyzed; published posts are not reviewed
+        if current.get("status") != "draft" or not current.get("id"):
+            self.send_json({"status": "ignored"}, HTTPStatus.ACCEPTED)
+            return
+        post_id = str(current["id"])
+        try:
+            job = self.service.call(self.service.schedule(post_id))
+        except QueueFullError as e:
+            self.send_json({"error": str(e)}, HTTPStatus.SERVICE_UNAVAILABLE)
+            return
+        if job is None:
+            self.send_json({"status": "scheduled", "post_id": post_id, "delay": self.service.debounce}, HTTPStatus.ACCEPTED)
+        else:
+            self.send_json(job.to_dict(include_suggestions=False), HTTPStatus.ACCEPTED)
+
+    def enqueue(self, post_id: str, source: str) -> None:
+        try:
+            job = self.service.call(self.service.submit(post_id, source))
+        except QueueFullError as e:
+            self.send_json({"error": str(e)}, HTTPStatus.SERVICE_UNAVAILABLE)
+            return
+        self.send_json(job.to_dict(include_suggestions=False), HTTPStatus.ACCEPTED)
+
+def serve(host: str, port: int, workers: int, queue_size: int) -> None:
+    """Run the analysis service until interrupted.
+
+    Raises ValueError when asked to listen beyond loopback without both a
+    webhook secret and an API token, since anyone reaching the port could
+    then queue analyses or read suggestions.
+    """
+    if not is_loopback(host):
+        missing = [
+            name for name, value in
+            (("GHOST_WEBHOOK_SECRET", settings.ghost_webhook_secret), ("SERVICE_TOKEN", settings.service_token))
+            if not value
+        ]
+        if missing:
+            raise ValueError(
+                f"Set {' and '.join(missing)} to serve on {host}; without them only loopback addresses are allowed"
+            )
+    service = AnalysisService(workers, queue_size, settings.webhook_debounce_seconds)
+    handler = type("Handler", (ServiceHandler,), {"service": service})
+    httpd = ThreadingHTTPServer((host, port), handler)
+    stop = asyncio.Event()
+
+    def serve_http() -> None:
+        service.ready.wait()
+        print(f"Proofreader service listening on http://{host}:{httpd.server_port}", file=sys.stderr)
+        httpd.serve_forever()
+
+    thread = threading.Thread(target=serve_http, daemon=True)
+    thread.start()
+    try:
+        asyncio.run(service.run(stop))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        httpd.shutdown()
+        httpd.server_close()
+
+def _usable(job: Job, post: Post) -> bool:
+    """Finished cleanly, on the post version the caller is about to edit."""
+    return job.status == "done" and not job.error and job.post_updated_at == post.updated_at.isoformat()
+
+async def fetch_preanalyzed(base_url: str, post: Post) -> Optional[Job]:
+    """Finished analysis of this exact post version from a running service, if any."""
+    try:
+        async with httpx.AsyncClient(base_url=base_url, headers=service_headers(), timeout=2.0) as client:
+            response = await client.get(f"/posts/{post.id}/suggestions")
+        if response.status_code != HTTPStatus.OK:
+            return None
+        job = Job(**response.json())
+    except (httpx.HTTPError, ValueError, TypeError):
+        return None
+    return job if _usable(job, post) else None
+
+async def request_analysis(
+    base_url: str, post: Post, poll_interval: float = 1.0, timeout: float = 600.0
+) -> Optional[Job]:
+    """Queue an analysis of the post on a running service and wait for it.
+
+    None when the service is unreachable, busy, too slow or the job failed,
+    so the caller can analyze the post itself.
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    try:
+        async with httpx.AsyncClient(base_url=base_url, headers=service_headers(), timeout=5.0) as client:
+            response = await client.post("/jobs", json={"post_id": post.id})
+            if response.status_code != HTTPStatus.ACCEPTED:
+                return None
+            job_id = response.json()["id"]
+            while True:
+                response = await client.get(f"/jobs/{job_id}")
+                if response.status_code != HTTPStatus.OK:
+                    return None
+                job = Job(**response.json())
+                if job.status in ("done", "failed"):
+                    break
+                if loop.time() >= deadline:
+                    return None
+                await asyncio.sleep(poll_interval)
+    except (httpx.HTTPError, ValueError, TypeError, KeyError):
+        return None
+    return job if _usable(job, post) else None
+
+def job_suggestions(job: Job) -> list[Suggestion]:
+    return [Suggestion.model_validate(s) for s in job.suggestions]
@@ -4,49 +4,22 @@ from proofreader.ui.screens.draft_list import DraftListScreen
 from proofreader.ui.screens.review import ReviewScreen
 from proofreader.ui.screens.loading import LoadingScreen
 from proofreader.ui.screens.result import ResultScreen
-from proofreader.agent.graph import create_agent_graph
-from proofreader.ghost.client import GhostClient
+from proofreader.agent.graph import create_agent_graph, NODE_NAMES
+from proofreader.agent.metrics import MetricsRecorder, current_recorder, save_metrics
+from proofreader.ghost.client import get_ghost_client, close_ghost_clients, PostCache
 from proofreader.config.settings import settings
+from proofreader.server import fetch_preanalyzed, job_suggestions, request_analysis
 
 from proofreader.agent.nodes.updater import create_lexical_update
+from proofreader.editing.lexical import patch_lexical
+from proofreader.editing.html import patch_html
+from proofreader.editing.validation import check_content
+from proofreader.agent.merge import SuggestionMerger
+from proofreader.db.operations import create_session, add_suggestions, decision_writer
+import asyncio
 import json
 import html as html_lib
 
-def replace_in_lexical_node(node, original, replacement, count_ref):
-    """Recursively search and replace text in a Lexical node tree."""
-    if count_ref['count'] > 0:
-        return
-
-    if node.get("type") == "text" and "text" in node:
-        text = node["text"]
-        
-        # Strategy 1: Exact match
-        if original in text:
-            new_text = text.replace(original, replacement, 1)
-            node["text"] = new_text
-            count_ref['count'] += 1
-            return
-            
-        # Strategy 2: Exact Match with stripped original (common if LLM includes surrounding whitespace)
-        # Only try if original has whitespace to strip
-        original_stripped = original.strip()
-        if original_stripped and original_stripped != original and original_stripped in text:
-             # We found the stripped version. Now we need to decide how to replace.
-             # If we replace the stripped version with the full replacement, we might double spaces if the replacement has spaces.
-             # But we can't easily know if the replacement's spaces were meant for the stripped bounds or not.
-             # We'll assume the replacement is intended to replace the *semantic* content, so we replace the stripped match.
-             # Risk: "a sentence." -> match "sentence" -> replace " sentence." -> "a  sentence."
-             # Heuristic: If we stripped the original, we should probably strip the replacement corresponding to the stripped sides?
-             # Too complex to guess. Let's just do the replacement of the stripped key.
-             new_text = text.replace(original_stripped, replacement, 1)
-             node["text"] = new_text
-             count_ref['count'] += 1
-             return
-
-    if "children" in node:
-        for child in node["children"]:
-            replace_in_lexical_node(child, original, replacement, count_ref)
-
 from proofreader.ui.screens.lexical_preview import LexicalPreviewScreen
 
 class ProofreaderApp(App):
@@ -60,27 +33,55 @@ class ProofreaderApp(App):
     def __init__(self, dry_run: bool = False):
         super().__init__()
         self.dry_run = dry_run
-        self.post_map = {}
-        self.agent_graph = create_agent_graph()
+        self.draft_summaries = {}
+        self.post_cache = PostCache(settings.post_cache_size)
+        # Compiled on the first local analysis; a thin client of SERVICE_URL may never need it
+        self.agent_graph = None
 
     def on_mount(self):
         self.push_screen(DraftListScreen(), self.on_draft_selected)
 
+    async def on_unmount(self):
+        await close_ghost_clients()
+        # Flush decisions still queued in the write-behind writer
+        await asyncio.to_thread(decision_writer.close)
+
     def on_draft_selected(self, post_id: str | None):
         if not post_id:
             self.exit()
             return
             
-        post = self.post_map.get(post_id)
-        if post:
-            self.loading_screen = LoadingScreen()
-            self.push_screen(self.loading_screen)
-            self.run_analysis(post)
+        self.loading_screen = LoadingScreen(NODE_NAMES)
+        self.push_screen(self.loading_screen)
+        self.run_analysis(post_id)
 
     @work(exclusive=True)
-    async def run_analysis(self, post):
+    async def run_analysis(self, post_id):
+        summary = self.draft_summaries.get(post_id)
+        try:
+            self.loading_screen.update_status("Loading draft...")
+            post = await self.post_cache.load(get_ghost_client(), post_id, summary.updated_at if summary else None)
+        except Exception as e:
+            self.pop_screen() # Remove loading screen
+            self.notify(f"Error loading draft: {e}", severity="error")
+            return
+
+        if settings.service_url and await self.review_from_service(post):
+            return
+
         self.notify("Running analysis... this may take a moment.")
-        # In a real app we'd show the specific progress screen here
+        if self.agent_graph is None:
+            self.agent_graph = create_agent_graph()
+
+        session = None
+        try:
+            session = await asyncio.to_thread(create_session, post.id)
+        except Exception as e:
+            self.notify(f"Could not record session: {e}", severity="warning")
+
+        # Node timings and LLM usage are shown live and saved against the session
+        recorder = MetricsRecorder(session.id if session else None, listener=self.loading_screen.update_metrics)
+        current_recorder.set(recorder)
         
         # Initial state
         state = {
@@ -89,38 +90,122 @@ class ProofreaderApp(App):
             "suggestions": [],
             "error": None
         }
+
+        review_screen = None
+        merger = None
+        suggestion_ids = []
+        recording = session is not None
+
+        async def record(new_suggestions):
+            nonlocal recording
+            if not recording:
+                return
+            try:
+                suggestion_ids.extend(await asyncio.to_thread(
+                    add_suggestions, session.id, [s.model_dump(mode="json") for s in new_suggestions]
+                ))
+            except Exception as e:
+                recording = False
+                self.notify(f"Could not record suggestions: {e}", severity="warning")
+
+        def on_decision(index, action):
+            if index < len(suggestion_ids):
+                decision_writer.submit(session.id, suggestion_ids[index], action)
         
-        # Stream the execution to show progress
-        final_state = state
+        # Stream the execution; review starts as soon as the first node reports
+        # suggestions and later nodes append to the queue while the editor works.
+        error = None
         try:
             async for output in self.agent_graph.astream(state):
                 for node_name, node_update in output.items():
                     node_display = node_name.replace("_", " ").title()
-                    # self.notify(f"Finished {node_display}...")
-                    if hasattr(self, 'loading_screen'):
-                         self.loading_screen.update_status(f"Finished {node_display}...")
+                    if review_screen is None:
+                        self.loading_screen.update_status(f"Finished {node_display}...")
                     
-                    final_state.update(node_update)
+                    node_update = node_update or {}
+                    if node_update.get("error"):
+                        self.notify(f"{node_update['error']}. Continuing without it.", severity="warning", timeout=10)
+                    if node_update.get("document") is not None:
+                        merger = SuggestionMerger(node_update["document"])
+                    new_suggestions = node_update.get("suggestions")
+                    if new_suggestions and merger is not None:
+                        # Drop duplicates, conflicts and text not found in the draft
+                        new_suggestions = merger.add(new_suggestions)
+                    if not new_suggestions:
+                        continue
+                    await record(new_suggestions)
+                    if review_screen is None:
+                        self.pop_screen() # Remove loading screen
+                        recorder.listener = None
+                        review_screen = ReviewScreen(list(new_suggestions), on_decision=on_decision, streaming=True)
+                        self.push_screen(review_screen, lambda approved: self.apply_changes(post, approved))
+                    else:
+                        review_screen.add_suggestions(new_suggestions)
         except Exception as e:
-            self.pop_screen() # Remove loading screen
-            self.notify(f"Analysis error: {e}", severity="error")
+            error = str(e)
+        finally:
+            await save_metrics(recorder)
+
+        if review_screen is not None:
+            if error:
+                self.notify(f"Analysis stopped early: {error}", severity="warning")
+            review_screen.finish()
             return
-        
+
         # Remove loading screen
         self.pop_screen()
 
-        if final_state.get("error"):
-            self.notify(f"Analysis failed: {final_state['error']}", severity="error")
+        if error:
+            self.notify(f"Analysis error: {error}", severity="error")
             return
-            
-        suggestions = final_state.get("suggestions", [])
+
+        self.notify("No suggestions found!")
+        self.push_screen(DraftListScreen(), self.on_draft_selected) 
+        self.exit()
+
+    async def review_from_service(self, post) -> bool:
+        """Review this draft version as analyzed by `proofreader serve`.
+
+        A finished analysis (e.g. from a webhook) is used as is; otherwise the
+        service is asked to analyze the draft. False when the service cannot
+        provide one, so the analysis runs locally instead.
+        """
+        self.loading_screen.update_status("Checking the analysis service...")
+        job = await fetch_preanalyzed(settings.service_url, post)
+        if job is None:
+            self.loading_screen.update_status("Analyzing on the service...")
+            job = await request_analysis(settings.service_url, post)
+        if job is None:
+            self.notify("The analysis service is unavailable; analyzing locally.", severity="warning")
+            return False
+        suggestions = job_suggestions(job)
         if not suggestions:
+            self.pop_screen() # Remove loading screen
             self.notify("No suggestions found!")
-            self.push_screen(DraftListScreen(), self.on_draft_selected) 
+            self.push_screen(DraftListScreen(), self.on_draft_selected)
             self.exit()
-            return
-            
-        self.push_screen(ReviewScreen(suggestions), lambda approved: self.apply_changes(post, approved))
+            return True
+
+        # The job's session and suggestion ids belong to the service's database;
+        # the review is recorded as a local session like any other.
+        session = None
+        suggestion_ids = []
+        try:
+            session = await asyncio.to_thread(create_session, post.id)
+            suggestion_ids = await asyncio.to_thread(
+                add_suggestions, session.id, [s.model_dump(mode="json") for s in suggestions]
+            )
+        except Exception as e:
+            self.notify(f"Could not record session: {e}", severity="warning")
+
+        def on_decision(index, action):
+            if index < len(suggestion_ids):
+                decision_writer.submit(session.id, suggestion_ids[index], action)
+
+        self.notify(f"Loaded {len(suggestions)} suggestions from the analysis service.")
+        self.pop_screen() # Remove loading screen
+        self.push_screen(ReviewScreen(suggestions, on_decision=on_decision), lambda approved: self.apply_changes(post, approved))
+        return True
 
     @work
     async def apply_changes(self, post, approved_suggestions):
@@ -141,43 +226,60 @@ class ProofreaderApp(App):
         
         if use_lexical:
             try:
-                # Use the AI agent to update Lexical data
-                self.notify("Using AI agent to update Lexical content...")
-                
-                new_lexical = create_lexical_update(post.lexical, approved_suggestions)
-                applied_count = len(approved_suggestions) # We assume all were applied by the agent
-                
+                # Patch the Lexical tree locally; only changes we cannot anchor go to the LLM
+                result = patch_lexical(post.lexical, approved_suggestions)
+                new_lexical = result.lexical
+                applied_count = len(result.applied)
             except Exception as e:
-                self.notify(f"Error updating Lexical data with AI: {e}. Falling back to HTML.", severity="error")
+                self.notify(f"Error updating Lexical data: {e}. Falling back to HTML.", severity="error")
                 use_lexical = False
 
+        if use_lexical and result.unanchored:
+            try:
+                self.notify(f"Using AI agent for {len(result.unanchored)} changes that could not be located...")
+                new_lexical = await create_lexical_update(new_lexical, result.unanchored)
+                applied_count += len(result.unanchored) # We assume all were applied by the agent
+            except Exception as e:
+                self.notify(f"AI update failed: {e}. {len(result.unanchored)} changes were skipped.", severity="warning")
+
         if not use_lexical:
-            # Fallback to HTML logic
-            for suggestion in approved_suggestions:
-                if suggestion.original_text in new_html:
-                    new_html = new_html.replace(suggestion.original_text, suggestion.proposed_text, 1)
-                    applied_count += 1
-                else:
-                    self.notify(f"Could not find text: {suggestion.original_text[:20]}...", severity="warning")
+            # Fallback to HTML: every span is located in the original, then spliced once
+            result = patch_html(post.html or "", approved_suggestions)
+            new_html = result.html
+            applied_count = len(result.applied)
+            for skipped in result.skipped:
+                self.notify(f"Skipped \"{skipped.suggestion.original_text[:20]}...\": {skipped.reason}", severity="warning")
         
         # Show Preview Screen
         preview_content = new_lexical if use_lexical else new_html
+        original_content = post.lexical if use_lexical else post.html
+        # Guard against updates (notably from the LLM fallback) that drop content
+        check = await asyncio.to_thread(
+            check_content, original_content or "", preview_content or "", use_lexical,
+            settings.content_deletion_warning_threshold,
+        )
+        if not check.ok:
+            self.notify(check.summary(), severity="error" if check.schema_errors else "warning", timeout=10)
         self.push_screen(
-            LexicalPreviewScreen(preview_content, use_lexical), 
-            lambda confirmed: self.finalize_update(post, new_lexical, new_html, use_lexical, applied_count) if confirmed else self.notify("Update cancelled.")
+            LexicalPreviewScreen(preview_content, use_lexical, original_content, warning=check.summary()), 
+            lambda confirmed: self.finalize_update(post, new_lexical, new_html, use_lexical, applied_count, check) if confirmed else self.notify("Update cancelled.")
         )
 
     @work
-    async def finalize_update(self, post, new_lexical, new_html, use_lexical, applied_count):
+    async def finalize_update(self, post, new_lexical, new_html, use_lexical, applied_count, check):
         message = ""
         success = True
         
-        if self.dry_run:
+        if check.schema_errors:
+            # Ghost would reject or corrupt a malformed document; never send it
+            success = False
+            message = f"Update not applied. {check.summary()}"
+        elif self.dry_run:
             mode = "Lexical" if use_lexical else "HTML"
             message = f"Dry run ({mode}): {applied_count} changes would be applied to Ghost."
         else:
              try:
-                 client = GhostClient(settings.ghost_url, settings.ghost_api_key)
+                 client = get_ghost_client()
                  if use_lexical:
                      await client.update_post(post.id, {"lexical": new_lexical}, post.updated_at)
                  else:
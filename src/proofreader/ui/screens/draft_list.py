@@ -1,8 +1,8 @@
 from textual.screen import Screen
 from textual.widgets import Header, Footer, DataTable
 from textual.binding import Binding
-from proofreader.ghost.client import GhostClient
-from proofreader.config.settings import settings
+from textual import work
+from proofreader.ghost.client import get_ghost_client
 
 class DraftListTable(DataTable):
     BINDINGS = [Binding("q", "quit", "Quit")]
@@ -18,20 +18,22 @@ class DraftListScreen(Screen):
         yield DraftListTable()
         yield Footer()
 
-    async def on_mount(self):
+    def on_mount(self):
         table = self.query_one(DraftListTable)
         table.cursor_type = "row"
         table.add_columns("Title", "Updated At", "Status")
-        
+        self.load_drafts()
+
+    @work(exclusive=True)
+    async def load_drafts(self):
+        table = self.query_one(DraftListTable)
         try:
-            client = GhostClient(settings.ghost_url, settings.ghost_api_key)
-            posts = await client.get_posts(status="draft")
-            # Sort by updated_at desc
-            posts.sort(key=lambda p: p.updated_at, reverse=True)
-            
-            for post in posts:
+            client = get_ghost_client()
+            # Ghost sorts by updated_at desc; rows appear as each page arrives.
+            # Only metadata is listed, bodies are loaded when a draft is opened.
+            async for post in client.iter_post_summaries(status="draft"):
                 table.add_row(post.title, str(post.updated_at), post.status, key=post.id)
-                self.app.post_map[post.id] = post
+                self.app.draft_summaries[post.id] = post
                 
         except Exception as e:
             self.notify(f"Error fetching drafts: {e}", severity="error")
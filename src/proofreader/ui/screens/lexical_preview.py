@@ -1,7 +1,11 @@
 from textual.screen import Screen
-from textual.widgets import Header, Footer, Static, Button, TextArea
-from textual.containers import Container, Horizontal
+from textual.widgets import Header, Footer, Static, Button, TextArea, TabbedContent, TabPane
+from textual.containers import Horizontal, VerticalScroll
 from textual.binding import Binding
+from textual import work
+from typing import Optional
+from proofreader.editing.changes import BlockChange, diff_html, diff_lexical
+from proofreader.ui.widgets.diff import render_diff
 import json
 
 class LexicalPreviewScreen(Screen):
@@ -31,34 +35,87 @@ class LexicalPreviewScreen(Screen):
     Button {
         margin: 0 2;
     }
+
+    .warning {
+        color: $error;
+        text-style: bold;
+    }
     """
 
-    def __init__(self, content: str, is_lexical: bool, **kwargs):
+    def __init__(self, content: str, is_lexical: bool, original: Optional[str] = None, warning: str = "", **kwargs):
         super().__init__(**kwargs)
         self.content = content
         self.is_lexical = is_lexical
+        self.original = original
+        # Content-loss or schema problems found before the update is confirmed
+        self.warning = warning
+        self.full_view_loaded = False
 
     def compose(self):
         yield Header()
-        yield Static("Preview of the Final Content to be sent to Ghost:", classes="header-text")
-        
-        # Pretty print JSON if it is lexical
+        yield Static("Preview of the changes to be sent to Ghost:", classes="header-text")
+        if self.warning:
+            yield Static(f"Warning: {self.warning}", classes="warning")
+
+        with TabbedContent(id="preview_tabs"):
+            with TabPane("Changes", id="changes_tab"):
+                yield VerticalScroll(Static("Comparing with the current draft..."), id="changes", classes="preview-container")
+            with TabPane("Full document", id="full_tab"):
+                # Filled in the first time the tab is opened; long posts are megabytes of JSON
+                yield TextArea("", language="json" if self.is_lexical else "html", read_only=True, id="full_view", classes="preview-container")
+
+        yield Horizontal(
+            Button("Confirm Update (y)", variant="success", id="confirm"),
+            Button("Cancel (n)", variant="error", id="cancel"),
+            classes="buttons"
+        )
+        yield Footer()
+
+    def on_mount(self):
+        self.compute_changes()
+
+    @work(thread=True, exclusive=True)
+    def compute_changes(self):
+        if self.original is None:
+            self.app.call_from_thread(self.show_changes, None)
+            return
+        try:
+            if self.is_lexical:
+                changes = diff_lexical(self.original, self.content)
+            else:
+                changes = diff_html(self.original, self.content)
+        except Exception:
+            changes = None
+        self.app.call_from_thread(self.show_changes, changes)
+
+    def show_changes(self, changes: Optional[list[BlockChange]]):
+        container = self.query_one("#changes", VerticalScroll)
+        container.remove_children()
+        if changes is None:
+            container.mount(Static("Could not compare with the current draft; see the full document tab."))
+            return
+        if not changes:
+            container.mount(Static("No differences from the current draft."))
+            return
+        widgets = [Static(f"{len(changes)} changed block(s)")]
+        for change in changes:
+            widgets.append(Static(f"[b]{change.kind.title()} block {change.position}[/b] ({change.block_type})"))
+            widgets.append(Static(render_diff(change.old_text, change.new_text)))
+        container.mount_all(widgets)
+
+    def on_tabbed_content_tab_activated(self, event: TabbedContent.TabActivated):
+        if event.pane.id != "full_tab" or self.full_view_loaded:
+            return
+        self.full_view_loaded = True
         display_content = self.content
         if self.is_lexical:
+            # Pretty print JSON if it is lexical
             try:
                 parsed = json.loads(self.content)
                 display_content = json.dumps(parsed, indent=2)
             except:
                 pass
-        
-        yield TextArea(display_content, language="json" if self.is_lexical else "html", read_only=True, classes="preview-container")
-        
-        yield Horizontal(
-            Button("Confirm Update (y)", variant="success", id="confirm"),
-            Button("Cancel (n)", variant="error", id="cancel"),
-            classes="buttons"
-        )
-        yield Footer()
+        self.query_one("#full_view", TextArea).load_text(display_content)
 
     def action_confirm(self):
         self.dismiss(True)
@@ -1,6 +1,8 @@
 from textual.screen import Screen
 from textual.widgets import LoadingIndicator, Label
 from textual.containers import Container, Vertical
+from proofreader.agent.metrics import MetricsRecorder
+from proofreader.ui.widgets.progress import AgentProgress
 
 class LoadingScreen(Screen):
     CSS = """
@@ -27,11 +29,21 @@ class LoadingScreen(Screen):
         text-align: center;
     }
     """
+
+    def __init__(self, nodes: tuple[str, ...] = (), **kwargs):
+        super().__init__(**kwargs)
+        self.nodes = nodes
     
     def compose(self):
         with Container():
             yield LoadingIndicator()
             yield Label("Initializing analysis...", id="loading-label")
+            if self.nodes:
+                yield AgentProgress(self.nodes, id="agent-progress")
             
     def update_status(self, message: str):
         self.query_one("#loading-label", Label).update(message)
+
+    def update_metrics(self, recorder: MetricsRecorder):
+        if self.nodes and self.is_mounted:
+            self.query_one("#agent-progress", AgentProgress).update_metrics(recorder)
@@ -2,7 +2,9 @@ from textual.screen import Screen
 from textual.widgets import Header, Footer, Static, Button
 from textual.containers import Container, Horizontal
 from textual.binding import Binding
-from proofreader.ui.widgets.diff import DiffViewer
+from textual import work
+from typing import Callable, Optional
+from proofreader.ui.widgets.diff import DiffViewer, render_diff
 
 class ReviewScreen(Screen):
     BINDINGS = [
@@ -11,9 +13,19 @@ class ReviewScreen(Screen):
         Binding("q", "quit", "Quit"),
     ]
 
-    def __init__(self, suggestions: list, **kwargs):
+    def __init__(
+        self,
+        suggestions: list,
+        on_decision: Optional[Callable[[int, str], None]] = None,
+        streaming: bool = False,
+        **kwargs
+    ):
         super().__init__(**kwargs)
         self.suggestions = suggestions
+        # While streaming, more suggestions may arrive until finish() is called
+        self.analysis_running = streaming
+        # Called with (suggestion index, "approve" | "reject") for each decision
+        self.on_decision = on_decision
         self.current_index = 0
         self.approved_suggestions = []
 
@@ -33,29 +45,70 @@ class ReviewScreen(Screen):
 
     def on_mount(self):
         self.show_current_suggestion()
+        self.precompute_diffs(list(self.suggestions[self.current_index + 1:]))
+
+    @work(thread=True, group="diffs")
+    def precompute_diffs(self, suggestions: list):
+        """Render diffs for the queue ahead of the reviewer; results land in the cache."""
+        for s in suggestions:
+            render_diff(s.original_text, s.proposed_text)
 
     def show_current_suggestion(self):
         if self.current_index < len(self.suggestions):
             s = self.suggestions[self.current_index]
-            self.query_one("#suggestion_info", Static).update(
-                f"Suggestion {self.current_index + 1}/{len(self.suggestions)} - Type: {s.type.value} - Location: {s.location}"
-            )
+            self.update_counter()
             self.query_one("#diff_viewer", DiffViewer).update_diff(s.original_text, s.proposed_text)
             self.query_one("#reasoning", Static).update(f"Reasoning: {s.reasoning}")
+        elif self.analysis_running:
+            self.update_counter()
+            self.query_one("#diff_viewer", DiffViewer).update("")
+            self.query_one("#reasoning", Static).update("Waiting for the remaining analysis to finish...")
         else:
              self.dismiss(self.approved_suggestions)
 
+    def update_counter(self):
+        running = " (analysis running...)" if self.analysis_running else ""
+        if self.current_index < len(self.suggestions):
+            s = self.suggestions[self.current_index]
+            text = f"Suggestion {self.current_index + 1}/{len(self.suggestions)}{running} - Type: {s.type.value} - Location: {s.location}"
+        else:
+            text = f"Reviewed {len(self.suggestions)}/{len(self.suggestions)}{running}"
+        self.query_one("#suggestion_info", Static).update(text)
+
+    def add_suggestions(self, suggestions: list):
+        waiting = self.current_index >= len(self.suggestions)
+        self.suggestions.extend(suggestions)
+        if not self.is_mounted:
+            return
+        self.precompute_diffs(list(suggestions))
+        if waiting:
+            self.show_current_suggestion()
+        else:
+            self.update_counter()
+
+    def finish(self):
+        """Mark the analysis as complete; the screen closes once the queue is reviewed."""
+        self.analysis_running = False
+        if self.is_mounted:
+            self.show_current_suggestion()
+
     def action_approve(self):
         if self.current_index < len(self.suggestions):
             self.approved_suggestions.append(self.suggestions[self.current_index])
+            self.record_decision("approve")
             self.current_index += 1
             self.show_current_suggestion()
 
     def action_reject(self):
         if self.current_index < len(self.suggestions):
+            self.record_decision("reject")
             self.current_index += 1
             self.show_current_suggestion()
 
+    def record_decision(self, action: str):
+        if self.on_decision:
+            self.on_decision(self.current_index, action)
+
     def on_button_pressed(self, event: Button.Pressed):
         if event.button.id == "approve":
             self.action_approve()
@@ -1,26 +1,62 @@
+from functools import lru_cache
 from textual.widgets import Static
 from rich.text import Text
 from rich.table import Table
 import difflib
+import re
+
+# Words, whitespace runs and single punctuation marks
+_TOKENS = re.compile(r"\w+|\s+|[^\w\s]")
+
+DELETED_STYLE = "bold red on #330000"
+INSERTED_STYLE = "bold green on #003300"
+
+# Replaced runs up to this many characters are refined to a character diff,
+# so a typo fix highlights the letters that changed rather than the word
+CHAR_DIFF_MAX = 40
+
+def _append_replacement(original: Text, proposed: Text, old: str, new: str) -> None:
+    if len(old) > CHAR_DIFF_MAX or len(new) > CHAR_DIFF_MAX:
+        original.append(old, style=DELETED_STYLE)
+        proposed.append(new, style=INSERTED_STYLE)
+        return
+    matcher = difflib.SequenceMatcher(None, old, new, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            original.append(old[i1:i2], style="red")
+            proposed.append(new[j1:j2], style="green")
+            continue
+        original.append(old[i1:i2], style=DELETED_STYLE)
+        proposed.append(new[j1:j2], style=INSERTED_STYLE)
+
+def inline_diff(original: str, proposed: str) -> tuple[Text, Text]:
+    """Word-level diff of two texts, with deletions and insertions highlighted."""
+    old_tokens = _TOKENS.findall(original)
+    new_tokens = _TOKENS.findall(proposed)
+    old_text, new_text = Text(), Text()
+    matcher = difflib.SequenceMatcher(None, old_tokens, new_tokens, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        old = "".join(old_tokens[i1:i2])
+        new = "".join(new_tokens[j1:j2])
+        if tag == "equal":
+            old_text.append(old)
+            new_text.append(new)
+        elif tag == "replace":
+            _append_replacement(old_text, new_text, old, new)
+        else:
+            old_text.append(old, style=DELETED_STYLE)
+            new_text.append(new, style=INSERTED_STYLE)
+    return old_text, new_text
+
+@lru_cache(maxsize=1024)
+def render_diff(original: str, proposed: str) -> Table:
+    """Side-by-side inline diff; cached so revisiting a suggestion is instant."""
+    table = Table(show_header=True, header_style="bold magenta", expand=True, show_lines=False)
+    table.add_column("Original", ratio=1)
+    table.add_column("Proposed", ratio=1)
+    table.add_row(*inline_diff(original, proposed))
+    return table
 
 class DiffViewer(Static):
     def update_diff(self, original: str, proposed: str):
-        diff = difflib.ndiff(original.splitlines(), proposed.splitlines())
-        
-        table = Table(show_header=True, header_style="bold magenta", expand=True, show_lines=False)
-        table.add_column("Original", ratio=1)
-        table.add_column("Proposed", ratio=1)
-
-        for line in diff:
-            code = line[:2]
-            content = line[2:]
-            
-            if code == '- ':
-                table.add_row(Text(content, style="bold red on #330000"), "")
-            elif code == '+ ':
-                table.add_row("", Text(content, style="bold green on #003300"))
-            elif code == '  ':
-                table.add_row(Text(content), Text(content))
-            # Ignore '?' lines
-            
-        self.update(table)
+        self.update(render_diff(original, proposed))
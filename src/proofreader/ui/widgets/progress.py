@@ -1,16 +1,71 @@
-from textual.widgets import ProgressBar, Static
+from textual.widgets import ProgressBar, Static, DataTable
 from textual.containers import Vertical
+from proofreader.agent.metrics import MetricsRecorder
 
 class AgentProgress(Vertical):
-    def __init__(self, **kwargs):
+    """Live per-node view of an analysis run, fed by a MetricsRecorder."""
+
+    DEFAULT_CSS = """
+    AgentProgress {
+        height: auto;
+    }
+
+    AgentProgress DataTable {
+        height: auto;
+        margin-top: 1;
+    }
+    """
+
+    COLUMNS = ("Node", "Status", "Time", "Calls", "Wait", "Tokens in/out", "Cost")
+
+    def __init__(self, nodes: tuple[str, ...], **kwargs):
         super().__init__(**kwargs)
-        self.progress_bar = ProgressBar(total=4, show_eta=False)
+        self.nodes = nodes
+        self.progress_bar = ProgressBar(total=len(nodes), show_eta=False)
         self.status_label = Static("Waiting to start...")
+        self.table = DataTable(show_cursor=False)
         
     def compose(self):
         yield self.status_label
         yield self.progress_bar
-        
-    def update_step(self, step_name: str, step_index: int):
-        self.status_label.update(f"Running: {step_name}")
-        self.progress_bar.progress = step_index
+        yield self.table
+
+    def on_mount(self):
+        self.column_keys = self.table.add_columns(*self.COLUMNS)
+        for node in self.nodes:
+            self.table.add_row(self._display(node), "pending", "", "", "", "", "", key=node)
+
+    @staticmethod
+    def _display(node: str) -> str:
+        return node.replace("_", " ").title()
+
+    def update_metrics(self, recorder: MetricsRecorder):
+        running = []
+        done = 0
+        for name in self.nodes:
+            metric = recorder.node(name)
+            wait = sum(c.wait_time for c in recorder.calls if c.node == name)
+            cells = (
+                metric.status,
+                f"{metric.wall_time:.1f}s" if metric.status in ("done", "failed") else "",
+                str(metric.calls),
+                f"{wait:.1f}s",
+                f"{metric.prompt_tokens}/{metric.completion_tokens}",
+                f"${metric.cost:.4f}",
+            )
+            for column_key, value in zip(self.column_keys[1:], cells):
+                self.table.update_cell(name, column_key, value)
+            if metric.status == "running":
+                running.append(self._display(name))
+            elif metric.status in ("done", "failed"):
+                done += 1
+
+        totals = recorder.totals()
+        saved = sum(m.extra.get("saved_tokens", 0) for m in recorder.nodes.values())
+        self.progress_bar.progress = done
+        self.status_label.update(
+            (f"Running: {', '.join(running)}" if running else "Analysis finished" if done == len(self.nodes) else "Waiting...")
+            + f" | {totals['wall_time']:.1f}s | {totals['calls']} calls"
+            + f" | {totals['prompt_tokens'] + totals['completion_tokens']} tokens | ${totals['cost']:.4f}"
+            + (f" | ~{saved} tokens saved by compact text" if saved else "")
+        )
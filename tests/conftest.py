@@ -1,5 +1,7 @@
 import pytest
 from datetime import datetime
+from sqlalchemy.orm import sessionmaker
+from proofreader.db import operations
 from proofreader.ghost.models import Post
 
 @pytest.fixture
@@ -18,4 +20,17 @@ def sample_post():
 
 @pytest.fixture
 def mock_openai(mocker):
-    return mocker.patch("proofreader.agent.utils.client")
+    mock_client = mocker.patch("proofreader.agent.utils.client")
+    mock_client.beta.chat.completions.parse = mocker.AsyncMock()
+    return mock_client
+
+@pytest.fixture(autouse=True)
+def db(mocker, tmp_path):
+    # A file-backed database, like the real one: an in-memory StaticPool engine
+    # shares one connection between the worker threads of concurrent analyses
+    engine = operations.create_db_engine(f"sqlite:///{tmp_path / 'proofreader.db'}")
+    mocker.patch.object(operations, "engine", engine)
+    mocker.patch.object(operations, "SessionLocal", sessionmaker(autocommit=False, autoflush=False, bind=engine))
+    operations.init_db()
+    yield operations
+    engine.dispose()
@@ -1,17 +1,76 @@
-from proofreader.agent.nodes.style import analyze_style
+import asyncio
+import hashlib
+import hmac
+import io
+import json
+import os
+import time
+import httpx
+import openai
+import pytest
+import yaml
+from datetime import datetime, timedelta, timezone
+from unittest.mock import Mock
+from sqlalchemy import select
+from proofreader import batch, server
+from proofreader.agent import graph, utils
+from proofreader.agent.chunking import build_chunks, deduplicate
+from proofreader.agent.document import Document
+from proofreader.agent.graph import create_agent_graph
+from proofreader.agent.limiter import RateLimiter
+from proofreader.agent.merge import SuggestionMerger, merge_suggestions
+from proofreader.agent.metrics import MetricsRecorder, current_recorder, instrumented
+from proofreader.agent.nodes.style import StyleAnalysis, analyze_style, corpus_fingerprint
 from proofreader.agent.nodes.typos import correct_typos
-from proofreader.agent.suggestions import Suggestion, SuggestionType
+from proofreader.agent.prompts import PROMPTS_PATH, PromptError, PromptRegistry
+from proofreader.agent.resilience import CircuitBreaker, CircuitOpenError, ResilientCaller
+from proofreader.agent.sampling import sample_corpus
+from proofreader.agent.suggestions import Suggestion, SuggestionList, SuggestionType
+from proofreader.db.models import Decision, Suggestion as SuggestionRow
+from proofreader.ghost.client import GhostClient, PostCache, get_ghost_client
+from proofreader.ghost.models import PostSummary
+from proofreader.server import verify_ghost_signature
 
-def test_analyze_style(sample_post, mock_openai):
+def test_analyze_style(sample_post, mock_openai, mocker):
+    mocker.patch("proofreader.agent.nodes.style.GhostClient.get_post_summaries", mocker.AsyncMock(return_value=[]))
+    mocker.patch("proofreader.agent.nodes.style.GhostClient.get_posts", mocker.AsyncMock(return_value=[]))
     # Mocking the parsed response
     mock_choice = mock_openai.beta.chat.completions.parse.return_value.choices[0]
     mock_choice.message.parsed.guidelines = "Use active voice."
     
     state = {"post": sample_post, "style_guidelines": "", "suggestions": []}
-    result = analyze_style(state)
+    result = asyncio.run(analyze_style(state))
     
     assert result["style_guidelines"] == "Use active voice."
 
+def test_analyze_style_uses_cached_guide(sample_post, mock_openai, mocker, db):
+    corpus = [PostSummary(id="1", updated_at=sample_post.updated_at)]
+    mocker.patch("proofreader.agent.nodes.style.GhostClient.get_post_summaries", mocker.AsyncMock(return_value=corpus))
+    get_posts = mocker.patch("proofreader.agent.nodes.style.GhostClient.get_posts", mocker.AsyncMock())
+    db.save_style_guide(corpus_fingerprint(corpus), "Cached guide.")
+
+    state = {"post": sample_post, "style_guidelines": "", "suggestions": []}
+    result = asyncio.run(analyze_style(state))
+
+    assert result["style_guidelines"] == "Cached guide."
+    get_posts.assert_not_called()
+    mock_openai.beta.chat.completions.parse.assert_not_called()
+
+def test_analyze_style_generates_once_for_concurrent_runs(sample_post, mock_openai, mocker, db):
+    corpus = [PostSummary(id=sample_post.id, updated_at=sample_post.updated_at)]
+    mocker.patch("proofreader.agent.nodes.style.GhostClient.get_post_summaries", mocker.AsyncMock(return_value=corpus))
+    mocker.patch("proofreader.agent.nodes.style.GhostClient.get_posts", mocker.AsyncMock(return_value=[sample_post]))
+    mock_openai.beta.chat.completions.parse.return_value.choices[0].message.parsed = StyleAnalysis(guidelines="Be brief.")
+
+    async def run():
+        state = {"post": sample_post, "style_guidelines": "", "suggestions": []}
+        return await asyncio.gather(*(analyze_style(state) for _ in range(3)))
+
+    results = asyncio.run(run())
+
+    assert [r["style_guidelines"] for r in results] == ["Be brief."] * 3
+    assert mock_openai.beta.chat.completions.parse.call_count == 1
+
 def test_correct_typos(sample_post, mock_openai):
     # Mocking suggestions
     mock_choice = mock_openai.beta.chat.completions.parse.return_value.choices[0]
@@ -26,7 +85,643 @@ def test_correct_typos(sample_post, mock_openai):
     ]
     
     state = {"post": sample_post, "style_guidelines": "Style", "suggestions": []}
-    result = correct_typos(state)
+    result = asyncio.run(correct_typos(state))
     
     assert len(result["suggestions"]) == 1
     assert result["suggestions"][0].original_text == "typo"
+
+def test_graph_merges_parallel_suggestions(sample_post, mocker):
+    def make_node(text):
+        def node(state):
+            return {"suggestions": [
+                Suggestion(
+                    type=SuggestionType.TYPO,
+                    location="Para 1",
+                    original_text=text,
+                    proposed_text=text.upper(),
+                    reasoning="Test"
+                )
+            ]}
+        return node
+
+    mocker.patch.object(graph, "analyze_style", lambda state: {"style_guidelines": "Style"})
+    mocker.patch.object(graph, "correct_typos", make_node("typo"))
+    mocker.patch.object(graph, "improve_structure", make_node("structure"))
+    mocker.patch.object(graph, "check_coherence", make_node("coherence"))
+
+    state = {"post": sample_post, "style_guidelines": "", "suggestions": [], "error": None}
+    result = asyncio.run(graph.create_agent_graph().ainvoke(state))
+
+    assert sorted(s.original_text for s in result["suggestions"]) == ["coherence", "structure", "typo"]
+
+def test_rate_limiter_caps_concurrency():
+    limiter = RateLimiter(max_concurrency=2, rate_limit_delay=0)
+    running = 0
+    peak = 0
+
+    async def call():
+        nonlocal running, peak
+        async with limiter:
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+
+    async def main():
+        await asyncio.gather(*(call() for _ in range(6)))
+
+    asyncio.run(main())
+    assert peak == 2
+
+def test_build_chunks_overlaps_and_deduplicates():
+    html = "".join(f"<p>Paragraph {i} text.</p>" for i in range(6))
+    document = Document.from_html(html)
+    paragraphs = [document.render_block(i) for i in range(len(document.blocks))]
+    assert paragraphs[0] == "[P1] Paragraph 0 text."
+    assert len(paragraphs) == 6
+
+    chunks = build_chunks(paragraphs, max_chars=50, overlap=1)
+    assert chunks[0].paragraphs == [0, 1]
+    assert chunks[1].paragraphs == [1, 2, 3]
+
+    duplicate = Suggestion(
+        type=SuggestionType.TYPO,
+        location="Para 2",
+        original_text="Paragraph 1",
+        proposed_text="Paragraph one",
+        reasoning="Reported by both chunks"
+    )
+    assert len(deduplicate([duplicate, duplicate.model_copy()])) == 1
+
+def test_prompt_registry_validates_and_reloads(tmp_path):
+    prompts = yaml.safe_load(PROMPTS_PATH.read_text())
+    path = tmp_path / "prompts.yaml"
+    path.write_text(yaml.safe_dump(prompts))
+    registry = PromptRegistry(path)
+    original_hash = registry.hash("typo_correction_system")
+
+    prompts["typo_correction_system"] = "Fix typos. {style_guidelines}"
+    path.write_text(yaml.safe_dump(prompts))
+    os.utime(path, ns=(0, 1))
+    assert registry.render("typo_correction_system", style_guidelines="Terse") == "Fix typos. Terse"
+    assert registry.hash("typo_correction_system") != original_hash
+
+    prompts["typo_correction_system"] = "Fix typos."
+    path.write_text(yaml.safe_dump(prompts))
+    with pytest.raises(PromptError):
+        PromptRegistry(path).get("typo_correction_system")
+
+def test_ghost_client_is_shared_and_refreshes_token():
+    client = get_ghost_client("https://blog.example.com/", "abc:" + "00" * 32)
+    assert get_ghost_client("https://blog.example.com", "abc:" + "00" * 32) is client
+
+    first = client.token
+    assert client.token == first
+    client._token_expires_at = 0
+    assert client.headers["Authorization"].startswith("Ghost ")
+    assert client._token_expires_at > 0
+
+    # A new event loop gets a new connection pool and the old one is closed
+    first_http = asyncio.run(client._http())
+    second_http = asyncio.run(client._http())
+    assert second_http is not first_http and first_http.is_closed
+    asyncio.run(client.aclose())
+
+def test_iter_posts_walks_pagination(sample_post):
+    requests = []
+
+    def handler(request):
+        requests.append(request.url.params)
+        page = int(request.url.params["page"])
+        post = sample_post.model_copy(update={"id": str(page)}).model_dump(mode="json")
+        return httpx.Response(200, json={
+            "posts": [post],
+            "meta": {"pagination": {"page": page, "next": page + 1 if page < 3 else None}},
+        })
+
+    async def collect():
+        client = GhostClient("https://blog.example.com", "abc:" + "00" * 32)
+        client._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        client._loop = asyncio.get_running_loop()
+        since = datetime(2024, 1, 2, 3, 4, 5, tzinfo=timezone.utc)
+        return [p.id async for p in client.iter_posts(status="draft", updated_since=since)]
+
+    assert asyncio.run(collect()) == ["1", "2", "3"]
+    assert requests[0]["filter"] == "status:draft+updated_at:>'2024-01-02 03:04:05'"
+
+def test_post_cache_evicts_least_recently_used(sample_post, mocker):
+    cache = PostCache(max_size=2)
+    posts = [sample_post.model_copy(update={"id": str(i)}) for i in range(3)]
+    cache.put(posts[0])
+    cache.put(posts[1])
+    assert cache.get("0") is posts[0]
+    cache.put(posts[2])
+
+    assert cache.get("1") is None
+    assert cache.get("0", posts[0].updated_at) is posts[0]
+    assert cache.get("0", posts[0].updated_at + timedelta(seconds=1)) is None
+
+    client = mocker.Mock(get_post=mocker.AsyncMock(return_value=posts[1]))
+    assert asyncio.run(cache.load(client, "1")) is posts[1]
+    assert asyncio.run(cache.load(client, "1")) is posts[1]
+    client.get_post.assert_awaited_once_with("1")
+
+def test_correct_typos_only_reanalyzes_changed_paragraphs(sample_post, mock_openai):
+    parse = mock_openai.beta.chat.completions.parse
+    parse.return_value.choices[0].message.parsed.suggestions = [
+        Suggestion(
+            type=SuggestionType.TYPO,
+            location="Para 1",
+            original_text="teh",
+            proposed_text="the",
+            reasoning="Spelling"
+        )
+    ]
+    first = sample_post.model_copy(update={"html": "<p>Fix teh cat.</p><p>Second paragraph.</p>"})
+    state = {"post": first, "style_guidelines": "Style", "suggestions": []}
+    asyncio.run(correct_typos(state))
+
+    parse.return_value.choices[0].message.parsed.suggestions = []
+    edited = first.model_copy(update={"html": "<p>Fix teh cat.</p><p>Edited paragraph.</p>"})
+    state = {"post": edited, "style_guidelines": "Style", "suggestions": []}
+    result = asyncio.run(correct_typos(state))
+
+    assert parse.await_count == 2
+    user_prompt = parse.await_args.kwargs["messages"][1]["content"]
+    assert "Edited paragraph." in user_prompt
+    assert "Fix teh cat." not in user_prompt
+    assert [s.original_text for s in result["suggestions"]] == ["teh"]
+
+def test_cached_paragraph_suggestions_skip_rejected_ones(sample_post, mock_openai, db):
+    parse = mock_openai.beta.chat.completions.parse
+    parse.return_value.choices[0].message.parsed.suggestions = [
+        Suggestion(type=SuggestionType.TYPO, location="Para 1", original_text="teh", proposed_text="the", reasoning="Spelling")
+    ]
+    post = sample_post.model_copy(update={"html": "<p>Fix teh cat.</p>"})
+    state = {"post": post, "style_guidelines": "Style", "suggestions": []}
+    first = asyncio.run(correct_typos(state))
+
+    session = db.create_session(post.id)
+    ids = db.add_suggestions(session.id, [s.model_dump(mode="json") for s in first["suggestions"]])
+    db.record_decisions([(session.id, ids[0], "reject")])
+    # Other drafts with the same paragraph still get the cached suggestion
+    other = asyncio.run(correct_typos({**state, "post": post.model_copy(update={"id": "other"})}))
+    again = asyncio.run(correct_typos(state))
+
+    assert parse.await_count == 1
+    assert [s.original_text for s in other["suggestions"]] == ["teh"]
+    assert again["suggestions"] == []
+
+def test_run_batch_streams_jsonl_and_records_sessions(sample_post, mocker, db):
+    suggestion = Suggestion(
+        type=SuggestionType.TYPO,
+        location="Para 1",
+        original_text="typo",
+        proposed_text="error",
+        reasoning="Spelling"
+    )
+    graph = mocker.Mock(ainvoke=mocker.AsyncMock(return_value={"suggestions": [suggestion]}))
+    mocker.patch.object(batch, "create_agent_graph", return_value=graph)
+    client = mocker.Mock(get_post=mocker.AsyncMock(side_effect=lambda post_id: sample_post.model_copy(update={"id": post_id})))
+    mocker.patch.object(batch, "get_ghost_client", return_value=client)
+
+    out = io.StringIO()
+    failures = asyncio.run(batch.run_batch(["a", "b", "c"], workers=2, out=out))
+
+    records = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert failures == 0
+    assert sorted(r["post_id"] for r in records) == ["a", "b", "c"]
+    assert records[0]["original_text"] == "typo"
+    with db.SessionLocal() as session:
+        assert len(session.scalars(select(SuggestionRow)).all()) == 3
+
+def test_diagnostics_stay_off_stdout(sample_post, mock_openai, mocker, capsys):
+    # Batch runs stream JSONL on stdout, so warnings must go to stderr
+    mocker.patch("proofreader.agent.incremental.get_paragraph_analyses", side_effect=RuntimeError("locked"))
+    mock_openai.beta.chat.completions.parse.return_value.choices[0].message.parsed.suggestions = []
+
+    asyncio.run(correct_typos({"post": sample_post, "style_guidelines": "Style", "suggestions": []}))
+
+    captured = capsys.readouterr()
+    assert captured.out == ""
+    assert "cache lookup failed: locked" in captured.err
+
+def test_create_db_engine_rejects_dialects_without_upserts(db):
+    with pytest.raises(ValueError, match="mysql"):
+        db.create_db_engine("mysql://user@localhost/proofreader")
+
+def test_save_paragraph_analyses_keeps_rows_another_run_saved(db):
+    hour = timedelta(hours=1)
+    db.save_paragraph_analyses("typo_correction", {"a": [], "b": [{"x": 1}]}, hour, max_entries=10)
+    # A concurrent run caching an overlapping set must not fail the whole batch
+    db.save_paragraph_analyses("typo_correction", {"b": [{"x": 2}], "c": []}, hour, max_entries=10)
+
+    assert db.get_paragraph_analyses(["a", "b", "c"], hour) == {"a": [], "b": [{"x": 1}], "c": []}
+
+def test_paragraph_analyses_expire_and_evict_least_recently_used(db):
+    hour = timedelta(hours=1)
+    db.save_paragraph_analyses("typo_correction", {"a": [], "b": []}, hour, max_entries=2)
+    assert db.get_paragraph_analyses(["a"], hour) == {"a": []}
+    db.save_paragraph_analyses("typo_correction", {"c": []}, hour, max_entries=2)
+    assert db.get_paragraph_analyses(["a", "b", "c"], hour) == {"a": [], "c": []}
+
+    assert db.get_paragraph_analyses(["a"], timedelta(0)) == {}
+    # Expired rows are dropped on the next save, so the paragraph can be cached again
+    db.save_paragraph_analyses("typo_correction", {"a": [{"x": 2}]}, timedelta(0), max_entries=2)
+    assert db.get_paragraph_analyses(["a"], hour) == {"a": [{"x": 2}]}
+
+def test_decision_writer_batches_bulk_inserted_suggestions(db):
+    session = db.create_session("post-1")
+    rows = [
+        {"type": "typo", "location": f"Para {i}", "original_text": "a", "proposed_text": "b", "reasoning": "c"}
+        for i in range(3)
+    ]
+    ids = db.add_suggestions(session.id, rows)
+    assert len(ids) == 3
+
+    writer = db.DecisionWriter(flush_interval=0.05)
+    for suggestion_id, action in zip(ids, ["approve", "reject", "approve"]):
+        writer.submit(session.id, suggestion_id, action)
+    writer.close()
+
+    with db.SessionLocal() as s:
+        decisions = s.scalars(select(Decision).order_by(Decision.suggestion_id)).all()
+    assert [(d.suggestion_id, d.action) for d in decisions] == list(zip(ids, ["approve", "reject", "approve"]))
+
+def test_metrics_recorder_tracks_node_and_llm_usage(sample_post, mock_openai, tmp_path):
+    response = mock_openai.beta.chat.completions.parse.return_value
+    response.choices[0].message.parsed.suggestions = []
+    response.usage.prompt_tokens = 1000
+    response.usage.completion_tokens = 100
+
+    recorder = MetricsRecorder(session_id=7)
+    node = instrumented("typo_correction", correct_typos)
+
+    async def run():
+        current_recorder.set(recorder)
+        await node({"post": sample_post, "style_guidelines": "Style", "suggestions": []})
+
+    asyncio.run(run())
+
+    metric = recorder.nodes["typo_correction"]
+    assert metric.status == "done"
+    assert (metric.calls, metric.prompt_tokens, metric.completion_tokens) == (1, 1000, 100)
+    assert metric.cost > 0
+    assert recorder.calls[0].node == "typo_correction"
+
+    trace = tmp_path / "trace.jsonl"
+    recorder.export(str(trace))
+    kinds = [json.loads(line)["kind"] for line in trace.read_text().splitlines()]
+    assert kinds == ["node", "llm_call", "run"]
+
+    # Failed calls are recorded with their error
+    mock_openai.beta.chat.completions.parse.side_effect = RuntimeError("provider down")
+    sample_post.html = "<p>A paragraph that has not been analyzed yet.</p>"
+    asyncio.run(run())
+    assert recorder.calls[-1].error == "provider down"
+    assert recorder.nodes["typo_correction"].calls == 2
+
+def test_document_maps_compact_text_back_to_html():
+    html = '<h2 id="intro">Intro &amp; setup</h2><p>Hello <strong>wor</strong>ld,  this is <a href="https://example.com">a link</a>.</p>'
+    document = Document.from_html(html)
+
+    assert document.render() == "[P1] ## Intro & setup\n[P2] Hello world, this is a link."
+    start, end = document.anchor("world, this", "Paragraph 2")
+    assert html[start:end] == "wor</strong>ld,  this"
+    start, end = document.anchor("Intro & setup")
+    assert html[start:end] == "Intro &amp; setup"
+    assert document.anchor("missing") is None
+
+def test_sample_corpus_prefers_openings_and_recent_posts(sample_post):
+    body = "<h2>Section</h2>" + "".join(f"<p>Body paragraph {i} with some filler words.</p>" for i in range(20))
+    posts = [
+        sample_post.model_copy(update={"id": str(i), "title": f"Post {i}", "html": f"<p>Opening {i}.</p>{body}<p>Closing {i}.</p>"})
+        for i in range(3)
+    ]
+
+    full = sample_corpus(posts, token_budget=100_000, max_posts=3)
+    assert full.text.count("Body paragraph") == 60
+    assert full.tokens < full.source_tokens
+
+    tight = sample_corpus(posts, token_budget=60, max_posts=3)
+    assert tight.tokens <= 60
+    assert "Opening 0." in tight.text and "Opening 2." in tight.text
+    assert "Body paragraph" not in tight.text
+    assert tight.text == sample_corpus(posts, token_budget=60, max_posts=3).text
+
+    fallback = sample_corpus(posts, token_budget=3, max_posts=3)
+    assert [p.id for p in fallback.posts] == ["0"]
+
+def test_merger_collapses_duplicates_and_resolves_overlaps_by_priority():
+    document = Document.from_html("<p>Teh cat sat on teh mat.</p><p>Second paragraph here.</p>")
+
+    def suggestion(kind, original, proposed, location="Paragraph 1"):
+        return Suggestion(type=kind, location=location, original_text=original, proposed_text=proposed, reasoning="r")
+
+    typo = suggestion(SuggestionType.TYPO, "Teh cat", "The cat")
+    rewrite = suggestion(SuggestionType.COHERENCE, "Teh cat sat", "The cat was sitting")
+    merged = merge_suggestions(document, [
+        rewrite,
+        typo,
+        typo.model_copy(update={"proposed_text": "The  cat"}),
+        suggestion(SuggestionType.TYPO, "teh mat", "the mat"),
+        suggestion(SuggestionType.STRUCTURE, "not in the post", "x"),
+        suggestion(SuggestionType.STRUCTURE, "Second paragraph", "Next paragraph", "Paragraph 2"),
+    ])
+    assert [s.proposed_text for s in merged] == ["The cat", "the mat", "Next paragraph"]
+
+    # Streaming: suggestions already shown are kept, a later higher-priority overlap is flagged
+    merger = SuggestionMerger(document)
+    assert merger.add([rewrite]) == [rewrite]
+    flagged = merger.add([typo])
+    assert "Overlaps an earlier suggestion" in flagged[0].reasoning
+    assert merger.add([rewrite.model_copy()]) == []
+    assert (merger.stats.duplicates, merger.stats.conflicts) == (1, 1)
+
+def test_resilient_caller_retries_hedges_and_opens_breaker():
+    def make_caller(**kwargs):
+        return ResilientCaller(
+            RateLimiter(max_concurrency=4, rate_limit_delay=0), timeout=1.0, max_retries=2,
+            backoff_base=0.001, backoff_max=0.01, breaker=CircuitBreaker(3, reset_after=60), **kwargs
+        )
+
+    rate_limited = openai.RateLimitError(
+        "slow down", response=httpx.Response(429, request=httpx.Request("POST", "http://llm.invalid")), body=None
+    )
+    attempts = []
+
+    async def flaky(wait_time, attempt):
+        attempts.append(attempt)
+        if len(attempts) < 3:
+            raise rate_limited
+        return "ok"
+
+    caller = make_caller()
+    assert asyncio.run(caller(flaky)) == "ok"
+    assert attempts == [0, 1, 2]
+
+    async def down(wait_time, attempt):
+        raise rate_limited
+
+    with pytest.raises(openai.RateLimitError):
+        asyncio.run(caller(down))
+    with pytest.raises(CircuitOpenError):
+        asyncio.run(caller(flaky))
+
+    # Once enough latencies are known, a slow request gets a faster duplicate
+    hedging = make_caller(hedge_percentile=0.5, hedge_min_samples=1)
+    hedging.latency.record(0.01)
+    calls = []
+    cancelled = []
+
+    async def slow_then_fast(wait_time, attempt):
+        calls.append(attempt)
+        try:
+            await asyncio.sleep(5 if len(calls) == 1 else 0)
+        except asyncio.CancelledError as e:
+            cancelled.append(str(e))
+            raise
+        return len(calls)
+
+    assert asyncio.run(hedging(slow_then_fast)) == 2
+    assert calls == [0, 0]
+    assert cancelled == ["a hedged duplicate finished first"]
+
+    # A call past its deadline is told why it was stopped
+    async def hanging(wait_time, attempt):
+        try:
+            await asyncio.sleep(5)
+        except asyncio.CancelledError as e:
+            cancelled.append(str(e))
+            raise
+
+    deadline = make_caller()
+    deadline.timeout, deadline.max_retries = 0.01, 0
+    with pytest.raises(TimeoutError):
+        asyncio.run(deadline(hanging))
+    assert cancelled[-1] == "LLM call timed out after 0s"
+
+def test_llm_call_metrics_record_failed_attempts(mock_openai, mocker):
+    mocker.patch.object(utils.resilient_call, "backoff_base", 0)
+    mocker.patch.object(utils.settings, "llm_cache_mode", "off")
+    parse = mock_openai.beta.chat.completions.parse
+    response = parse.return_value
+    response.usage.prompt_tokens, response.usage.completion_tokens = 10, 5
+    parse.side_effect = [TimeoutError("read timed out"), response]
+    recorder = MetricsRecorder()
+
+    async def run():
+        current_recorder.set(recorder)
+        return await utils.get_llm_response("system", "user", StyleAnalysis)
+
+    asyncio.run(run())
+
+    failed, retried = recorder.calls
+    assert (failed.retries, failed.error, failed.prompt_tokens) == (0, "read timed out", 0)
+    assert (retried.retries, retried.error, retried.prompt_tokens) == (1, None, 10)
+    assert recorder.totals()["retries"] == 1
+
+def test_failed_nodes_are_reported_in_state(sample_post, mocker):
+    mocker.patch("proofreader.agent.nodes.style.GhostClient.get_post_summaries", mocker.AsyncMock(return_value=[]))
+    mocker.patch("proofreader.agent.nodes.style.GhostClient.get_posts", mocker.AsyncMock(return_value=[]))
+    mocker.patch("proofreader.agent.nodes.style.get_llm_response", mocker.AsyncMock(side_effect=TimeoutError("timed out")))
+    for module in ("typos", "structure"):
+        mocker.patch(f"proofreader.agent.nodes.{module}.analyze_paragraphs", mocker.AsyncMock(side_effect=RuntimeError("boom")))
+    mocker.patch("proofreader.agent.nodes.coherence.get_llm_response", mocker.AsyncMock(return_value=mocker.Mock(suggestions=[])))
+
+    state = {"post": sample_post, "style_guidelines": "", "suggestions": [], "error": None}
+    result = asyncio.run(create_agent_graph().ainvoke(state))
+
+    assert "Style analysis failed" in result["error"]
+    assert "Typo correction failed: boom" in result["error"]
+    assert "Structure analysis failed: boom" in result["error"]
+    assert "Coherence" not in result["error"]
+
+def test_llm_responses_are_cached_with_lru_eviction(mock_openai, mocker, db):
+    mocker.patch.object(utils.limiter.bucket, "rate", 0)
+    parse = mock_openai.beta.chat.completions.parse
+    parse.return_value.choices[0].message.parsed = SuggestionList(suggestions=[])
+
+    first = asyncio.run(utils.get_llm_response("system", "user", SuggestionList))
+    second = asyncio.run(utils.get_llm_response("system", "user", SuggestionList))
+    assert first == second
+    assert parse.await_count == 1
+
+    mocker.patch.object(utils.settings, "llm_cache_mode", "readonly")
+    asyncio.run(utils.get_llm_response("system", "other", SuggestionList))
+    asyncio.run(utils.get_llm_response("system", "other", SuggestionList))
+    assert parse.await_count == 3
+
+    db.save_cached_response("a", "m", "{}", max_entries=2)
+    db.save_cached_response("b", "m", "{}", max_entries=2)
+    assert db.get_cached_response("a", timedelta(hours=1)) == "{}"
+    db.save_cached_response("c", "m", "{}", max_entries=2)
+    assert db.get_cached_response("b", timedelta(hours=1)) is None
+    assert db.get_cached_response("a", timedelta(hours=1)) == "{}"
+    # Storing a key another request stored meanwhile replaces its response
+    db.save_cached_response("a", "m", '{"v": 2}', max_entries=2)
+    assert db.get_cached_response("a", timedelta(hours=1)) == '{"v": 2}'
+
+    # A failed cache write never fails the LLM call
+    mocker.patch.object(utils.settings, "llm_cache_mode", "readwrite")
+    mocker.patch.object(utils, "save_cached_response", side_effect=RuntimeError("database is locked"))
+    assert asyncio.run(utils.get_llm_response("system", "new", SuggestionList)) == first
+
+def service_request(service, method, path, headers, body=b"", host="127.0.0.1"):
+    """Drive ServiceHandler without a socket; returns the (data, status) it answered with."""
+    handler = object.__new__(type("Handler", (server.ServiceHandler,), {"service": service}))
+    handler.path, handler.headers, handler.rfile = path, headers, io.BytesIO(body)
+    handler.server = Mock(server_address=(host, 8765))
+    handler.send_json = Mock()
+    getattr(handler, f"do_{method}")()
+    return handler.send_json.call_args.args
+
+def ghost_signature(secret, body, sent):
+    return f"sha256={hmac.new(secret.encode(), body + sent.encode(), hashlib.sha256).hexdigest()}, t={sent}"
+
+def test_analysis_service_runs_queued_jobs(sample_post, mocker):
+    suggestion = {"type": "typo", "location": "Paragraph 1", "original_text": "typo", "proposed_text": "error", "reasoning": "r"}
+    mocker.patch.object(batch, "analyze_post", mocker.AsyncMock(
+        side_effect=lambda graph, post: batch.AnalysisResult(post, 7, [suggestion], [70])
+    ))
+    client = mocker.Mock(get_post=mocker.AsyncMock(side_effect=lambda post_id: sample_post.model_copy(update={"id": post_id})))
+    mocker.patch("proofreader.ghost.client.get_ghost_client", return_value=client)
+    service = server.AnalysisService(workers=1, queue_size=1)
+
+    async def run():
+        stop = asyncio.Event()
+        task = asyncio.create_task(service.run(stop))
+        while not service.ready.is_set():
+            await asyncio.sleep(0)
+        job = await service.submit("a")
+        # A job still waiting in the queue already covers a new request for the post
+        assert await service.submit("a") is job
+        with pytest.raises(server.QueueFullError):
+            await service.submit("b")
+        await service.queue.join()
+        stop.set()
+        await task
+        return job
+
+    job = asyncio.run(run())
+    assert job.status == "done" and job.suggestions == [suggestion] and job.suggestion_ids == [70]
+    assert job.post_updated_at == sample_post.updated_at.isoformat()
+    assert asyncio.run(service.latest_for("a", finished=True)) is job
+
+def test_analysis_service_debounces_webhook_events():
+    service = server.AnalysisService(workers=1, queue_size=5, debounce=10)
+
+    async def run():
+        service.loop = asyncio.get_running_loop()
+        service.queue = asyncio.Queue(maxsize=service.queue_size)
+        assert await service.schedule("b") is None
+        first = service.pending["b"]
+        assert await service.schedule("b") is None
+        last = service.pending["b"]
+        assert first.cancelled() and not last.cancelled()
+        assert 9 < last.when() - service.loop.time() <= 10
+        assert (await service.health())["scheduled"] == 1
+
+        # What the timer runs once the burst is over
+        last.cancel()
+        service._submit_pending("b", "webhook")
+        return await service.health()
+
+    health = asyncio.run(run())
+    assert health["scheduled"] == 0 and health["queued"] == 1
+    assert [(j.post_id, j.source) for j in service.jobs.values()] == [("b", "webhook")]
+
+def test_webhook_route_checks_signatures_and_schedules_drafts(mocker):
+    mocker.patch.object(server.settings, "ghost_webhook_secret", "s3cret")
+    service = Mock(debounce=10)
+    service.call.return_value = None
+    draft = json.dumps({"post": {"current": {"id": "b", "status": "draft"}}}).encode()
+    published = json.dumps({"post": {"current": {"id": "c", "status": "published"}}}).encode()
+    sent = str(int(time.time() * 1000))
+
+    def post(body, signature=None, host="127.0.0.1"):
+        headers = {"Content-Length": str(len(body))}
+        if signature:
+            headers["X-Ghost-Signature"] = signature
+        return service_request(service, "POST", "/webhooks/ghost", headers, body, host)
+
+    assert post(draft)[1] == server.HTTPStatus.UNAUTHORIZED
+    assert post(draft, ghost_signature("other", draft, sent))[1] == server.HTTPStatus.UNAUTHORIZED
+    service.schedule.assert_not_called()
+    assert post(draft, ghost_signature("s3cret", draft, sent)) == (
+        {"status": "scheduled", "post_id": "b", "delay": 10}, server.HTTPStatus.ACCEPTED
+    )
+    service.schedule.assert_called_once_with("b")
+    assert post(published, ghost_signature("s3cret", published, sent)) == ({"status": "ignored"}, server.HTTPStatus.ACCEPTED)
+
+    # Unsigned webhooks are only trusted by a service bound to loopback
+    mocker.patch.object(server.settings, "ghost_webhook_secret", None)
+    assert post(draft)[1] == server.HTTPStatus.ACCEPTED
+    assert post(draft, host="0.0.0.0")[1] == server.HTTPStatus.UNAUTHORIZED
+
+def test_service_routes_require_the_token_and_bounded_bodies(mocker):
+    mocker.patch.object(server.settings, "service_token", "t0ken")
+    service = Mock()
+
+    assert service_request(service, "GET", "/jobs/1", {})[1] == server.HTTPStatus.UNAUTHORIZED
+    assert service_request(service, "GET", "/health", {"Authorization": "Bearer nope"})[1] == server.HTTPStatus.UNAUTHORIZED
+    assert service_request(service, "POST", "/jobs", {"Content-Length": "2"}, b"{}")[1] == server.HTTPStatus.UNAUTHORIZED
+    service.call.assert_not_called()
+
+    too_large = {"Content-Length": str(server.MAX_BODY_BYTES + 1), "Authorization": "Bearer t0ken"}
+    assert service_request(service, "POST", "/jobs", too_large)[1] == server.HTTPStatus.REQUEST_ENTITY_TOO_LARGE
+    service.call.return_value = None
+    assert service_request(service, "GET", "/jobs/1", {"Authorization": "Bearer t0ken"})[1] == server.HTTPStatus.NOT_FOUND
+    assert server.service_headers() == {"Authorization": "Bearer t0ken"}
+
+    # Off loopback, the service needs both the webhook secret and the token
+    mocker.patch.object(server.settings, "service_token", None)
+    with pytest.raises(ValueError, match="GHOST_WEBHOOK_SECRET and SERVICE_TOKEN"):
+        server.serve("0.0.0.0", 0, workers=1, queue_size=1)
+    mocker.patch.object(server.settings, "ghost_webhook_secret", "s3cret")
+    with pytest.raises(ValueError, match="Set SERVICE_TOKEN"):
+        server.serve("0.0.0.0", 0, workers=1, queue_size=1)
+
+def test_verify_ghost_signature_rejects_stale_timestamps():
+    body = b'{"post": {}}'
+    header = ghost_signature("s3cret", body, "1700000000000")
+
+    assert verify_ghost_signature("s3cret", body, header, now=1700000060)
+    assert not verify_ghost_signature("s3cret", body + b" ", header, now=1700000060)
+    assert not verify_ghost_signature("other", body, header, now=1700000060)
+    # A captured request replayed later is refused
+    assert not verify_ghost_signature("s3cret", body, header, now=1700000000 + 301)
+    assert not verify_ghost_signature("s3cret", body, "sha256=abc, t=soon", now=1700000060)
+
+def test_request_analysis_queues_a_job_and_polls_it(sample_post, mocker):
+    mocker.patch.object(server.settings, "service_token", "t0ken")
+    job = {"id": "j1", "post_id": sample_post.id, "source": "api", "status": "queued"}
+    analyzed = sample_post.updated_at.isoformat()
+    polls = []
+
+    def handle(request):
+        assert request.headers["Authorization"] == "Bearer t0ken"
+        if request.method == "POST":
+            return httpx.Response(202, json=job)
+        if request.url.path == f"/posts/{sample_post.id}/suggestions":
+            return httpx.Response(404, json={"error": "No finished analysis for this post"})
+        polls.append(request.url.path)
+        done = len(polls) > 1
+        return httpx.Response(200, json={
+            **job,
+            "status": "done" if done else "running",
+            "post_updated_at": analyzed if done else None,
+            "suggestions": [{"type": "typo", "location": "P1", "original_text": "a", "proposed_text": "b", "reasoning": "r"}],
+        })
+
+    client = httpx.AsyncClient
+    mocker.patch.object(server.httpx, "AsyncClient", lambda **kwargs: client(transport=httpx.MockTransport(handle), **kwargs))
+    assert asyncio.run(server.fetch_preanalyzed("http://service", sample_post)) is None
+    result = asyncio.run(server.request_analysis("http://service", sample_post, poll_interval=0))
+    assert polls == ["/jobs/j1", "/jobs/j1"]
+    assert server.job_suggestions(result)[0].proposed_text == "b"
+
+    # An analysis of another version of the post is not reviewed against this one
+    edited = sample_post.model_copy(update={"updated_at": sample_post.updated_at.replace(year=2000)})
+    polls.clear()
+    assert asyncio.run(server.request_analysis("http://service", edited, poll_interval=0)) is None
@@ -0,0 +1,147 @@
+import json
+from proofreader.agent.suggestions import Suggestion, SuggestionType
+from proofreader.editing.changes import diff_html, diff_lexical
+from proofreader.editing.html import CONFLICT, FORMATTING, NOT_FOUND, patch_html
+from proofreader.editing.lexical import patch_lexical
+from proofreader.editing.spans import find_matches
+from proofreader.editing.validation import check_content
+from proofreader.ui.widgets.diff import DELETED_STYLE, INSERTED_STYLE, inline_diff, render_diff
+
+def make_suggestion(original, proposed):
+    return Suggestion(
+        type=SuggestionType.TYPO,
+        location="Para 1",
+        original_text=original,
+        proposed_text=proposed,
+        reasoning="Test"
+    )
+
+def text_node(text, fmt=0):
+    return {"type": "extended-text", "text": text, "format": fmt, "detail": 0, "mode": "normal", "style": "", "version": 1}
+
+def make_lexical(*paragraphs):
+    return json.dumps({"root": {"type": "root", "children": [
+        {"type": "paragraph", "children": list(children), "version": 1} for children in paragraphs
+    ], "version": 1}})
+
+def test_patch_lexical_replaces_within_and_across_text_nodes():
+    lexical = make_lexical(
+        [text_node("This is a "), text_node("tset", 1), text_node(" of the sytem.")],
+        [text_node("Second paragrph.")],
+    )
+    result = patch_lexical(lexical, [
+        make_suggestion("sytem", "system"),
+        make_suggestion("a tset of", "a test of"),
+        make_suggestion("paragrph", "paragraph"),
+    ])
+
+    assert len(result.applied) == 3
+    assert result.unanchored == []
+    paragraphs = json.loads(result.lexical)["root"]["children"]
+    assert "".join(n["text"] for n in paragraphs[0]["children"]) == "This is a test of the system."
+    assert paragraphs[1]["children"][0]["text"] == "Second paragraph."
+
+def test_patch_lexical_reports_unanchored_suggestions():
+    lexical = make_lexical([text_node("First block.")], [text_node("Second block.")])
+    result = patch_lexical(lexical, [
+        make_suggestion("block.\n\nSecond", "block. Second"),
+        make_suggestion("missing", "found"),
+        make_suggestion(" First ", "Initial"),
+    ])
+
+    assert [s.original_text for s in result.applied] == [" First "]
+    assert len(result.unanchored) == 2
+    assert json.loads(result.lexical)["root"]["children"][0]["children"][0]["text"] == "Initial block."
+
+def test_patch_lexical_matches_quotes_from_the_compact_text():
+    lexical = make_lexical([text_node("This is  teh end.")], [text_node("A\u00a0tset "), text_node("here.", 1)])
+    result = patch_lexical(lexical, [
+        make_suggestion("is teh end", "is the end"),
+        make_suggestion("A tset here", "A test here"),
+    ])
+
+    assert result.unanchored == []
+    paragraphs = json.loads(result.lexical)["root"]["children"]
+    assert paragraphs[0]["children"][0]["text"] == "This is the end."
+    assert "".join(n["text"] for n in paragraphs[1]["children"]) == "A test here."
+
+def test_find_matches_tries_shorter_patterns_after_a_rejected_match():
+    text = "teh cat and teh cat"
+    assert find_matches(text, {"teh cat": [0], "teh": [1]}, []) == {0: (0, 7), 1: (12, 15)}
+    # A match rejected as not editable does not hide a pattern starting inside it
+    editable = lambda start, end: start >= 2
+    assert find_matches(text, {"teh cat": [0], "h cat": [1]}, [], editable) == {0: (12, 19), 1: (2, 7)}
+
+def test_patch_html_applies_all_spans_in_one_pass():
+    html = '<p><a href="/cat">The cat</a> sat on <strong>teh</strong> mat &amp; rug.</p><p>cat cat</p>'
+    result = patch_html(html, [
+        make_suggestion("cat", "dog"),
+        make_suggestion("cat", "bird"),
+        make_suggestion("The cat", "A cat"),
+        make_suggestion("teh mat & rug", "the mat & rug"),
+        make_suggestion("The cat sat", "A dog sat"),
+        make_suggestion("unicorn", "horse"),
+        make_suggestion("cat sat on teh", "dog sits on the"),
+    ])
+
+    # Only the changed letters are rewritten, so the bold run keeps its formatting
+    assert result.html == '<p><a href="/cat">A cat</a> sat on <strong>the</strong> mat &amp; rug.</p><p>dog bird</p>'
+    assert [s.proposed_text for s in result.applied] == ["dog", "bird", "A cat", "the mat & rug"]
+    assert [(s.suggestion.proposed_text, s.reason) for s in result.skipped] == [
+        ("A dog sat", CONFLICT),
+        ("horse", NOT_FOUND),
+        ("dog sits on the", FORMATTING),
+    ]
+
+def test_inline_diff_highlights_changed_words_only():
+    original, proposed = inline_diff("The quick brwn fox jumps.", "The quick brown fox leaps.")
+    assert original.plain == "The quick brwn fox jumps."
+    assert proposed.plain == "The quick brown fox leaps."
+    inserted = {proposed.plain[span.start:span.end] for span in proposed.spans if span.style == INSERTED_STYLE}
+    deleted = {original.plain[span.start:span.end] for span in original.spans if span.style == DELETED_STYLE}
+    assert "o" in inserted and "The" not in inserted
+    assert "fox" not in deleted
+    assert render_diff("a b", "a c") is render_diff("a b", "a c")
+
+def test_diff_lexical_reports_only_changed_blocks():
+    old = make_lexical([text_node("First.")], [text_node("Secnd "), text_node("para", 1)], [text_node("Third.")])
+    new = make_lexical([text_node("First.")], [text_node("Second "), text_node("para", 1)], [text_node("Third.")], [text_node("Fourth.")])
+    changes = diff_lexical(old, new)
+
+    assert [(c.kind, c.position, c.old_text, c.new_text) for c in changes] == [
+        ("changed", 2, "Secnd para", "Second para"),
+        ("added", 4, "", "Fourth."),
+    ]
+    removed = diff_html("<p>One</p><p>Two</p>", "<p>One</p>")
+    assert [(c.kind, c.old_text) for c in removed] == [("removed", "Two")]
+
+def test_diff_blocks_aligns_on_unique_blocks():
+    old = "<p>Intro</p><p>Note</p><p>Moved</p><p>Body</p><p>End</p>"
+    new = "<p>Intro</p><p>Notes</p><p>Body</p><p>Moved</p><p>End</p>"
+    changes = diff_html(old, new)
+
+    assert [(c.kind, c.position, c.old_text, c.new_text) for c in changes] == [
+        ("changed", 2, "Note", "Notes"),
+        ("removed", 3, "Moved", ""),
+        ("added", 4, "", "Moved"),
+    ]
+    # Long runs of identical blocks are matched without pairwise comparison
+    many = "<p>Same</p>" * 20000
+    assert diff_html(many + "<p>A</p>", many + "<p>B</p>")[0].position == 20001
+
+def test_check_content_flags_deletions_and_malformed_lexical():
+    old = make_lexical([text_node("A" * 50)], [text_node("B" * 50)])
+    small_fix = make_lexical([text_node("A" * 48 + "aa")], [text_node("B" * 50)])
+    check = check_content(old, small_fix, True, 0.2)
+    assert check.ok
+    assert (check.deleted_chars, check.changed_chars) == (0, 2)
+
+    dropped = make_lexical([text_node("A" * 50)])
+    check = check_content(old, dropped, True, 0.2)
+    assert check.deletion_ratio == 0.5 and not check.ok
+    assert "50%" in check.summary()
+
+    broken = json.dumps({"root": {"type": "root", "children": [{"type": "paragraph", "children": [{"type": "text"}]}]}})
+    assert check_content(old, broken, True, 0.2).schema_errors == ["root.0.0: text node without text"]
+
+    assert check_content("<p>One two</p>", "<p>One</p>", False, 0.2).deleted_chars == 4